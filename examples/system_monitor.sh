@@ -3,33 +3,50 @@
 # システム監視スクリプト - Pushover通知付き
 # このスクリプトは定期的に実行してシステムの状態を監視し、
 # 問題が発生した場合にPushover経由で通知を送信します
+#
+# ディスク・メモリ・CPU負荷だけを監視する場合は、外部コマンドを起動しない
+# 常駐版の "pushover monitor" を使用できます（閾値のばたつき防止付き）:
+#   pushover monitor --interval 5 --disk / --disk-warning 90 --disk-critical 95
 
 # 設定
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
-PUSHOVER_CLI="$SCRIPT_DIR/../pushover_cli.py"
 
-# Pushover CLI が存在するかチェック
-if [ ! -f "$PUSHOVER_CLI" ]; then
-    echo "エラー: pushover_cli.py が見つかりません: $PUSHOVER_CLI"
-    exit 1
+# pushover コマンドがインストールされていなければリポジトリ内のパッケージを使用
+if command -v pushover >/dev/null 2>&1; then
+    PUSHOVER=(pushover)
+else
+    export PYTHONPATH="$SCRIPT_DIR/..${PYTHONPATH:+:$PYTHONPATH}"
+    PUSHOVER=(python -m pushover_cli.cli)
 fi
 
-# 関数: 通知送信
+# 検出したアラート（JSON Lines）
+ALERTS=()
+
+# 関数: JSON文字列のエスケープ
+json_escape() {
+    local s="${1//\\/\\\\}"
+    s="${s//\"/\\\"}"
+    printf '%s' "$s"
+}
+
+# 関数: 通知送信（最後に pushover batch でまとめて送信）
 send_notification() {
     local message="$1"
     local title="$2"
     local priority="${3:-0}"
     
-    python "$PUSHOVER_CLI" -m "$message" --title "$title" --priority "$priority"
+    ALERTS+=("$(printf '{"message": "%s", "title": "%s", "priority": %d}' \
+        "$(json_escape "$message")" "$(json_escape "$title")" "$priority")")
 }
 
 # 1. ディスク使用量チェック
 echo "ディスク使用量をチェック中..."
 disk_usage=$(df / | tail -1 | awk '{print $5}' | sed 's/%//')
-if [ "$disk_usage" -gt 90 ]; then
-    send_notification "ディスク使用量が${disk_usage}%に達しました" "ディスク容量警告" 1
-elif [ "$disk_usage" -gt 95 ]; then
+# 高い閾値から先に判定する（90% の判定を先にすると 95% 超でも警告になる）
+if [ "$disk_usage" -gt 95 ]; then
     send_notification "ディスク使用量が${disk_usage}%に達しました！緊急対応が必要です" "ディスク容量緊急" 2
+elif [ "$disk_usage" -gt 90 ]; then
+    send_notification "ディスク使用量が${disk_usage}%に達しました" "ディスク容量警告" 1
 fi
 
 # 2. メモリ使用量チェック
@@ -74,4 +91,10 @@ if [ "$error_count" -gt 10 ]; then
     send_notification "過去1時間で${error_count}件のエラーが記録されました" "システムエラー" 1
 fi
 
+# 7. 検出したアラートを1プロセス・1接続でまとめて送信
+if [ "${#ALERTS[@]}" -gt 0 ]; then
+    echo "${#ALERTS[@]}件の通知を送信中..."
+    printf '%s\n' "${ALERTS[@]}" | "${PUSHOVER[@]}" batch
+fi
+
 echo "システム監視完了" 
\ No newline at end of file
@@ -9,8 +9,40 @@ __author__ = "Pushover CLI"
 __email__ = ""
 __description__ = "コマンドラインからPushover通知を送信するシンプルなツール"
 
-from .core import PushoverCLI
-from .cli import main
-from .config import ConfigManager
+# 公開名と定義モジュールの対応。モジュールは最初に参照されたときに読み込む
+# （"from pushover_cli.cli import main" だけで全モジュールを読み込まないようにする）
+_LAZY_ATTRIBUTES = {
+    'PushoverCLI': 'core',
+    'AsyncPushoverCLI': 'aio',
+    'main': 'cli',
+    'ConfigManager': 'config',
+    'RetryPolicy': 'retry',
+    'ReceiptPoller': 'receipts',
+    'PushoverError': 'errors',
+    'PushoverConnectionError': 'errors',
+    'PushoverAPIError': 'errors',
+    'PushoverRequestError': 'errors',
+    'PushoverServerError': 'errors',
+    'PushoverRateLimitError': 'errors',
+}
 
-__all__ = ['PushoverCLI', 'main', 'ConfigManager'] 
\ No newline at end of file
+__all__ = [
+    'PushoverCLI', 'AsyncPushoverCLI', 'main', 'ConfigManager', 'RetryPolicy', 'ReceiptPoller',
+    'PushoverError', 'PushoverConnectionError', 'PushoverAPIError',
+    'PushoverRequestError', 'PushoverServerError', 'PushoverRateLimitError',
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    # 次回以降はモジュールの属性として直接参照される
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
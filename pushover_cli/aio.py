@@ -0,0 +1,223 @@
+"""
+Pushover CLI asyncio クライアントモジュール
+
+イベントループ上で keep-alive 接続を再利用しながら通知を並行送信する
+"""
+
+import asyncio
+import ssl
+import time
+import urllib.parse
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .core import API_PATH, build_message_data, parse_api_response, resolve_api_endpoint
+from .ratelimit import RateLimitState
+
+
+class _AsyncConnection:
+    """asyncio ストリーム上の HTTP/1.1 keep-alive 接続"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    async def request(
+        self, host: str, path: str, body: bytes, headers: Dict[str, str]
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """POSTリクエストを送信しレスポンスを読み込む"""
+        lines = [f"POST {path} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}"]
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("サーバーが接続を閉じました")
+        status = int(status_line.split(None, 2)[1])
+
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            data = b"".join(chunks)
+        elif "content-length" in response_headers:
+            data = await self.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            data = await self.reader.read()
+            response_headers["connection"] = "close"
+        self.last_used = time.monotonic()
+        return status, response_headers, data
+
+    @property
+    def reusable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except Exception:
+            pass
+
+
+class AsyncPushoverCLI:
+    """asyncio 対応の Pushover クライアント
+
+    開いている接続数は ``pool_size`` 本に制限され、送信が終わった接続は
+    次のリクエストで再利用される。
+
+    使用例:
+        async with AsyncPushoverCLI(token, user) as pushover:
+            results = await pushover.send_many(["a", "b", "c"], concurrency=8)
+    """
+
+    def __init__(
+        self,
+        token: str,
+        user: str,
+        api_url: Optional[str] = None,
+        timeout: float = 10.0,
+        pool_size: int = 8,
+        idle_timeout: float = 60.0,
+        ssl_context: Optional[ssl.SSLContext] = None
+    ):
+        self.token = token
+        self.user = user
+        self.host, self.port, self.secure = resolve_api_endpoint(api_url)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        if self.secure and ssl_context is None:
+            ssl_context = ssl.create_default_context()
+        self.ssl_context = ssl_context if self.secure else None
+        self.rate_limit = RateLimitState()
+
+        self._idle: List[_AsyncConnection] = []
+        # asyncio のプリミティブはイベントループ上で遅延生成する
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _acquire(self) -> Tuple[_AsyncConnection, bool]:
+        """接続を取り出す（なければ新規に接続）"""
+        now = time.monotonic()
+        while self._idle:
+            conn = self._idle.pop()
+            if now - conn.last_used <= self.idle_timeout and conn.reusable:
+                return conn, True
+            await conn.close()
+        # 接続と TLS ハンドシェイクにも timeout を適用する
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(
+            self.host,
+            self.port,
+            ssl=self.ssl_context,
+            server_hostname=self.host if self.secure else None
+        ), self.timeout)
+        return _AsyncConnection(reader, writer), False
+
+    async def _request(self, body: bytes) -> Tuple[int, bytes]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        headers = {"Content-type": "application/x-www-form-urlencoded"}
+        async with self._slots:
+            while True:
+                conn, reused = await self._acquire()
+                try:
+                    status, response_headers, data = await asyncio.wait_for(
+                        conn.request(self.host, API_PATH, body, headers), self.timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    await conn.close()
+                    # 再利用した接続が切れていた場合のみ新しい接続で再送する
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    await conn.close()
+                    raise
+                if response_headers.get("connection", "").lower() == "close":
+                    await conn.close()
+                else:
+                    self._idle.append(conn)
+                self.rate_limit.record_response(status, response_headers)
+                return status, data
+
+    async def send_notification(
+        self,
+        message: str,
+        title: Optional[str] = None,
+        priority: int = 0,
+        url: Optional[str] = None,
+        url_title: Optional[str] = None,
+        device: Optional[str] = None,
+        sound: Optional[str] = None,
+        user: Optional[str] = None,
+        retry_interval: Optional[int] = None,
+        expire: Optional[int] = None,
+        html: bool = False
+    ) -> Tuple[bool, str]:
+        """
+        Pushover通知を送信（PushoverCLI.send_notification の非同期版）
+
+        Returns:
+            (成功フラグ, レスポンスメッセージ)
+        """
+        data = build_message_data(
+            self.token, user or self.user, message, title, priority, url, url_title, device, sound,
+            retry_interval, expire, html
+        )
+        try:
+            status, body = await self._request(urllib.parse.urlencode(data).encode("utf-8"))
+            return parse_api_response(status, body)
+        except asyncio.TimeoutError:
+            return False, "接続エラー: タイムアウトしました"
+        except Exception as e:
+            return False, f"接続エラー: {str(e)}"
+
+    async def send_many(
+        self,
+        messages: Iterable[Union[str, Dict[str, Any]]],
+        concurrency: Optional[int] = None
+    ) -> List[Tuple[bool, str]]:
+        """
+        複数の通知を並行送信
+
+        Args:
+            messages: メッセージ文字列、または send_notification の引数の辞書
+            concurrency: 同時送信数の上限（デフォルト: pool_size）
+
+        Returns:
+            入力と同じ順序の (成功フラグ, レスポンスメッセージ) のリスト
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.pool_size)
+
+        async def send_one(item: Union[str, Dict[str, Any]]) -> Tuple[bool, str]:
+            kwargs = {"message": item} if isinstance(item, str) else item
+            async with semaphore:
+                return await self.send_notification(**kwargs)
+
+        return list(await asyncio.gather(*(send_one(item) for item in messages)))
+
+    async def close(self) -> None:
+        """保持している接続をすべて閉じる"""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.close()
+
+    async def __aenter__(self) -> "AsyncPushoverCLI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,172 @@
+"""
+Pushover CLI 添付ファイルモジュール
+
+画像を multipart/form-data でストリーミング送信する。
+ファイルは全体を読み込まず、再利用するバッファに少しずつ読み込んで送信する。
+"""
+
+import mimetypes
+import os
+import uuid
+from typing import Callable, Dict, Iterator, Optional, Union
+
+from .errors import PushoverError
+
+
+# APIが受け付ける添付ファイルの最大サイズ（2.5MB）
+MAX_ATTACHMENT_SIZE = 2621440
+
+# ファイルから読み込む単位
+CHUNK_SIZE = 64 * 1024
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class AttachmentError(PushoverError):
+    """添付ファイルを送信できないことを示す例外（再試行しても解決しない）"""
+
+
+class Attachment:
+    """送信する添付ファイル
+
+    ``path`` を指定した場合は送信のたびにファイルから読み込み、``data`` を指定した場合は
+    その内容（bytes・memoryview・mmap など）をコピーせずに送信する。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        data: Optional[BytesLike] = None,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None
+    ):
+        if (path is None) == (data is None):
+            raise ValueError("path と data のどちらか一方を指定してください")
+        self.path = path
+        self.data = memoryview(data).cast("B") if data is not None else None
+        self.filename = filename or (os.path.basename(path) if path else "attachment")
+        self.content_type = (
+            content_type
+            or mimetypes.guess_type(self.filename)[0]
+            or "application/octet-stream"
+        )
+
+    @property
+    def size(self) -> int:
+        """添付ファイルのバイト数
+
+        Raises:
+            AttachmentError: ファイルが存在しない・読めない場合
+        """
+        if self.data is not None:
+            return self.data.nbytes
+        try:
+            return os.stat(self.path).st_size
+        except OSError as e:
+            raise AttachmentError(f"添付ファイルを読めません: {e}") from e
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[BytesLike]:
+        """内容を chunk_size ずつ返す
+
+        ファイルの場合は同じバッファを使い回すため、返した値は次の要素を取り出す前に
+        使い終わっている必要がある（送信にそのまま渡す用途を想定）。
+        """
+        if self.data is not None:
+            for offset in range(0, self.data.nbytes, chunk_size):
+                yield self.data[offset:offset + chunk_size]
+            return
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        with open(self.path, "rb", buffering=0) as f:
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                yield view[:read]
+
+
+# 大きすぎる添付ファイルを縮小する関数（例: 画像を縮小・再圧縮して一時ファイルに書き出す）
+AttachmentResizer = Callable[[Attachment, int], Attachment]
+
+
+def prepare_attachment(
+    attachment: Union[str, Attachment],
+    max_size: int = MAX_ATTACHMENT_SIZE,
+    resizer: Optional[AttachmentResizer] = None
+) -> Attachment:
+    """
+    送信前に添付ファイルのサイズを確認
+
+    Args:
+        attachment: ファイルパス、または Attachment
+        max_size: 許容する最大バイト数
+        resizer: 上限を超えた場合に (添付ファイル, 上限) を受け取り、
+            縮小した Attachment を返す関数（オプション）
+
+    Raises:
+        AttachmentError: 読めない場合、または縮小しても上限を超える場合
+    """
+    if not isinstance(attachment, Attachment):
+        attachment = Attachment(path=attachment)
+    size = attachment.size
+    if size > max_size and resizer is not None:
+        attachment = resizer(attachment, max_size)
+        size = attachment.size
+    if size > max_size:
+        raise AttachmentError(
+            f"添付ファイルが大きすぎます: {size} バイト（上限 {max_size} バイト）"
+        )
+    return attachment
+
+
+class MultipartBody:
+    """multipart/form-data のリクエスト本文
+
+    テキストのフィールドと添付ファイル1つで構成し、反復するたびに先頭から生成する
+    （接続の張り直しや再試行で同じ本文を再送できる）。長さは事前に計算するため
+    Content-Length を付けて送信できる。
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        attachment: Attachment,
+        chunk_size: int = CHUNK_SIZE
+    ):
+        self.attachment = attachment
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            )
+        filename = attachment.filename.replace('"', "%22")
+        parts.append(
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="attachment"; filename="{filename}"\r\n'
+            f"Content-Type: {attachment.content_type}\r\n\r\n"
+        )
+        self._head = "".join(parts).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("ascii")
+        self._size = attachment.size
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return len(self._head) + self._size + len(self._tail)
+
+    def __iter__(self) -> Iterator[BytesLike]:
+        yield self._head
+        sent = 0
+        for chunk in self.attachment.chunks(self.chunk_size):
+            sent += len(chunk)
+            yield chunk
+        if sent != self._size:
+            # Content-Length と食い違う本文は送れない（送信中にファイルが変更された）
+            raise AttachmentError("送信中に添付ファイルのサイズが変わりました")
+        yield self._tail
@@ -0,0 +1,249 @@
+"""
+Pushover CLI バッチ送信モジュール
+
+JSON Lines 形式の入力を1つのクライアントで並行送信する
+"""
+
+import collections
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, TextIO, Tuple
+
+from .core import MAX_EXPIRE, MIN_RETRY_INTERVAL, PushoverCLI
+from .prepared import PipelinedSender
+from .templates import MessageTemplate, render_with
+
+
+# 1行のJSONで指定できる send_notification の引数
+BATCH_FIELDS = (
+    "message", "title", "priority", "url", "url_title", "device", "sound", "user", "attachment",
+    "retry_interval", "expire", "html"
+)
+
+# テンプレートを使う場合のフィールド（template: テンプレート名, vars: 変数の辞書）
+TEMPLATE_FIELDS = ("template", "vars")
+
+
+def parse_batch_line(
+    line: str,
+    templates: Optional[Mapping[str, MessageTemplate]] = None
+) -> Dict[str, Any]:
+    """JSON Lines の1行を send_notification の引数に変換
+
+    templates を渡すと "template" と "vars" でテンプレートを展開できる
+    （その行に指定したほかのフィールドはテンプレートの値より優先する）。
+
+    Raises:
+        ValueError: JSONとして不正、または必須項目・型が不正な場合
+    """
+    return parse_batch_item(json.loads(line), templates)
+
+
+def parse_batch_item(
+    item: Any,
+    templates: Optional[Mapping[str, MessageTemplate]] = None,
+    fields: Tuple[str, ...] = BATCH_FIELDS
+) -> Dict[str, Any]:
+    """デコード済みの JSON の値を send_notification の引数に変換（parse_batch_line を参照）
+
+    fields で受け付けるフィールドを制限できる。
+
+    Raises:
+        ValueError: 必須項目・型が不正な場合
+    """
+    if not isinstance(item, dict):
+        raise ValueError("JSONオブジェクトではありません")
+    allowed = fields + TEMPLATE_FIELDS if templates is not None else fields
+    unknown = set(item) - set(allowed)
+    if unknown:
+        raise ValueError(f"不明なフィールド: {', '.join(sorted(unknown))}")
+    if "template" in item:
+        variables = item.pop("vars", {})
+        if not isinstance(variables, dict):
+            raise ValueError("vars はJSONオブジェクトで指定してください")
+        item = render_with(templates, str(item.pop("template")), variables, item)
+    if not isinstance(item.get("message"), str) or not item["message"]:
+        raise ValueError("message が必要です")
+    if "attachment" in item and (not isinstance(item["attachment"], str) or not item["attachment"]):
+        raise ValueError("attachment はファイルのパスを文字列で指定してください")
+    if "priority" in item:
+        item["priority"] = _int_field(item, "priority")
+        if item["priority"] not in (-2, -1, 0, 1, 2):
+            raise ValueError("priority は -2〜2 の範囲で指定してください")
+    if "retry_interval" in item:
+        item["retry_interval"] = _int_field(item, "retry_interval")
+        if item["retry_interval"] < MIN_RETRY_INTERVAL:
+            raise ValueError(f"retry_interval は{MIN_RETRY_INTERVAL}秒以上で指定してください")
+    if "expire" in item:
+        item["expire"] = _int_field(item, "expire")
+        if not 0 < item["expire"] <= MAX_EXPIRE:
+            raise ValueError(f"expire は1〜{MAX_EXPIRE}秒の範囲で指定してください")
+    if "html" in item:
+        item["html"] = _bool_field(item, "html")
+    return item
+
+
+def _bool_field(item: Dict[str, Any], name: str) -> bool:
+    """真偽値のフィールドを変換（webhook の --map やテンプレートで展開した "0"/"1" も受け付ける）"""
+    value = item[name]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ("1", "true", "yes", "on"):
+            return True
+        if text in ("", "0", "false", "no", "off"):
+            return False
+    raise ValueError(f"{name} は true/false（または 1/0）で指定してください")
+
+
+def _int_field(item: Dict[str, Any], name: str) -> int:
+    """整数のフィールドを変換（数値・数字の文字列以外は ValueError）"""
+    value = item[name]
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} は整数で指定してください")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} は整数で指定してください") from None
+
+
+def _send_line(
+    client: PushoverCLI,
+    line: str,
+    templates: Optional[Mapping[str, MessageTemplate]] = None
+) -> Tuple[bool, str]:
+    try:
+        kwargs = parse_batch_line(line, templates)
+    except ValueError as e:
+        return False, f"入力エラー: {str(e)}"
+    return client.send_notification(**kwargs)
+
+
+def _send_chunk(
+    local: threading.local,
+    client: PushoverCLI,
+    depth: int,
+    chunk: List[str],
+    templates: Optional[Mapping[str, MessageTemplate]] = None
+) -> List[Tuple[bool, str]]:
+    """複数行をパイプラインで送信し、行ごとの結果を返す（入力エラーの行は送信しない）"""
+    sender = getattr(local, "sender", None)
+    if sender is None:
+        # バッファを再利用するため、送信側はスレッドごとに1つ作る
+        sender = local.sender = PipelinedSender(client, depth)
+    results: List[Optional[Tuple[bool, str]]] = []
+    messages = []
+    for line in chunk:
+        try:
+            messages.append(parse_batch_line(line, templates))
+            results.append(None)
+        except ValueError as e:
+            results.append((False, f"入力エラー: {str(e)}"))
+    sent = iter(sender.send_many(messages))
+    return [result or next(sent) for result in results]
+
+
+def run_batch(
+    client: PushoverCLI,
+    lines: Iterable[str],
+    output: TextIO,
+    concurrency: int = 4,
+    templates: Optional[Mapping[str, MessageTemplate]] = None,
+    pipeline: int = 0
+) -> Tuple[int, int]:
+    """
+    JSON Lines を読みながら並行送信し、入力順に結果を1行ずつ書き出す
+
+    入力はストリームとして処理し、未完了の送信は ``concurrency * 2`` 件までに
+    制限するため、大きな入力でもメモリ使用量は一定に保たれる。
+
+    Args:
+        client: 送信に使用するクライアント（接続プールを共有）
+        lines: 入力行のイテラブル（空行は無視）
+        output: 結果（JSON Lines）の書き出し先
+        concurrency: 同時送信数
+        templates: 入力行の "template" で使えるテンプレート（解析済みのものを全行で共有）
+        pipeline: 2以上の場合、各スレッドがこの件数ずつ HTTP/1.1 パイプラインでまとめて送信する
+            （prepared.PipelinedSender。client は PushoverCLI であること）
+
+    Returns:
+        (成功件数, 失敗件数)
+    """
+    succeeded = failed = 0
+    pending: Deque[Tuple[int, Future]] = collections.deque()
+
+    def write(line_no: int, result: Tuple[bool, str]) -> None:
+        nonlocal succeeded, failed
+        success, message = result
+        if success:
+            succeeded += 1
+        else:
+            failed += 1
+        output.write(json.dumps(
+            {"line": line_no, "success": success, "message": message},
+            ensure_ascii=False
+        ) + "\n")
+        output.flush()
+
+    def emit(line_no: int, future: Future) -> None:
+        write(line_no, future.result())
+
+    if pipeline > 1:
+        _run_pipelined(client, lines, concurrency, templates, pipeline, write)
+        return succeeded, failed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for line_no, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            pending.append((line_no, executor.submit(_send_line, client, line, templates)))
+            while len(pending) >= concurrency * 2:
+                emit(*pending.popleft())
+        while pending:
+            emit(*pending.popleft())
+
+    return succeeded, failed
+
+
+def _run_pipelined(
+    client: PushoverCLI,
+    lines: Iterable[str],
+    concurrency: int,
+    templates: Optional[Mapping[str, MessageTemplate]],
+    depth: int,
+    write: Callable[[int, Tuple[bool, str]], None]
+) -> None:
+    """run_batch のパイプライン版（depth 行ずつまとめて送信し、入力順に結果を書き出す）"""
+    local = threading.local()
+    pending: Deque[Tuple[List[int], Future]] = collections.deque()
+
+    def emit_chunk(line_numbers: List[int], future: Future) -> None:
+        for line_no, result in zip(line_numbers, future.result()):
+            write(line_no, result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        line_numbers: List[int] = []
+        chunk: List[str] = []
+        for line_no, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            line_numbers.append(line_no)
+            chunk.append(line)
+            if len(chunk) < depth:
+                continue
+            pending.append((line_numbers, executor.submit(
+                _send_chunk, local, client, depth, chunk, templates
+            )))
+            line_numbers, chunk = [], []
+            while len(pending) >= concurrency * 2:
+                emit_chunk(*pending.popleft())
+        if chunk:
+            pending.append((line_numbers, executor.submit(
+                _send_chunk, local, client, depth, chunk, templates
+            )))
+        while pending:
+            emit_chunk(*pending.popleft())
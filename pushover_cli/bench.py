@@ -0,0 +1,430 @@
+"""
+Pushover CLI ベンチマークモジュール
+
+ローカルのスタンドインサーバー（testing.FakePushoverServer）に対して送信性能を計測し、
+コミット間で比較できるよう結果を JSON で出力する
+
+使用例:
+    python -m pushover_cli.bench --count 500 --latency 20 --output before.json
+    python -m pushover_cli.bench --count 500 --latency 20 --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import ssl
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .aio import AsyncPushoverCLI
+from .core import PushoverCLI
+from .daemon import NotificationDaemon
+from .dispatch import QueuedPushover
+from .prepared import PipelinedSender
+from .testing import FakePushoverServer
+from .webhook import WebhookServer
+
+
+# JSON の形式（項目の意味を変えたら上げる）
+RESULT_VERSION = 1
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """ソート済みでない標本の分位点（最近傍法）"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, float]:
+    """秒単位の標本をミリ秒の統計値にまとめる"""
+    return {
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+    }
+
+
+def bench_single_send(make_client: Callable[..., PushoverCLI], count: int) -> Dict[str, Any]:
+    """1件ずつ送信したときの遅延（最初の1件は接続確立を含む）"""
+    samples = []
+    failed = 0
+    with make_client(pool_size=1) as client:
+        for i in range(count):
+            started = time.perf_counter()
+            success, _ = client.send_notification(f"latency {i}")
+            samples.append(time.perf_counter() - started)
+            failed += not success
+    result = {"count": count, "failed": failed, "first_ms": samples[0] * 1000}
+    result.update(_latency_summary(samples[1:] or samples))
+    return result
+
+
+def bench_sequential(make_client: Callable[..., PushoverCLI], count: int) -> Dict[str, Any]:
+    """1つの接続で連続送信したときのスループット"""
+    failed = 0
+    with make_client(pool_size=1) as client:
+        started = time.perf_counter()
+        for i in range(count):
+            failed += not client.send_notification(f"sequential {i}")[0]
+        elapsed = time.perf_counter() - started
+    return {"count": count, "failed": failed, "seconds": elapsed, "per_second": count / elapsed}
+
+
+def bench_concurrent(
+    make_client: Callable[..., PushoverCLI], count: int, concurrency: int
+) -> Dict[str, Any]:
+    """スレッドから共有クライアントで並行送信したときのスループット"""
+    with make_client(pool_size=concurrency) as client:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda i: client.send_notification(f"concurrent {i}")[0], range(count)
+            ))
+        elapsed = time.perf_counter() - started
+    return {
+        "count": count,
+        "concurrency": concurrency,
+        "failed": results.count(False),
+        "seconds": elapsed,
+        "per_second": count / elapsed,
+    }
+
+
+def bench_async(
+    url: str, count: int, concurrency: int, ssl_context: Optional[ssl.SSLContext] = None
+) -> Dict[str, Any]:
+    """asyncio クライアントで並行送信したときのスループット"""
+
+    async def run() -> List[bool]:
+        async with AsyncPushoverCLI(
+            "token", "user", api_url=url, pool_size=concurrency, ssl_context=ssl_context
+        ) as client:
+            results = await client.send_many([f"async {i}" for i in range(count)])
+        return [success for success, _ in results]
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    return {
+        "count": count,
+        "concurrency": concurrency,
+        "failed": results.count(False),
+        "seconds": elapsed,
+        "per_second": count / elapsed,
+    }
+
+
+def bench_pipelined(
+    make_client: Callable[..., PushoverCLI], count: int, depth: int = 16
+) -> Dict[str, Any]:
+    """
+    通常の送信と、事前エンコード＋パイプラインの送信の比較
+
+    送信ループのスレッドの CPU 時間（time.thread_time）を1件あたりで示す
+    （同じプロセスで動くスタンドインサーバーの処理は含まない）。
+    """
+    messages = [{"message": f"bulk {i}", "title": "監視", "priority": 0} for i in range(count)]
+    result: Dict[str, Any] = {"count": count, "depth": depth}
+    with make_client(pool_size=1) as client:
+        client.send_notification("warmup")
+        cpu = time.thread_time()
+        started = time.perf_counter()
+        failed = sum(not client.send_notification(**kwargs)[0] for kwargs in messages)
+        elapsed = time.perf_counter() - started
+        result.update(
+            standard_cpu_us=(time.thread_time() - cpu) / count * 1e6,
+            standard_per_second=count / elapsed,
+        )
+
+        sender = PipelinedSender(client, depth)
+        cpu = time.thread_time()
+        started = time.perf_counter()
+        results = sender.send_many(messages)
+        elapsed = time.perf_counter() - started
+        result.update(
+            pipelined_cpu_us=(time.thread_time() - cpu) / count * 1e6,
+            pipelined_per_second=count / elapsed,
+            failed=failed + sum(not success for success, _ in results),
+        )
+    return result
+
+
+def bench_webhook(
+    make_client: Callable[..., PushoverCLI], count: int, concurrency: int
+) -> Dict[str, Any]:
+    """
+    pushover serve 相当の webhook サーバーが受け付けて応答するまでのスループット
+
+    concurrency 本の keep-alive 接続から順に POST し、202 が返るまでを計測する
+    （送信キューからの配送は並行して進み、すべて送信し終えるまでの時間も示す）。
+    """
+    client = make_client(pool_size=concurrency)
+    pushover = QueuedPushover(client, workers=concurrency, maxsize=count, block_timeout=0)
+    server = WebhookServer(pushover, port=0)
+    server.start()
+    host, port = server.address
+    body = json.dumps({"message": "disk usage warning", "title": "監視", "priority": 0}).encode()
+    request = (
+        f"POST / HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode("ascii") + body
+
+    async def post_many(n: int) -> int:
+        reader, writer = await asyncio.open_connection(host, port)
+        rejected = 0
+        for _ in range(n):
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.lower().split(b"content-length:", 1)[1].split(b"\r\n", 1)[0])
+            await reader.readexactly(length)
+            rejected += not head.startswith(b"HTTP/1.1 202")
+        writer.close()
+        return rejected
+
+    async def run() -> int:
+        shares = [count // concurrency + (i < count % concurrency) for i in range(concurrency)]
+        return sum(await asyncio.gather(*(post_many(n) for n in shares)))
+
+    started = time.perf_counter()
+    try:
+        rejected = asyncio.run(run())
+        accepted = time.perf_counter() - started
+        pushover.flush()
+        delivered = time.perf_counter() - started
+    finally:
+        server.stop()
+    return {
+        "count": count,
+        "concurrency": concurrency,
+        "failed": rejected + pushover.failed,
+        "per_second": count / accepted,
+        "delivered_seconds": delivered,
+    }
+
+
+def bench_cli_cold_start(url: str, runs: int, cafile: Optional[str] = None) -> Dict[str, Any]:
+    """新しいインタープリタで CLI を起動して1件送信するまでの時間"""
+    env = dict(
+        os.environ,
+        PUSHOVER_API_URL=url,
+        PUSHOVER_TOKEN="token",
+        PUSHOVER_USER="user",
+        PYTHONPATH=os.pathsep.join(filter(None, [PACKAGE_ROOT, os.environ.get("PYTHONPATH")])),
+    )
+    if cafile:
+        env["SSL_CERT_FILE"] = cafile
+
+    def timed(args: List[str]) -> float:
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "pushover_cli.cli"] + args,
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+        )
+        return time.perf_counter() - started
+
+    send = [timed(["-m", "cold start", "--config", os.devnull]) for _ in range(runs)]
+    version = [timed(["--version"]) for _ in range(runs)]
+    return {
+        "runs": runs,
+        "send_median_ms": statistics.median(send) * 1000,
+        "send_min_ms": min(send) * 1000,
+        "version_median_ms": statistics.median(version) * 1000,
+    }
+
+
+def bench_queue_memory(count: int) -> Dict[str, Any]:
+    """通知デーモンのキューに溜まった通知1件あたりのメモリ使用量"""
+    client = PushoverCLI("token", "user", api_url="http://127.0.0.1:1")
+    daemon = NotificationDaemon(client, queue_size=count)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(count):
+            # parse_batch_line が返すのと同じ形の辞書
+            daemon.enqueue({
+                "message": f"disk usage warning on host-{i:05d}",
+                "title": "監視アラート",
+                "priority": 1,
+            })
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+        client.close()
+    return {"count": count, "bytes_per_message": (after - before) / count}
+
+
+SCENARIOS = (
+    "single", "sequential", "concurrent", "pipelined", "async", "webhook", "cli", "memory"
+)
+
+
+def run_benchmarks(
+    scenarios: List[str],
+    count: int = 200,
+    concurrency: int = 8,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    app_limit: Optional[int] = None,
+    cli_runs: int = 5,
+    certfile: Optional[str] = None,
+    keyfile: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    指定したシナリオを実行して結果の辞書を返す
+
+    Args:
+        scenarios: 実行するシナリオ名（SCENARIOS の部分集合）
+        count: シナリオごとの送信件数
+        concurrency: 並行送信のシナリオの同時送信数
+        latency: スタンドインサーバーの応答遅延（秒）
+        error_rate: スタンドインサーバーが HTTP 500 を返す割合
+        app_limit: スタンドインサーバーの月間送信枠（X-Limit-App-* ヘッダ）
+        cli_runs: CLI 起動時間の計測回数
+        certfile: 指定すると HTTPS で計測する（サーバー証明書、クライアントも信頼する）
+        keyfile: certfile の秘密鍵
+    """
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"不明なシナリオ: {', '.join(sorted(unknown))}")
+
+    ssl_context = ssl.create_default_context(cafile=certfile) if certfile else None
+    results: Dict[str, Any] = {}
+    with FakePushoverServer(
+        latency=latency,
+        app_limit=app_limit,
+        error_rate=error_rate,
+        certfile=certfile,
+        keyfile=keyfile,
+        seed=0
+    ) as server:
+
+        def make_client(**kwargs: Any) -> PushoverCLI:
+            return PushoverCLI("token", "user", api_url=server.url, ssl_context=ssl_context, **kwargs)
+
+        if "single" in scenarios:
+            results["single"] = bench_single_send(make_client, count)
+        if "sequential" in scenarios:
+            results["sequential"] = bench_sequential(make_client, count)
+        if "concurrent" in scenarios:
+            results["concurrent"] = bench_concurrent(make_client, count, concurrency)
+        if "pipelined" in scenarios:
+            results["pipelined"] = bench_pipelined(make_client, count)
+        if "async" in scenarios:
+            results["async"] = bench_async(server.url, count, concurrency, ssl_context)
+        if "webhook" in scenarios:
+            results["webhook"] = bench_webhook(make_client, count, concurrency)
+        if "cli" in scenarios:
+            results["cli"] = bench_cli_cold_start(server.url, cli_runs, certfile)
+        connections = server.connections
+    if "memory" in scenarios:
+        results["memory"] = bench_queue_memory(max(count, 1000))
+
+    return {
+        "version": RESULT_VERSION,
+        "timestamp": time.time(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "count": count,
+            "concurrency": concurrency,
+            "latency": latency,
+            "error_rate": error_rate,
+            "app_limit": app_limit,
+            "https": certfile is not None,
+        },
+        "server_connections": connections,
+        "results": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PACKAGE_ROOT, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def compare_results(before: Dict[str, Any], after: Dict[str, Any]) -> List[str]:
+    """2つの結果の数値項目を比較した行のリスト"""
+    lines = []
+    for scenario, metrics in after["results"].items():
+        old_metrics = before.get("results", {}).get(scenario, {})
+        for name, value in metrics.items():
+            if name in ("count", "concurrency", "runs"):
+                continue
+            old = old_metrics.get(name)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old * 100
+            lines.append(f"{scenario}.{name}: {old:.3f} -> {value:.3f} ({change:+.1f}%)")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m pushover_cli.bench",
+        description="ローカルのスタンドインサーバーに対して送信性能を計測し、JSONで出力します"
+    )
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"実行するシナリオ（カンマ区切り、デフォルト: {','.join(SCENARIOS)}）")
+    parser.add_argument("--count", type=int, default=200, help="シナリオごとの送信件数 (デフォルト: 200)")
+    parser.add_argument("--concurrency", type=int, default=8, help="同時送信数 (デフォルト: 8)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="サーバーの応答遅延（ミリ秒、デフォルト: 0）")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="サーバーが HTTP 500 を返す割合（0〜1、デフォルト: 0）")
+    parser.add_argument("--app-limit", type=int, help="サーバーの月間送信枠（X-Limit-App-* ヘッダを返す）")
+    parser.add_argument("--cli-runs", type=int, default=5, help="CLI 起動時間の計測回数 (デフォルト: 5)")
+    parser.add_argument("--certfile", help="HTTPS で計測する場合のサーバー証明書（PEM）")
+    parser.add_argument("--keyfile", help="サーバー証明書の秘密鍵（PEM）")
+    parser.add_argument("--output", help="結果の書き出し先（省略時は標準出力）")
+    parser.add_argument("--compare", metavar="FILE", help="以前の結果と比較して差分を標準エラーに表示")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run_benchmarks(
+            [name.strip() for name in args.scenarios.split(",") if name.strip()],
+            count=args.count,
+            concurrency=args.concurrency,
+            latency=args.latency / 1000,
+            error_rate=args.error_rate,
+            app_limit=args.app_limit,
+            cli_runs=args.cli_runs,
+            certfile=args.certfile,
+            keyfile=args.keyfile,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            before = json.load(f)
+        for line in compare_results(before, report):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
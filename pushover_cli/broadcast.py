@@ -0,0 +1,236 @@
+"""
+Pushover CLI 一斉送信モジュール
+
+1つの通知を大量の宛先へ、複数のプロセスに分けて送信する
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+
+from .core import PushoverCLI
+from .fanout import FanoutReport, FanoutResult, parse_recipients, send_to_many
+from .ratelimit import RateLimitScheduler, RateLimitState
+from .retry import RetryPolicy
+from .validation import SQLiteValidationStore, ValidatingPushover
+
+
+# 1回のタスクでワーカーに渡す宛先の数（進捗はこの単位で親プロセスに届く）
+DEFAULT_CHUNK_SIZE = 200
+
+
+class SharedBudget(NamedTuple):
+    """プロセス間で共有する送信ペースの状態（multiprocessing の共有メモリ）"""
+
+    lock: Any
+    tokens: Any
+    updated: Any
+    # HTTP 429 を受けた後、送信を再開してよい時刻（time.time）
+    backoff_until: Any
+
+
+def create_shared_budget(burst: int, context: Optional[Any] = None) -> SharedBudget:
+    """送信ペースの共有状態を作成（ワーカーの起動前に親プロセスで作る）"""
+    context = context or multiprocessing.get_context()
+    return SharedBudget(
+        context.Lock(),
+        context.Value("d", float(burst), lock=False),
+        context.Value("d", time.monotonic(), lock=False),
+        context.Value("d", 0.0, lock=False),
+    )
+
+
+class SharedRateLimitState(RateLimitState):
+    """HTTP 429 によるバックオフ期間をほかのプロセスと共有する送信枠の状態"""
+
+    def __init__(self, shared: SharedBudget):
+        super().__init__()
+        self._shared = shared
+
+    def record_response(self, status: int, headers: Optional[Any] = None) -> None:
+        super().record_response(status, headers)
+        if status == 429:
+            with self._shared.lock:
+                self._shared.backoff_until.value = max(
+                    self._shared.backoff_until.value, self.backoff_until
+                )
+
+    def retry_after(self) -> float:
+        with self._shared.lock:
+            shared = self._shared.backoff_until.value
+        return max(super().retry_after(), shared - time.time())
+
+
+class SharedRateLimitScheduler(RateLimitScheduler):
+    """トークンバケットを複数のプロセスで共有するスケジューラ
+
+    time.monotonic は同じマシンのプロセス間で共通の時計のため、
+    最終更新時刻もそのまま共有できる。
+    """
+
+    def __init__(self, rate: float, burst: int, shared: SharedBudget):
+        super().__init__(rate, burst, state=SharedRateLimitState(shared))
+        self._shared = shared
+
+    def _reserve_token(self) -> float:
+        shared = self._shared
+        with shared.lock:
+            now = time.monotonic()
+            tokens = min(self.burst, shared.tokens.value + (now - shared.updated.value) * self.rate)
+            tokens -= 1
+            shared.tokens.value = tokens
+            shared.updated.value = now
+        if tokens >= 0:
+            return 0.0
+        return -tokens / self.rate
+
+    def _return_token(self) -> None:
+        with self._shared.lock:
+            self._shared.tokens.value += 1
+
+
+class BroadcastProgress(NamedTuple):
+    """一斉送信の進捗"""
+
+    done: int
+    total: int
+    succeeded: int
+    failed: int
+    elapsed: float
+
+    @property
+    def per_second(self) -> float:
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+
+# ワーカープロセスごとのクライアント（_init_worker で作成し、タスクの間で接続を保持する）
+_worker_client: Optional[Union[PushoverCLI, ValidatingPushover]] = None
+_worker_threads = 1
+
+
+def _init_worker(
+    token: str,
+    api_url: Optional[str],
+    threads: int,
+    retries: int,
+    rate: Optional[float],
+    burst: int,
+    shared: Optional[SharedBudget],
+    validation_cache: Optional[str] = None
+) -> None:
+    global _worker_client, _worker_threads
+    scheduler = SharedRateLimitScheduler(rate, burst, shared) if rate and shared else None
+    retry = RetryPolicy(max_attempts=retries + 1) if retries else None
+    # 宛先は送信ごとに指定するため、既定のユーザーキーは使わない
+    _worker_client = PushoverCLI(token, "", api_url=api_url, pool_size=threads,
+                                 scheduler=scheduler, retry=retry)
+    if validation_cache:
+        # 検証結果のファイルは全ワーカー（と次回以降の実行）で共有する
+        _worker_client = ValidatingPushover(
+            _worker_client, store=SQLiteValidationStore(validation_cache)
+        )
+    _worker_threads = threads
+
+
+def _send_chunk(users: List[str], message: str, kwargs: Dict[str, Any]) -> List[FanoutResult]:
+    return list(send_to_many(_worker_client, users, message, _worker_threads, **kwargs))
+
+
+def run_broadcast(
+    token: str,
+    recipients: Iterable[str],
+    message: str,
+    processes: Optional[int] = None,
+    threads: int = 4,
+    rate: Optional[float] = None,
+    burst: Optional[int] = None,
+    retries: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    api_url: Optional[str] = None,
+    validation_cache: Optional[str] = None,
+    on_result: Optional[Callable[[FanoutResult], None]] = None,
+    on_progress: Optional[Callable[[BroadcastProgress], None]] = None,
+    **kwargs: Any
+) -> FanoutReport:
+    """
+    1つの通知を大量の宛先へ複数のプロセスで送信
+
+    宛先を chunk_size 件ずつに分けてワーカープロセスに渡す。各ワーカーは自分の
+    PushoverCLI（keep-alive 接続）を保持し、threads 本のスレッドで送信する。
+    rate を指定すると、全ワーカーで1つの送信ペース（毎秒 rate 件）と
+    HTTP 429 のバックオフを共有する。
+
+    Args:
+        token: Pushoverアプリトークン
+        recipients: ユーザー／グループキー（重複は1回にまとめる）
+        message: 送信するメッセージ
+        processes: ワーカープロセスの数（省略時は CPU 数）
+        threads: ワーカーごとの同時送信数（接続数）
+        rate: 全ワーカー合計の1秒あたりの最大送信数
+        burst: 連続して送信できる最大数（省略時は rate と同じ）
+        retries: 一時的な失敗の再試行回数
+        chunk_size: 1回のタスクで渡す宛先の数
+        api_url: APIのベースURL（省略時は PUSHOVER_API_URL 環境変数、なければ本番API）
+        validation_cache: 指定すると送信前にキーとデバイス名を検証し、結果をこのパスの
+            SQLite ファイルにキャッシュする（無効と分かっている宛先には送信しない）
+        on_result: 宛先ごとの結果を受け取る関数（完了したタスクの順に親プロセスで呼ばれる）
+        on_progress: タスクが完了するたびに進捗を受け取る関数
+        **kwargs: send_notification のその他の引数（title, priority など）
+
+    Returns:
+        入力順の宛先ごとの結果
+    """
+    users = list(dict.fromkeys(recipients))
+    if not users:
+        return FanoutReport([])
+    chunks = [users[i:i + chunk_size] for i in range(0, len(users), chunk_size)]
+    processes = max(1, min(processes or os.cpu_count() or 1, len(chunks)))
+    burst = burst or max(1, int(rate or 1))
+    context = multiprocessing.get_context()
+    shared = create_shared_budget(burst, context) if rate else None
+
+    started = time.monotonic()
+    results: Dict[int, List[FanoutResult]] = {}
+    succeeded = failed = 0
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(token, api_url, threads, retries, rate, burst, shared, validation_cache),
+    ) as executor:
+        futures = {
+            executor.submit(_send_chunk, chunk, message, kwargs): index
+            for index, chunk in enumerate(chunks)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                chunk_results = future.result()
+            except Exception as e:
+                # ワーカーの異常終了など。このタスクの宛先はすべて失敗とする
+                chunk_results = [FanoutResult(user, False, f"送信エラー: {str(e) or type(e).__name__}")
+                                 for user in chunks[index]]
+            results[index] = chunk_results
+            for result in chunk_results:
+                if result.success:
+                    succeeded += 1
+                else:
+                    failed += 1
+                if on_result is not None:
+                    on_result(result)
+            if on_progress is not None:
+                on_progress(BroadcastProgress(
+                    succeeded + failed, len(users), succeeded, failed, time.monotonic() - started
+                ))
+    return FanoutReport([result for index in range(len(chunks)) for result in results[index]])
+
+
+def read_recipients(lines: Iterable[str]) -> List[str]:
+    """宛先ファイルの行からキーを読み込む（カンマ・空白区切り可、# 以降はコメント）"""
+    users: List[str] = []
+    for line in lines:
+        users.extend(parse_recipients(line.split("#", 1)[0]))
+    return users
+
@@ -6,12 +6,544 @@ Pushover CLI - コマンドラインインターフェース
 import argparse
 import sys
 import os
-from .core import PushoverCLI, load_config_from_file
-from .config import ConfigManager
+
+# 各コマンドが使うモジュールは、そのコマンドの実行時に関数内で import する。
+# フックスクリプトから頻繁に呼ばれる通常の送信では、起動時の import が
+# 処理時間の大半を占めるため。
+
+
+# 送信コマンド以外のサブコマンド
+SUBCOMMANDS = ['config', 'batch', 'broadcast', 'daemon', 'serve', 'receipts', 'watch', 'monitor']
+
+
+def resolve_credentials(token_arg, user_arg, config_arg, profile=None, device=None, sound=None,
+                        required=True):
+    """
+    トークン・ユーザーキーと送信の既定値を解決
+    
+    required が真の場合、トークンかユーザーキーが見つからなければ設定方法を表示して終了する
+    
+    Returns:
+        ResolvedConfig（token, user, device, sound, profile）
+    """
+    from .settings import resolve_config
+    
+    # 設定の取得（優先順位: コマンドライン引数 > プロファイル > 環境変数 > 設定ファイル）
+    try:
+        settings = resolve_config(
+            token=token_arg,
+            user=user_arg,
+            device=device,
+            sound=sound,
+            profile=profile,
+            config_path=config_arg,
+            binary_cache=bool(os.environ.get("PUSHOVER_CONFIG_CACHE")),
+        )
+    except KeyError as e:
+        print(f"エラー: プロファイル {e} が設定ファイル {config_arg} にありません", file=sys.stderr)
+        sys.exit(1)
+    token, user = settings.token, settings.user
+    if not required:
+        return settings
+    
+    # 必須パラメータのチェック
+    if not token:
+        print("エラー: Pushoverトークンが指定されていません", file=sys.stderr)
+        print("  設定方法:", file=sys.stderr)
+        print("    pushover config set    # 永続設定（推奨）", file=sys.stderr)
+        print("    -t オプション          # 一時的な指定", file=sys.stderr)
+        print("    PUSHOVER_TOKEN環境変数 # 手動設定", file=sys.stderr)
+        sys.exit(1)
+    
+    if not user:
+        print("エラー: Pushoverユーザーキーが指定されていません", file=sys.stderr)
+        print("  設定方法:", file=sys.stderr)
+        print("    pushover config set    # 永続設定（推奨）", file=sys.stderr)
+        print("    -u オプション          # 一時的な指定", file=sys.stderr)
+        print("    PUSHOVER_USER環境変数  # 手動設定", file=sys.stderr)
+        sys.exit(1)
+    
+    return settings
+
+
+def mask_key(key):
+    """表示用にキーの先頭だけを残す"""
+    return key[:8] + "..." if len(key) > 8 else key
+
+
+def apply_template(args):
+    """--template を展開し、コマンドラインで指定されていない項目を埋める"""
+    import json
+    
+    from .settings import load_config
+    from .templates import TemplateError, load_templates, parse_variables, render_with
+    
+    try:
+        if args.vars_json == '-':
+            variables = json.load(sys.stdin)
+        else:
+            variables = json.loads(args.vars_json) if args.vars_json else {}
+        if not isinstance(variables, dict):
+            raise TemplateError("--vars-json はJSONオブジェクトで指定してください")
+        variables.update(parse_variables(args.var or []))
+        # 明示的に指定された引数はテンプレートの値より優先する
+        kwargs = render_with(load_templates(load_config(args.config)), args.template, variables, {
+            "message": args.message,
+            "title": args.title,
+            "priority": args.priority,
+            "url": args.url,
+            "url_title": args.url_title,
+            "sound": args.sound,
+            "html": args.html or None,
+        })
+    except ValueError as e:
+        print(f"エラー: テンプレート: {e}", file=sys.stderr)
+        sys.exit(1)
+    for key, value in kwargs.items():
+        setattr(args, key, value)
+
+
+def send_fanout(pushover, recipients, args):
+    """複数の宛先に送信し、宛先ごとの結果を表示して終了"""
+    from .fanout import send_to_many
+    
+    report = send_to_many(
+        pushover,
+        recipients,
+        args.message,
+        concurrency=max(1, args.concurrency),
+        title=args.title,
+        priority=args.priority,
+        url=args.url,
+        url_title=args.url_title,
+        device=args.device,
+        sound=args.sound,
+        attachment=args.attachment,
+        retry_interval=args.retry_interval,
+        expire=args.expire,
+        html=args.html
+    )
+    pushover.close()
+    for result in report:
+        mark = "✅" if result.success else "❌"
+        print(f"{mark} {mask_key(result.user)}: {result.message}",
+              file=sys.stdout if result.success else sys.stderr)
+    print(f"送信完了: 成功 {len(report.succeeded)}件, 失敗 {len(report.failed)}件")
+    sys.exit(0 if report.all_succeeded else 1)
+
+
+def handle_batch_command(args):
+    """バッチ送信コマンドの処理"""
+    from .batch import run_batch
+    from .core import PushoverCLI
+    from .dedup import DedupPushover, SQLiteDedupStore
+    from .ratelimit import RateLimitScheduler
+    from .retry import RetryPolicy
+    from .settings import load_config
+    from .templates import TemplateError, load_templates
+    
+    if args.concurrency < 1:
+        print("エラー: --concurrency は1以上で指定してください", file=sys.stderr)
+        sys.exit(1)
+    if args.pipeline > 1 and args.dedup:
+        print("エラー: --pipeline と --dedup は同時に指定できません", file=sys.stderr)
+        sys.exit(1)
+    settings = resolve_credentials(args.token, args.user, args.config, args.profile)
+    try:
+        # テンプレートは起動時に1回だけ解析し、全行で共有する
+        templates = load_templates(load_config(args.config))
+    except TemplateError as e:
+        print(f"エラー: テンプレート: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.file == '-':
+        lines = sys.stdin
+    else:
+        try:
+            lines = open(args.file, 'r', encoding='utf-8')
+        except OSError as e:
+            print(f"エラー: 入力ファイルを開けません: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    # 1つのクライアントの接続プールを全メッセージで共有する
+    scheduler = RateLimitScheduler(rate=args.rate, burst=args.concurrency) if args.rate else None
+    retry = RetryPolicy(max_attempts=args.retries + 1) if args.retries else None
+    pushover = PushoverCLI(settings.token, settings.user, pool_size=args.concurrency,
+                           scheduler=scheduler, retry=retry)
+    if args.dedup:
+        pushover = DedupPushover(pushover, ttl=args.dedup, store=SQLiteDedupStore())
+    with pushover:
+        try:
+            succeeded, failed = run_batch(pushover, lines, sys.stdout, args.concurrency,
+                                          templates, args.pipeline)
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+    
+    print(f"送信完了: 成功 {succeeded} 件, 失敗 {failed} 件", file=sys.stderr)
+    sys.exit(0 if failed == 0 else 1)
+
+
+def handle_broadcast_command(args):
+    """一斉送信コマンドの処理"""
+    import json
+    import time
+    
+    from .broadcast import read_recipients, run_broadcast
+    from .validation import DEFAULT_VALIDATION_PATH
+    
+    settings = resolve_credentials(args.token, args.user, args.config, args.profile,
+                                   args.device, args.sound)
+    try:
+        if args.file == '-':
+            recipients = read_recipients(sys.stdin)
+        else:
+            with open(args.file, 'r', encoding='utf-8') as f:
+                recipients = read_recipients(f)
+    except OSError as e:
+        print(f"エラー: 宛先ファイルを開けません: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not recipients:
+        print("エラー: 宛先がありません", file=sys.stderr)
+        sys.exit(1)
+    
+    def write_result(result):
+        sys.stdout.write(json.dumps(
+            {"user": result.user, "success": result.success, "message": result.message},
+            ensure_ascii=False
+        ) + "\n")
+    
+    last_report = 0.0
+    
+    def show_progress(progress):
+        nonlocal last_report
+        # 進捗の表示は1秒に1回まで
+        now = time.monotonic()
+        if now - last_report < 1.0 and progress.done < progress.total:
+            return
+        last_report = now
+        sys.stdout.flush()
+        print(f"進捗: {progress.done}/{progress.total} (成功 {progress.succeeded}, "
+              f"失敗 {progress.failed}, {progress.per_second:.0f}件/秒)", file=sys.stderr)
+    
+    report = run_broadcast(
+        settings.token,
+        recipients,
+        args.message,
+        processes=args.processes,
+        threads=args.threads,
+        rate=args.rate,
+        retries=args.retries,
+        chunk_size=args.chunk_size,
+        validation_cache=DEFAULT_VALIDATION_PATH if args.validate else None,
+        on_result=write_result,
+        on_progress=show_progress,
+        title=args.title,
+        priority=args.priority,
+        url=args.url,
+        url_title=args.url_title,
+        device=settings.device,
+        sound=settings.sound,
+        html=args.html
+    )
+    sys.stdout.flush()
+    print(f"送信完了: 成功 {len(report.succeeded)} 件, 失敗 {len(report.failed)} 件", file=sys.stderr)
+    sys.exit(0 if report.all_succeeded else 1)
+
+
+def handle_daemon_command(args):
+    """通知デーモンコマンドの処理"""
+    from .coalesce import CoalescingPushover
+    from .core import PushoverCLI
+    from .daemon import NotificationDaemon
+    from .metrics import MetricsFileWriter, MetricsRegistry
+    from .outbox import Outbox
+    
+    # まとめている間の通知はアウトボックス上では送信済みになり、異常終了すると失われる
+    if args.outbox and args.coalesce:
+        print("エラー: --coalesce と --outbox は同時に指定できません", file=sys.stderr)
+        sys.exit(1)
+    settings = resolve_credentials(args.token, args.user, args.config, args.profile)
+    
+    outbox = Outbox(args.outbox) if args.outbox else None
+    metrics = MetricsRegistry() if args.metrics else None
+    pushover = PushoverCLI(settings.token, settings.user, pool_size=args.workers, metrics=metrics)
+    if args.coalesce:
+        # 障害時の通知の嵐をダイジェストにまとめる（優先度 2 は即時送信）
+        pushover = CoalescingPushover(pushover, window=args.coalesce)
+    daemon = NotificationDaemon(
+        pushover,
+        socket_path=args.socket,
+        workers=args.workers,
+        outbox=outbox
+    )
+    print(f"🚀 通知デーモンを起動しました: {daemon.socket_path}", file=sys.stderr)
+    if outbox is not None and outbox.depth:
+        print(f"📦 未送信の通知 {outbox.depth} 件を再送します", file=sys.stderr)
+    metrics_writer = None
+    if metrics is not None:
+        metrics_writer = MetricsFileWriter(metrics, args.metrics, interval=args.metrics_interval)
+        metrics_writer.start()
+    try:
+        daemon.serve_forever()
+    except RuntimeError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if metrics_writer is not None:
+            metrics_writer.stop()
+    print(f"通知デーモンを停止しました（成功 {daemon.sent} 件, 失敗 {daemon.failed} 件）",
+          file=sys.stderr)
+
+
+def handle_serve_command(args):
+    """webhook 受信コマンドの処理"""
+    from .core import PushoverCLI
+    from .dispatch import QueuedPushover
+    from .ratelimit import RateLimitScheduler
+    from .retry import RetryPolicy
+    from .settings import load_config
+    from .templates import TemplateError, load_templates
+    from .webhook import FieldMapping, WebhookServer
+    
+    if args.queue_size < 1:
+        print("エラー: --queue-size は1以上で指定してください", file=sys.stderr)
+        sys.exit(1)
+    settings = resolve_credentials(args.token, args.user, args.config, args.profile)
+    try:
+        templates = load_templates(load_config(args.config))
+        mapping = None
+        if args.map or args.template:
+            template = None
+            if args.template:
+                template = templates.get(args.template)
+                if template is None:
+                    raise TemplateError(f"テンプレート {args.template} が設定ファイルにありません")
+            mapping = FieldMapping.parse(args.map, template)
+    except TemplateError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    # 受け付けた通知はすべて1つの接続プールを共有する配送スレッドが送信する
+    scheduler = RateLimitScheduler(rate=args.rate, burst=args.workers) if args.rate else None
+    retry = RetryPolicy(max_attempts=args.retries + 1) if args.retries else None
+    client = PushoverCLI(settings.token, settings.user, pool_size=args.workers,
+                         scheduler=scheduler, retry=retry)
+    # キューが満杯のときはイベントループを止めずに 503 を返す
+    pushover = QueuedPushover(client, workers=args.workers, maxsize=args.queue_size,
+                              policy=args.policy, block_timeout=0)
+    server = WebhookServer(pushover, host=args.host, port=args.port, mapping=mapping,
+                           templates=templates, secret=args.secret)
+    try:
+        server.serve_forever()
+    except OSError as e:
+        pushover.close()
+        print(f"エラー: 待ち受けを開始できません: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"webhook の受け付けを停止しました（受付 {server.accepted} 件, 拒否 {server.rejected} 件, "
+          f"成功 {pushover.sent} 件, 失敗 {pushover.failed} 件）", file=sys.stderr)
+
+
+def format_receipt_result(handle):
+    """追跡が終わったレシートの表示用の1行"""
+    status = handle.status
+    if handle.error is not None:
+        return f"❌ {handle.receipt}: 確認できません: {handle.error}"
+    if status.acknowledged:
+        by = status.acknowledged_by_device or mask_key(status.acknowledged_by or "")
+        return f"✅ {handle.receipt}: 確認されました（{by}）"
+    return f"⌛ {handle.receipt}: 確認されないまま期限切れになりました"
+
+
+def handle_receipts_command(args):
+    """レシートコマンドの処理"""
+    import threading
+    import time
+    
+    from .core import PushoverCLI
+    from .receipts import ReceiptPoller, ReceiptStore
+    
+    store = ReceiptStore()
+    
+    if args.receipts_action == 'list':
+        for stored in store.recent(args.limit):
+            if stored.acknowledged:
+                state = "確認済み"
+            elif stored.expired:
+                state = "期限切れ"
+            else:
+                state = "未確認"
+            sent = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stored.sent_at))
+            print(f"{stored.receipt}  {sent}  {state}  {stored.title or stored.message}")
+        store.close()
+        return
+    
+    settings = resolve_credentials(args.token, args.user, args.config, args.profile)
+    pushover = PushoverCLI(settings.token, settings.user, pool_size=1)
+    
+    if args.receipts_action == 'cancel':
+        from .errors import PushoverError
+        
+        try:
+            pushover.cancel_receipt(args.receipt)
+        except PushoverError as e:
+            print(f"エラー: 取り消せません: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            pushover.close()
+        print(f"{args.receipt} の再通知を取り消しました")
+        return
+    
+    # wait: 指定がなければ保存済みの未確認のレシートをすべて待つ
+    receipts = args.receipt or [stored.receipt for stored in store.pending()]
+    if not receipts:
+        print("確認待ちのレシートはありません")
+        store.close()
+        return
+    
+    print(f"{len(receipts)} 件のレシートの確認を待っています...", file=sys.stderr)
+    output_lock = threading.Lock()
+    
+    def on_done(handle):
+        if handle.status is not None:
+            store.update(handle.status)
+        with output_lock:
+            print(format_receipt_result(handle), flush=True)
+    
+    poller = ReceiptPoller(pushover, min_interval=args.interval,
+                           max_interval=max(args.interval, args.max_interval))
+    handles = [poller.track(receipt, callback=on_done) for receipt in receipts]
+    try:
+        completed = poller.wait(args.timeout)
+    except KeyboardInterrupt:
+        completed = False
+    poller.close()
+    pushover.close()
+    store.close()
+    
+    if not completed:
+        print(f"タイムアウト: 未確認 {sum(not h.done for h in handles)} 件", file=sys.stderr)
+    sys.exit(0 if all(handle.acknowledged for handle in handles) else 1)
+
+
+def handle_watch_command(args):
+    """ログ監視コマンドの処理"""
+    import re
+    import signal
+    import threading
+    
+    from .core import PushoverCLI
+    from .watch import LogWatcher
+    
+    settings = resolve_credentials(args.token, args.user, args.config, args.profile,
+                                   args.device, args.sound)
+    pushover = PushoverCLI(settings.token, settings.user, pool_size=1)
+    try:
+        watcher = LogWatcher(
+            pushover,
+            args.file,
+            args.pattern,
+            ignore_case=args.ignore_case,
+            title=args.title,
+            window=args.window,
+            max_per_minute=args.max_per_minute,
+            max_samples=args.lines,
+            priority=args.priority,
+            device=settings.device,
+            sound=settings.sound
+        )
+    except re.error as e:
+        print(f"エラー: パターンが不正です: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.once:
+        watcher.run_once()
+    else:
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        print(f"👀 {args.file} を監視しています（Ctrl+C で終了）", file=sys.stderr)
+        try:
+            watcher.run(stop, from_start=args.from_start, poll_interval=args.poll_interval)
+        except KeyboardInterrupt:
+            pass
+    pushover.close()
+    
+    print(f"監視終了: {watcher.lines} 行中 {watcher.matched} 行が一致, "
+          f"通知 {watcher.sent} 件, 失敗 {watcher.failed} 件", file=sys.stderr)
+    if watcher.last_error:
+        print(f"最後のエラー: {watcher.last_error}", file=sys.stderr)
+    sys.exit(0 if watcher.failed == 0 else 1)
+
+
+def handle_monitor_command(args):
+    """システム監視コマンドの処理"""
+    import signal
+    import threading
+    
+    from .core import PushoverCLI
+    from .monitor import SystemMonitor, SystemSampler, default_checks
+    
+    settings = resolve_credentials(args.token, args.user, args.config, args.profile,
+                                   args.device, args.sound)
+    try:
+        sampler = SystemSampler()
+    except OSError as e:
+        print(f"エラー: システムの状態を読み込めません: {e}", file=sys.stderr)
+        sys.exit(1)
+    checks = default_checks(
+        sampler,
+        args.disk or ['/'],
+        disk_warning=args.disk_warning,
+        disk_critical=args.disk_critical,
+        memory_warning=args.memory_warning,
+        memory_critical=args.memory_critical,
+        load_warning=args.load_warning,
+        load_critical=args.load_critical,
+        hysteresis=args.hysteresis
+    )
+    if not checks:
+        print("エラー: 監視する項目がありません", file=sys.stderr)
+        sys.exit(1)
+    
+    # 送信には常駐する1つのクライアントを使う（接続を保持する）
+    pushover = PushoverCLI(settings.token, settings.user, pool_size=1)
+    monitor = SystemMonitor(pushover, checks, notify_recovery=not args.no_recovery,
+                            device=settings.device, sound=settings.sound)
+    if args.once:
+        monitor.run_once()
+    else:
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        names = ", ".join(check.label for check in checks)
+        print(f"📈 {args.interval:g}秒ごとに監視しています: {names}", file=sys.stderr)
+        try:
+            monitor.run(args.interval, stop)
+        except KeyboardInterrupt:
+            pass
+    pushover.close()
+    sampler.close()
+    
+    if monitor.last_error:
+        print(f"最後のエラー: {monitor.last_error}", file=sys.stderr)
+    sys.exit(0 if monitor.failed == 0 else 1)
+
+
+def threshold(value):
+    """閾値の引数（"off" で無効）"""
+    if value.lower() in ('off', 'none'):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"数値または off を指定してください: {value}")
 
 
 def handle_config_command(args):
     """設定コマンドの処理"""
+    from .config import ConfigManager
+    from .core import PushoverCLI
+    from .settings import load_config
+    
     config_manager = ConfigManager()
     
     if args.config_action == 'show':
@@ -33,15 +565,25 @@ def handle_config_command(args):
                 print(f"  {key}: (未設定)")
         
         # 設定ファイルから設定を読み込み
-        file_config = load_config_from_file(os.path.expanduser("~/.pushover_config"))
-        if file_config:
+        file_config = load_config("~/.pushover_config")
+        if file_config.values:
             print()
             print("設定ファイル (~/.pushover_config):")
             for key in ['PUSHOVER_TOKEN', 'PUSHOVER_USER']:
-                value = file_config.get(key)
+                value = file_config.values.get(key)
                 if value:
                     masked_value = value[:8] + "..." if len(value) > 8 else value
                     print(f"  {key}: {masked_value}")
+        if file_config.profiles:
+            print()
+            print("プロファイル:")
+            for name in file_config.profiles:
+                print(f"  {name}")
+        if file_config.templates:
+            print()
+            print("テンプレート:")
+            for name in file_config.templates:
+                print(f"  {name}")
         
     elif args.config_action == 'set':
         # 設定を永続化
@@ -89,22 +631,91 @@ def handle_config_command(args):
             print("   以下のコマンドで設定してください: pushover config set", file=sys.stderr)
             sys.exit(1)
         
-        # テスト通知を送信
-        pushover = PushoverCLI(token, user)
-        success, message = pushover.send_notification(
-            message="🧪 Pushover CLI 設定テスト",
-            title="設定テスト"
-        )
+        pushover = PushoverCLI(token, user, pool_size=1)
+        if args.send:
+            # テスト通知を送信
+            success, message = pushover.send_notification(
+                message="🧪 Pushover CLI 設定テスト",
+                title="設定テスト"
+            )
+            
+            if success:
+                print("✅ 設定テスト成功！通知が送信されました")
+            else:
+                print(f"❌ 設定テスト失敗: {message}", file=sys.stderr)
+                sys.exit(1)
+            return
         
-        if success:
-            print("✅ 設定テスト成功！通知が送信されました")
-        else:
-            print(f"❌ 設定テスト失敗: {message}", file=sys.stderr)
+        # 通知を送らずにトークンとユーザーキーを検証
+        from .errors import PushoverError, PushoverRequestError
+        
+        try:
+            response = pushover.validate_user()
+        except PushoverRequestError as e:
+            print(f"❌ 設定テスト失敗: トークンまたはユーザーキーが無効です: {e}", file=sys.stderr)
+            sys.exit(1)
+        except PushoverError as e:
+            print(f"❌ 設定テスト失敗: 接続エラー: {e}", file=sys.stderr)
             sys.exit(1)
+        finally:
+            pushover.close()
+        kind = "グループキー" if response.get("group") else "ユーザーキー"
+        print(f"✅ 設定テスト成功！トークンと{kind}は有効です")
+        devices = response.get("devices") or []
+        if devices:
+            print(f"   デバイス: {', '.join(devices)}")
 
 
-def main():
-    """メイン関数"""
+# 送信コマンドのヘルプに表示する説明
+SEND_EPILOG = """
+使用例:
+  pushover -m "Hello World"
+  pushover -m "エラーが発生しました" --title "システムアラート" --priority 1
+  pushover -m "デプロイ完了" -u KEY1 -u KEY2   # 複数の宛先に送信
+  pushover -m "障害発生" --group oncall     # 設定ファイルのグループに送信
+  pushover --template disk --var host=web1 --var usage=93  # テンプレートから送信
+  pushover config set                    # 永続設定
+  pushover config show                   # 設定確認
+  pushover config test                   # 設定テスト
+  pushover batch alerts.jsonl            # JSON Lines をまとめて送信
+  pushover broadcast users.txt -m "お知らせ"  # 大量の宛先に複数プロセスで送信
+  pushover daemon &                      # 通知デーモンを起動
+  pushover send -m "Hi" --via-daemon     # デーモン経由で送信
+  pushover serve --port 8080 --map title={commonLabels.alertname}  # webhook を受け付けて送信
+  pushover -m "障害" --priority 2 --expire 1800  # 確認されるまで再通知
+  pushover receipts wait                 # 緊急の通知が確認されるまで待つ
+  pushover watch /var/log/syslog --pattern "error|fail"  # ログの一致行を通知
+  pushover monitor --disk / --disk /var  # ディスク・メモリ・負荷を監視
+
+設定方法:
+  1. 永続設定: pushover config set
+  2. 環境変数: PUSHOVER_TOKEN, PUSHOVER_USER
+  3. 設定ファイル: ~/.pushover_config（[名前] でプロファイルを定義し --profile で選択、
+     [template:名前] でメッセージテンプレートを定義し --template で使用）
+
+優先度:
+  -2: 最低 (通知音なし)
+  -1: 低 (静かな通知音)
+   0: 通常 (デフォルト)
+   1: 高 (重要な通知音)
+   2: 緊急 (確認されるまで --retry-interval 秒ごとに --expire 秒間再通知)
+
+その他のコマンド（詳細は pushover <コマンド> --help）:
+  config   設定管理
+  batch    JSON Lines を読み込んでまとめて送信
+  broadcast 大量の宛先へ1つの通知を複数のプロセスで送信
+  daemon   Unixソケットで通知を受け付ける常駐デーモンを起動
+  serve    HTTP で webhook を受け付けて送信
+  receipts 緊急の通知のレシートの一覧・確認待ち・取り消し
+  watch    ログファイルを追跡し、パターンに一致した行を通知
+  monitor  ディスク・メモリ・負荷を監視し、閾値を超えたら通知
+"""
+
+
+def build_command_parser():
+    """サブコマンド（config / batch / broadcast / daemon / serve / receipts / watch / monitor）のパーサーを作成"""
+    from .spool import default_socket_path
+    
     parser = argparse.ArgumentParser(
         description="Pushover CLI - コマンドラインから通知を送信",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -113,9 +724,6 @@ def main():
     # サブコマンドを作成
     subparsers = parser.add_subparsers(dest='command', help='利用可能なコマンド')
     
-    # メイン送信コマンド（デフォルト）
-    send_parser = subparsers.add_parser('send', help='通知を送信（デフォルト）', add_help=False)
-    
     # 設定コマンド
     config_parser = subparsers.add_parser('config', help='設定管理')
     config_subparsers = config_parser.add_subparsers(dest='config_action', help='設定操作')
@@ -128,107 +736,447 @@ def main():
     config_set.add_argument('-u', '--user', help='Pushoverユーザーキー')
     
     config_clear = config_subparsers.add_parser('clear', help='設定をクリア')
-    config_test = config_subparsers.add_parser('test', help='設定をテスト')
-    
-    # 引数が何もない場合は送信コマンドとして処理
-    if len(sys.argv) == 1 or (len(sys.argv) > 1 and not sys.argv[1] in ['config']):
-        # 送信コマンドの引数を追加
-        parser.add_argument("-m", "--message", required=True, help="送信するメッセージ")
-        parser.add_argument("-t", "--token", help="Pushoverアプリトークン")
-        parser.add_argument("-u", "--user", help="Pushoverユーザーキー")
-        parser.add_argument("--title", help="通知のタイトル")
-        parser.add_argument("--priority", type=int, choices=[-2, -1, 0, 1, 2], 
-                           default=0, help="優先度 (-2〜2、デフォルト: 0)")
-        parser.add_argument("--url", help="メッセージに含めるURL")
-        parser.add_argument("--url-title", help="URLのタイトル")
-        parser.add_argument("--device", help="送信先デバイス名")
-        parser.add_argument("--sound", help="通知音")
-        parser.add_argument("--config", default="~/.pushover_config", 
-                           help="設定ファイルのパス (デフォルト: ~/.pushover_config)")
-        parser.add_argument("--version", action="version", version="pushover-cli 1.0.0")
-        
-        parser.epilog = """
-使用例:
-  pushover -m "Hello World"
-  pushover -m "エラーが発生しました" --title "システムアラート" --priority 1
-  pushover config set                    # 永続設定
-  pushover config show                   # 設定確認
-  pushover config test                   # 設定テスト
-
-設定方法:
-  1. 永続設定: pushover config set
-  2. 環境変数: PUSHOVER_TOKEN, PUSHOVER_USER
-  3. 設定ファイル: ~/.pushover_config
-
-優先度:
-  -2: 最低 (通知音なし)
-  -1: 低 (静かな通知音)
-   0: 通常 (デフォルト)
-   1: 高 (重要な通知音)
-   2: 緊急 (確認が必要)
-        """
+    config_test = config_subparsers.add_parser(
+        'test', help='設定をテスト',
+        description='トークンとユーザーキーを通知を送らずに検証し、登録済みのデバイスを表示します'
+    )
+    config_test.add_argument('--send', action='store_true',
+                             help='検証の代わりにテスト通知を実際に送信する')
     
-    args = parser.parse_args()
+    # バッチ送信コマンド
+    batch_parser = subparsers.add_parser(
+        'batch', help='JSON Lines を読み込んでまとめて送信',
+        description='1行に1つのJSON（message, title, priority, url, url_title, device, sound, user, attachment）を読み込み、'
+                    '1つのクライアントで並行送信して入力行ごとに結果を出力します。'
+                    '"template" と "vars" で設定ファイルのテンプレートを展開できます'
+    )
+    batch_parser.add_argument('file', nargs='?', default='-',
+                              help='入力ファイル（省略時または - の場合は標準入力）')
+    batch_parser.add_argument('-t', '--token', help='Pushoverアプリトークン')
+    batch_parser.add_argument('-u', '--user', help='Pushoverユーザーキー')
+    batch_parser.add_argument('--concurrency', type=int, default=4,
+                              help='同時送信数 (デフォルト: 4)')
+    batch_parser.add_argument('--retries', type=int, default=0,
+                              help='一時的な失敗（通信エラー・5xx・429）の再試行回数 (デフォルト: 0)')
+    batch_parser.add_argument('--dedup', type=float, metavar='SECONDS',
+                              help='同じ通知を指定秒数の間は再送しない（別の起動とも共有）')
+    batch_parser.add_argument('--rate', type=float, default=None,
+                              help='1秒あたりの最大送信数（指定時は送信枠が少なくなると低優先度の通知を送信しない）')
+    batch_parser.add_argument('--pipeline', type=int, default=0, metavar='DEPTH',
+                              help='各接続に DEPTH 件ずつまとめて書き込んでから応答を読む'
+                                   '（HTTP/1.1 パイプライン、デフォルト: 0 = 使わない）')
+    batch_parser.add_argument('--config', default='~/.pushover_config',
+                              help='設定ファイルのパス (デフォルト: ~/.pushover_config)')
+    batch_parser.add_argument('--profile', help='設定ファイルのプロファイル名')
     
-    # コマンドに応じて処理を分岐
-    if args.command == 'config':
-        handle_config_command(args)
-        return
+    # 一斉送信コマンド
+    broadcast_parser = subparsers.add_parser(
+        'broadcast', help='大量の宛先へ1つの通知を複数のプロセスで送信',
+        description='宛先ファイル（1行に1つ以上のユーザー／グループキー、# 以降はコメント）の全員に'
+                    '同じ通知を送信します。宛先を複数のワーカープロセスに分けて並行送信し、'
+                    '宛先ごとの結果（JSON Lines）を標準出力に、進捗を標準エラーに出力します'
+    )
+    broadcast_parser.add_argument('file', nargs='?', default='-',
+                                  help='宛先ファイル（省略時または - の場合は標準入力）')
+    broadcast_parser.add_argument('-m', '--message', required=True, help='送信するメッセージ')
+    broadcast_parser.add_argument('--title', help='通知のタイトル')
+    broadcast_parser.add_argument('--priority', type=int, choices=[-2, -1, 0, 1], default=0,
+                                  help='優先度 (-2〜1、デフォルト: 0)')
+    broadcast_parser.add_argument('--url', help='メッセージに含めるURL')
+    broadcast_parser.add_argument('--url-title', help='URLのタイトル')
+    broadcast_parser.add_argument('--device', help='送信先デバイス名')
+    broadcast_parser.add_argument('--sound', help='通知音')
+    broadcast_parser.add_argument('--html', action='store_true', help='メッセージを HTML として表示')
+    broadcast_parser.add_argument('--processes', type=int, default=None,
+                                  help='ワーカープロセスの数 (デフォルト: CPU 数)')
+    broadcast_parser.add_argument('--threads', type=int, default=4,
+                                  help='ワーカーごとの同時送信数 (デフォルト: 4)')
+    broadcast_parser.add_argument('--rate', type=float, default=None,
+                                  help='全ワーカー合計の1秒あたりの最大送信数')
+    broadcast_parser.add_argument('--retries', type=int, default=0,
+                                  help='一時的な失敗（通信エラー・5xx・429）の再試行回数 (デフォルト: 0)')
+    broadcast_parser.add_argument('--chunk-size', type=int, default=200, metavar='N',
+                                  help='ワーカーに1回で渡す宛先の数 (デフォルト: 200)')
+    broadcast_parser.add_argument('--validate', action='store_true',
+                                  help='送信前にキーとデバイス名を検証し、結果をキャッシュする'
+                                       '（無効と分かっている宛先には次回以降も送信しない）')
+    broadcast_parser.add_argument('-t', '--token', help='Pushoverアプリトークン')
+    broadcast_parser.add_argument('-u', '--user', help='Pushoverユーザーキー')
+    broadcast_parser.add_argument('--config', default='~/.pushover_config',
+                                  help='設定ファイルのパス (デフォルト: ~/.pushover_config)')
+    broadcast_parser.add_argument('--profile', help='設定ファイルのプロファイル名')
     
-    # 送信コマンドの処理（デフォルト）
-    if not hasattr(args, 'message'):
-        parser.error("通知メッセージが必要です。-m オプションを使用してください。")
+    # 通知デーモンコマンド
+    daemon_parser = subparsers.add_parser(
+        'daemon', help='Unixソケットで通知を受け付ける常駐デーモンを起動',
+        description='接続を保持した常駐クライアントで、send --via-daemon から受け付けた通知を非同期に配送します'
+    )
+    daemon_parser.add_argument('--socket', default=None,
+                               help=f'ソケットのパス (デフォルト: {default_socket_path()})')
+    daemon_parser.add_argument('--workers', type=int, default=2,
+                               help='配送ワーカー数 (デフォルト: 2)')
+    daemon_parser.add_argument('--outbox', metavar='DIR',
+                               help='未送信の通知を永続化するディレクトリ（異常終了後も再送）')
+    daemon_parser.add_argument('--coalesce', type=float, metavar='SECONDS',
+                               help='指定秒数の間に届いた通知を1件のダイジェストにまとめる（優先度2を除く、--outbox とは併用不可）')
+    daemon_parser.add_argument('--metrics', metavar='FILE',
+                               help='リクエスト数とレイテンシを Prometheus のテキスト形式で書き出すファイル')
+    daemon_parser.add_argument('--metrics-interval', type=float, default=15.0, metavar='SECONDS',
+                               help='--metrics の書き出し間隔 (デフォルト: 15)')
+    daemon_parser.add_argument('-t', '--token', help='Pushoverアプリトークン')
+    daemon_parser.add_argument('-u', '--user', help='Pushoverユーザーキー')
+    daemon_parser.add_argument('--config', default='~/.pushover_config',
+                               help='設定ファイルのパス (デフォルト: ~/.pushover_config)')
+    daemon_parser.add_argument('--profile', help='設定ファイルのプロファイル名')
     
-    # 設定の取得（優先順位: コマンドライン引数 > 環境変数 > 設定ファイル）
-    config_path = os.path.expanduser(args.config)
-    config = load_config_from_file(config_path)
+    # webhook 受信コマンド
+    serve_parser = subparsers.add_parser(
+        'serve', help='HTTP で webhook を受け付けて送信',
+        description='POST された JSON（オブジェクトは1件、配列は複数件）を通知に変換して送信キューに登録し、'
+                    'すぐに 202 を返します。--map を指定しない場合は batch の1行と同じ形式'
+                    '（message, title, priority, url, url_title, device, sound, user）として扱います。'
+                    'POST /template/NAME は設定ファイルの [template:NAME] にペイロードを変数として渡します'
+    )
+    serve_parser.add_argument('--host', default='127.0.0.1',
+                              help='待ち受けるアドレス (デフォルト: 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=8080,
+                              help='待ち受けるポート (デフォルト: 8080)')
+    serve_parser.add_argument('--map', action='append', default=[], metavar='FIELD=TEMPLATE',
+                              help='通知の項目とペイロードの対応（例: message={alerts.0.annotations.summary}、'
+                                   '複数回指定可）')
+    serve_parser.add_argument('--template', metavar='NAME',
+                              help='POST / のペイロードを設定ファイルの [template:NAME] で変換する')
+    serve_parser.add_argument('--secret',
+                              help='"Authorization: Bearer SECRET" のないリクエストを拒否する')
+    serve_parser.add_argument('--workers', type=int, default=2,
+                              help='配送ワーカー数 (デフォルト: 2)')
+    serve_parser.add_argument('--queue-size', type=int, default=10000, metavar='N',
+                              help='送信キューの最大件数 (デフォルト: 10000)')
+    serve_parser.add_argument('--policy', choices=['block', 'drop-oldest', 'drop-lowest-priority'],
+                              default='block',
+                              help='キューが満杯のときの動作（block は 503 を返す、デフォルト: block）')
+    serve_parser.add_argument('--rate', type=float, default=None,
+                              help='1秒あたりの最大送信数')
+    serve_parser.add_argument('--retries', type=int, default=0,
+                              help='一時的な失敗（通信エラー・5xx・429）の再試行回数 (デフォルト: 0)')
+    serve_parser.add_argument('-t', '--token', help='Pushoverアプリトークン')
+    serve_parser.add_argument('-u', '--user', help='Pushoverユーザーキー')
+    serve_parser.add_argument('--config', default='~/.pushover_config',
+                              help='設定ファイルのパス (デフォルト: ~/.pushover_config)')
+    serve_parser.add_argument('--profile', help='設定ファイルのプロファイル名')
     
-    token = (args.token or 
-             os.environ.get("PUSHOVER_TOKEN") or 
-             config.get("PUSHOVER_TOKEN"))
+    # レシートコマンド
+    receipts_parser = subparsers.add_parser(
+        'receipts', help='緊急の通知のレシートの一覧・確認待ち・取り消し'
+    )
+    receipts_subparsers = receipts_parser.add_subparsers(dest='receipts_action', required=True,
+                                                         help='レシート操作')
+    receipts_list = receipts_subparsers.add_parser('list', help='最近送信した緊急の通知を表示')
+    receipts_list.add_argument('--limit', type=int, default=20, help='表示件数 (デフォルト: 20)')
+    receipts_wait = receipts_subparsers.add_parser(
+        'wait', help='緊急の通知が確認されるか期限切れになるまで待つ',
+        description='レシートの状態を1つの接続で問い合わせ、確認・期限切れになったものから表示します。'
+                    'すべて確認されれば終了コード 0、期限切れやタイムアウトがあれば 1'
+    )
+    receipts_wait.add_argument('receipt', nargs='*',
+                               help='レシート（省略時は送信済みで未確認のものすべて）')
+    receipts_wait.add_argument('--timeout', type=float, default=None, metavar='SECONDS',
+                               help='待つ最大秒数（デフォルト: すべて終わるまで）')
+    receipts_wait.add_argument('--interval', type=float, default=5.0, metavar='SECONDS',
+                               help='問い合わせ間隔の最小値 (デフォルト: 5)')
+    receipts_wait.add_argument('--max-interval', type=float, default=60.0, metavar='SECONDS',
+                               help='問い合わせ間隔の最大値 (デフォルト: 60)')
+    receipts_cancel = receipts_subparsers.add_parser('cancel', help='緊急の通知の再通知を取り消す')
+    receipts_cancel.add_argument('receipt', help='レシート')
+    for sub in (receipts_wait, receipts_cancel):
+        sub.add_argument('-t', '--token', help='Pushoverアプリトークン')
+        sub.add_argument('-u', '--user', help='Pushoverユーザーキー')
+        sub.add_argument('--config', default='~/.pushover_config',
+                         help='設定ファイルのパス (デフォルト: ~/.pushover_config)')
+        sub.add_argument('--profile', help='設定ファイルのプロファイル名')
     
-    user = (args.user or 
-            os.environ.get("PUSHOVER_USER") or 
-            config.get("PUSHOVER_USER"))
+    # ログ監視コマンド
+    watch_parser = subparsers.add_parser(
+        'watch', help='ログファイルを追跡し、パターンに一致した行を通知',
+        description='tail -F のようにログファイルを追跡し（ローテーション・切り詰めに対応）、'
+                    '一致した行をパターンごとにまとめて通知します'
+    )
+    watch_parser.add_argument('file', help='監視するログファイル')
+    watch_parser.add_argument('-p', '--pattern', action='append', required=True,
+                              help='通知する行の正規表現（複数指定可）')
+    watch_parser.add_argument('-i', '--ignore-case', action='store_true',
+                              help='大文字と小文字を区別しない')
+    watch_parser.add_argument('--title', help='通知のタイトル（デフォルト: "ファイル名: パターン"）')
+    watch_parser.add_argument('--priority', type=int, choices=[-2, -1, 0, 1], default=0,
+                              help='優先度 (-2〜1、デフォルト: 0)')
+    watch_parser.add_argument('--device', help='送信先デバイス名')
+    watch_parser.add_argument('--sound', help='通知音')
+    watch_parser.add_argument('--window', type=float, default=10.0, metavar='SECONDS',
+                              help='一致をまとめる秒数 (デフォルト: 10)')
+    watch_parser.add_argument('--max-per-minute', type=float, default=6.0, metavar='N',
+                              help='1分あたりの最大通知数 (デフォルト: 6)')
+    watch_parser.add_argument('--lines', type=int, default=5, metavar='N',
+                              help='通知に含める一致行の数 (デフォルト: 5)')
+    watch_parser.add_argument('--from-start', action='store_true',
+                              help='既存の内容も先頭から検索する（デフォルト: 追記分のみ）')
+    watch_parser.add_argument('--once', action='store_true',
+                              help='現在の内容を先頭から検索して通知し、終了する')
+    watch_parser.add_argument('--poll-interval', type=float, default=0.25, metavar='SECONDS',
+                              help='追記を確認する間隔 (デフォルト: 0.25)')
+    watch_parser.add_argument('-t', '--token', help='Pushoverアプリトークン')
+    watch_parser.add_argument('-u', '--user', help='Pushoverユーザーキー')
+    watch_parser.add_argument('--config', default='~/.pushover_config',
+                              help='設定ファイルのパス (デフォルト: ~/.pushover_config)')
+    watch_parser.add_argument('--profile', help='設定ファイルのプロファイル名')
     
-    # 必須パラメータのチェック
-    if not token:
-        print("エラー: Pushoverトークンが指定されていません", file=sys.stderr)
-        print("  設定方法:", file=sys.stderr)
-        print("    pushover config set    # 永続設定（推奨）", file=sys.stderr)
-        print("    -t オプション          # 一時的な指定", file=sys.stderr)
-        print("    PUSHOVER_TOKEN環境変数 # 手動設定", file=sys.stderr)
+    # システム監視コマンド
+    monitor_parser = subparsers.add_parser(
+        'monitor', help='ディスク・メモリ・負荷を監視し、閾値を超えたら通知',
+        description='/proc と statvfs から直接値を読み込み、警告（優先度1）・緊急（優先度2）の'
+                    '閾値を超えたときと回復したときに通知します。閾値は "off" で無効にできます'
+    )
+    monitor_parser.add_argument('--interval', type=float, default=5.0, metavar='SECONDS',
+                                help='サンプリング間隔 (デフォルト: 5)')
+    monitor_parser.add_argument('--once', action='store_true',
+                                help='1回だけ確認して終了する（cron 用）')
+    monitor_parser.add_argument('--disk', action='append', metavar='PATH',
+                                help='監視するファイルシステム（複数指定可、デフォルト: /）')
+    monitor_parser.add_argument('--disk-warning', type=threshold, default=90.0, metavar='PERCENT',
+                                help='ディスク使用量の警告閾値 (デフォルト: 90)')
+    monitor_parser.add_argument('--disk-critical', type=threshold, default=95.0, metavar='PERCENT',
+                                help='ディスク使用量の緊急閾値 (デフォルト: 95)')
+    monitor_parser.add_argument('--memory-warning', type=threshold, default=90.0, metavar='PERCENT',
+                                help='メモリ使用量の警告閾値 (デフォルト: 90)')
+    monitor_parser.add_argument('--memory-critical', type=threshold, default=None, metavar='PERCENT',
+                                help='メモリ使用量の緊急閾値 (デフォルト: なし)')
+    monitor_parser.add_argument('--load-warning', type=threshold, default=80.0, metavar='PERCENT',
+                                help='CPU数に対する1分間の平均負荷の警告閾値 (デフォルト: 80)')
+    monitor_parser.add_argument('--load-critical', type=threshold, default=None, metavar='PERCENT',
+                                help='CPU数に対する1分間の平均負荷の緊急閾値 (デフォルト: なし)')
+    monitor_parser.add_argument('--hysteresis', type=float, default=5.0, metavar='PERCENT',
+                                help='回復とみなすために閾値を下回る幅 (デフォルト: 5)')
+    monitor_parser.add_argument('--no-recovery', action='store_true',
+                                help='回復したときに通知しない')
+    monitor_parser.add_argument('--device', help='送信先デバイス名')
+    monitor_parser.add_argument('--sound', help='通知音')
+    monitor_parser.add_argument('-t', '--token', help='Pushoverアプリトークン')
+    monitor_parser.add_argument('-u', '--user', help='Pushoverユーザーキー')
+    monitor_parser.add_argument('--config', default='~/.pushover_config',
+                                help='設定ファイルのパス (デフォルト: ~/.pushover_config)')
+    monitor_parser.add_argument('--profile', help='設定ファイルのプロファイル名')
+    
+    return parser
+
+
+def build_send_parser():
+    """送信コマンドのパーサーを作成"""
+    parser = argparse.ArgumentParser(
+        description="Pushover CLI - コマンドラインから通知を送信",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=SEND_EPILOG,
+    )
+    parser.add_argument("-m", "--message", help="送信するメッセージ（--template を使う場合は省略可）")
+    parser.add_argument("-t", "--token", help="Pushoverアプリトークン")
+    parser.add_argument("-u", "--user", action="append",
+                       help="Pushoverユーザーキー（複数指定・カンマ区切りで複数の宛先に送信）")
+    parser.add_argument("--group", metavar="NAME",
+                       help="設定ファイルの PUSHOVER_GROUP_<NAME> に列挙した宛先に送信")
+    parser.add_argument("--concurrency", type=int, default=8,
+                       help="複数の宛先に送信する際の同時送信数 (デフォルト: 8)")
+    parser.add_argument("--title", help="通知のタイトル")
+    parser.add_argument("--priority", type=int, choices=[-2, -1, 0, 1, 2],
+                       help="優先度 (-2〜2、デフォルト: 0)")
+    parser.add_argument("--url", help="メッセージに含めるURL")
+    parser.add_argument("--url-title", help="URLのタイトル")
+    parser.add_argument("--device", help="送信先デバイス名")
+    parser.add_argument("--sound", help="通知音")
+    parser.add_argument("--attachment", metavar="PATH", help="添付する画像ファイル（最大2.5MB）")
+    parser.add_argument("--html", action="store_true",
+                       help="メッセージを HTML として表示する（<b>, <i>, <u>, <font color>, <a>）")
+    parser.add_argument("--template", metavar="NAME",
+                       help="設定ファイルの [template:NAME] のテンプレートを使う")
+    parser.add_argument("--var", action="append", metavar="KEY=VALUE",
+                       help="テンプレートの変数（複数指定可）")
+    parser.add_argument("--vars-json", metavar="JSON",
+                       help="テンプレートの変数をJSONオブジェクトで指定（- の場合は標準入力）")
+    parser.add_argument("--retry-interval", type=int, metavar="SECONDS",
+                       help="優先度2の通知を確認されるまで再通知する間隔 (30以上、デフォルト: 60)")
+    parser.add_argument("--expire", type=int, metavar="SECONDS",
+                       help="優先度2の通知の再通知を続ける秒数 (最大10800、デフォルト: 3600)")
+    parser.add_argument("--retries", type=int, default=0,
+                       help="一時的な失敗（通信エラー・5xx・429）の再試行回数 (デフォルト: 0)")
+    parser.add_argument("--dedup", type=float, metavar="SECONDS",
+                       help="同じ通知を指定秒数の間は再送しない（別の起動とも共有）")
+    parser.add_argument("--config", default="~/.pushover_config", 
+                       help="設定ファイルのパス (デフォルト: ~/.pushover_config)")
+    parser.add_argument("--profile",
+                       help="設定ファイルのプロファイル名（トークン・宛先・デバイス・通知音の既定値）")
+    parser.add_argument("--via-daemon", action="store_true",
+                       help="起動中の通知デーモン経由で送信（停止中は直接送信）")
+    parser.add_argument("--socket", help="通知デーモンのソケットパス")
+    parser.add_argument("--version", action="version", version="pushover-cli 1.0.0")
+    return parser
+
+
+def handle_send_command(args):
+    """送信コマンドの処理"""
+    # 緊急の通知のパラメータは送信前に確認する（APIの制限: retry >= 30, expire <= 10800）
+    if args.retry_interval is not None and args.retry_interval < 30:
+        print("エラー: --retry-interval は30秒以上で指定してください", file=sys.stderr)
+        sys.exit(1)
+    if args.expire is not None and not 0 < args.expire <= 10800:
+        print("エラー: --expire は1〜10800秒の範囲で指定してください", file=sys.stderr)
         sys.exit(1)
     
-    if not user:
-        print("エラー: Pushoverユーザーキーが指定されていません", file=sys.stderr)
-        print("  設定方法:", file=sys.stderr)
-        print("    pushover config set    # 永続設定（推奨）", file=sys.stderr)
-        print("    -u オプション          # 一時的な指定", file=sys.stderr)
-        print("    PUSHOVER_USER環境変数  # 手動設定", file=sys.stderr)
+    if args.template:
+        apply_template(args)
+    if not args.message:
+        print("エラー: -m/--message または --template を指定してください", file=sys.stderr)
         sys.exit(1)
+    if args.priority is None:
+        args.priority = 0
+    
+    # 宛先の解決（-u の繰り返し・カンマ区切りと --group を合わせる）
+    recipients = []
+    for value in args.user or []:
+        recipients.extend(value.replace(",", " ").split())
+    if args.group:
+        from .fanout import load_group
+        from .settings import load_config_from_file
+        
+        group = load_group(load_config_from_file(os.path.expanduser(args.config)), args.group)
+        if not group:
+            print(f"エラー: グループ '{args.group}' が設定ファイルにありません", file=sys.stderr)
+            print(f"  設定例: PUSHOVER_GROUP_{args.group.upper()}=ユーザーキー1,ユーザーキー2", file=sys.stderr)
+            sys.exit(1)
+        recipients.extend(group)
+    recipients = list(dict.fromkeys(recipients))
+    
+    # プロファイルの既定のデバイス・通知音はデーモン経由でも直接送信でも使う
+    # （デーモン経由ではトークン・ユーザーキーはデーモン側で保持するため必須としない）
+    settings = resolve_credentials(
+        args.token, recipients[0] if recipients else None, args.config,
+        args.profile, args.device, args.sound, required=not args.via_daemon
+    )
+    args.device, args.sound = settings.device, settings.sound
+    notification = {
+        "message": args.message,
+        "title": args.title,
+        "priority": args.priority,
+        "url": args.url,
+        "url_title": args.url_title,
+        "device": args.device,
+        "sound": args.sound,
+        "attachment": args.attachment,
+        "retry_interval": args.retry_interval,
+        "expire": args.expire,
+        "html": args.html,
+    }
+    
+    if args.via_daemon:
+        # デーモンが起動していれば接続プールや HTTP のモジュールは読み込まない
+        from .errors import PushoverConnectionError
+        from .spool import send_via_daemon
+        
+        # デーモンに渡すのは指定された項目のみ（認証情報はデーモン側で保持）
+        payload = {
+            key: value for key, value in notification.items()
+            if value is not None and key != "html"
+        }
+        if args.html:
+            payload["html"] = True
+        if args.attachment:
+            payload["attachment"] = os.path.abspath(args.attachment)
+        accepted = 0
+        try:
+            for recipient in recipients or [None]:
+                if recipient is not None:
+                    payload["user"] = recipient
+                send_via_daemon(payload, args.socket)
+                accepted += 1
+            print("通知をデーモンのキューに登録しました")
+            sys.exit(0)
+        except ValueError as e:
+            print(f"エラー: {e}", file=sys.stderr)
+            sys.exit(1)
+        except PushoverConnectionError as e:
+            # 登録済みの可能性があるため直接送信はしない（二重送信を避ける）
+            print(f"エラー: {e}", file=sys.stderr)
+            sys.exit(1)
+        except OSError:
+            # デーモンに接続できない場合は直接送信する
+            # （途中で停止した場合、登録済みの宛先には送らない）
+            recipients = recipients[accepted:]
+        settings = resolve_credentials(
+            args.token, recipients[0] if recipients else None, args.config,
+            args.profile, args.device, args.sound
+        )
+    
+    from .core import PushoverCLI
+    from .retry import RetryPolicy
     
     # PushoverCLIインスタンスを作成
-    pushover = PushoverCLI(token, user)
+    retry = RetryPolicy(max_attempts=args.retries + 1) if args.retries else None
+    pushover = PushoverCLI(settings.token, settings.user, retry=retry,
+                           pool_size=max(1, args.concurrency))
+    if args.dedup:
+        from .dedup import DedupPushover, SQLiteDedupStore
+        pushover = DedupPushover(pushover, ttl=args.dedup, store=SQLiteDedupStore())
+    
+    if len(recipients) > 1:
+        send_fanout(pushover, recipients, args)
     
     # 通知を送信
-    success, message = pushover.send_notification(
-        message=args.message,
-        title=args.title,
-        priority=args.priority,
-        url=args.url,
-        url_title=args.url_title,
-        device=args.device,
-        sound=args.sound
-    )
+    result = pushover.send_detailed(**notification)
     
     # 結果を出力
-    if success:
-        print(message)
-        sys.exit(0)
-    else:
-        print(f"エラー: {message}", file=sys.stderr)
+    if not result.success:
+        print(f"エラー: {result.message}", file=sys.stderr)
         sys.exit(1)
+    print(result.message)
+    if result.receipt:
+        # 緊急の通知は receipts wait / list から参照できるように保存する
+        from .core import DEFAULT_EXPIRE
+        from .receipts import ReceiptStore
+        
+        store = ReceiptStore()
+        store.add(result.receipt, args.expire or DEFAULT_EXPIRE, args.message,
+                  args.title, settings.user)
+        store.close()
+        print(f"レシート: {result.receipt}（pushover receipts wait で確認を待てます）")
+    sys.exit(0)
+
+
+def main():
+    """メイン関数"""
+    # "pushover send ..." は "pushover ..." と同じ送信コマンドとして扱う
+    argv = sys.argv[1:]
+    if argv and argv[0] == 'send':
+        argv = argv[1:]
+    
+    # サブコマンドのパーサーは指定されたときだけ作成する
+    if argv and argv[0] in SUBCOMMANDS:
+        args = build_command_parser().parse_args(argv)
+        if args.command == 'config':
+            handle_config_command(args)
+        elif args.command == 'batch':
+            handle_batch_command(args)
+        elif args.command == 'broadcast':
+            handle_broadcast_command(args)
+        elif args.command == 'daemon':
+            handle_daemon_command(args)
+        elif args.command == 'serve':
+            handle_serve_command(args)
+        elif args.command == 'receipts':
+            handle_receipts_command(args)
+        elif args.command == 'watch':
+            handle_watch_command(args)
+        elif args.command == 'monitor':
+            handle_monitor_command(args)
+        return
+    
+    # 引数が何もない場合を含め、それ以外は送信コマンドとして処理
+    handle_send_command(build_send_parser().parse_args(argv))
 
 
 if __name__ == "__main__":
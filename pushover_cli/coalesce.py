@@ -0,0 +1,188 @@
+"""
+Pushover CLI 通知集約モジュール
+
+短時間に集中した通知をまとめて1件のダイジェスト通知として送信する
+"""
+
+import collections
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .core import MAX_MESSAGE_LENGTH, MAX_TITLE_LENGTH, PushoverCLI, truncate_text
+
+
+QUEUED_MESSAGE = "通知をまとめて送信するためにキューに登録しました"
+
+GroupKey = Tuple[Optional[str], Optional[str], int]
+
+
+def build_digest(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    複数の通知を1件のダイジェスト通知（send_notification の引数）にまとめる
+
+    メッセージは各通知を1行ずつ並べ、MAX_MESSAGE_LENGTH に収まらない分は
+    「…ほかN件」として省略する。
+    """
+    if len(messages) == 1:
+        return dict(messages[0])
+
+    first = messages[0]
+    titles = {m.get("title") for m in messages}
+    if len(titles) == 1 and first.get("title"):
+        title = f"{first['title']}（{len(messages)}件）"
+    else:
+        title = f"{len(messages)}件の通知"
+
+    lines = [
+        f"[{m['title']}] {m['message']}" if m.get("title") and len(titles) > 1 else m["message"]
+        for m in messages
+    ]
+    body: List[str] = []
+    used = 0
+    for index, line in enumerate(lines):
+        rest = len(lines) - index - 1
+        # 残りがある場合は省略表示の分を確保しておく
+        reserve = len(f"\n…ほか{rest}件") if rest else 0
+        separator = 1 if body else 0
+        if used + separator + len(line) + reserve <= MAX_MESSAGE_LENGTH:
+            body.append(line)
+            used += separator + len(line)
+            continue
+        if not body:
+            body.append(truncate_text(line, MAX_MESSAGE_LENGTH - reserve - 1))
+            index += 1
+        omitted = len(lines) - index
+        if omitted:
+            body.append(f"…ほか{omitted}件")
+        break
+
+    digest: Dict[str, Any] = {
+        "message": "\n".join(body),
+        "title": truncate_text(title, MAX_TITLE_LENGTH),
+        "priority": first.get("priority", 0),
+    }
+    for key in ("user", "device", "sound"):
+        if first.get(key):
+            digest[key] = first[key]
+    urls = {(m.get("url"), m.get("url_title")) for m in messages}
+    if len(urls) == 1 and first.get("url"):
+        digest["url"] = first["url"]
+        if first.get("url_title"):
+            digest["url_title"] = first["url_title"]
+    return digest
+
+
+class CoalescingPushover:
+    """通知を (user, device, priority) ごとにまとめて送信する PushoverCLI のラッパー
+
+    最初の通知から ``window`` 秒経つか、``max_count`` 件たまった時点で
+    ダイジェスト通知を1件送信する。優先度 2（緊急）と添付ファイル付きの通知は集約せず即座に送信する。
+    それ以外の属性は元のクライアントに委譲する。
+    """
+
+    def __init__(self, client: PushoverCLI, window: float = 5.0, max_count: int = 50):
+        self.client = client
+        self.window = window
+        self.max_count = max_count
+        self.received = 0
+        self.sent = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+        self._groups: "collections.OrderedDict[GroupKey, List[Dict[str, Any]]]" = (
+            collections.OrderedDict()
+        )
+        self._deadlines: Dict[GroupKey, float] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _emit(self, messages: List[Dict[str, Any]]) -> None:
+        success, response = self.client.send_notification(**build_digest(messages))
+        with self._lock:
+            if success:
+                self.sent += 1
+            else:
+                self.failed += 1
+                self.last_error = response
+
+    def _enqueue(self, kwargs: Dict[str, Any]) -> bool:
+        """通知をグループに追加する（優先度 2 と添付ファイル付きの場合は False）"""
+        priority = kwargs.get("priority", 0)
+        if priority >= 2 or kwargs.get("attachment") is not None:
+            return False
+        key = (kwargs.get("user"), kwargs.get("device"), priority)
+        with self._lock:
+            self.received += 1
+            group = self._groups.setdefault(key, [])
+            group.append(kwargs)
+            if len(group) == 1:
+                self._deadlines[key] = time.monotonic() + self.window
+                self._changed.notify()
+            if len(group) < self.max_count:
+                return True
+            full = self._pop(key)
+        self._emit(full)
+        return True
+
+    def _pop(self, key: GroupKey) -> List[Dict[str, Any]]:
+        self._deadlines.pop(key, None)
+        return self._groups.pop(key)
+
+    def send_notification(self, message: str, **kwargs: Any) -> Tuple[bool, str]:
+        """PushoverCLI.send_notification と同じ（集約した場合は (True, QUEUED_MESSAGE)）"""
+        kwargs["message"] = message
+        if self._enqueue(kwargs):
+            return True, QUEUED_MESSAGE
+        return self.client.send_notification(**kwargs)
+
+    def send(self, message: str, **kwargs: Any) -> Dict[str, Any]:
+        """PushoverCLI.send と同じ（集約した場合は {"status": 1, "queued": True}）"""
+        kwargs["message"] = message
+        if self._enqueue(kwargs):
+            return {"status": 1, "queued": True}
+        return self.client.send(**kwargs)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._closed:
+                    now = time.monotonic()
+                    due = [key for key, deadline in self._deadlines.items() if deadline <= now]
+                    if due:
+                        break
+                    timeout = min(self._deadlines.values()) - now if self._deadlines else None
+                    self._changed.wait(timeout)
+                if self._closed:
+                    return
+                batches = [self._pop(key) for key in due]
+            for messages in batches:
+                self._emit(messages)
+
+    def flush(self) -> None:
+        """たまっているすべてのグループをすぐに送信"""
+        with self._lock:
+            batches = [self._pop(key) for key in list(self._groups)]
+        for messages in batches:
+            self._emit(messages)
+
+    def close(self) -> None:
+        """たまっている通知を送信してから元のクライアントを閉じる"""
+        with self._lock:
+            self._closed = True
+            self._changed.notify_all()
+        self._thread.join()
+        self.flush()
+        self.client.close()
+
+    def __enter__(self) -> "CoalescingPushover":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
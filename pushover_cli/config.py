@@ -18,6 +18,8 @@ class ConfigManager:
             'zsh': ['.zshrc', '.zprofile'],
             'fish': ['.config/fish/config.fish'],
         }
+        # シェル名 -> 既存の設定ファイル（見つかったものだけ覚えておく）
+        self._shell_config_files: Dict[str, Path] = {}
     
     def detect_shell(self) -> str:
         """現在使用しているシェルを検出"""
@@ -36,12 +38,17 @@ class ConfigManager:
         if not shell:
             shell = self.detect_shell()
         
+        cached = self._shell_config_files.get(shell)
+        if cached is not None:
+            return cached
+        
         config_files = self.shell_configs.get(shell, self.shell_configs['bash'])
         
         # 既存のファイルがあるかチェック
         for config_file in config_files:
             config_path = self.home / config_file
             if config_path.exists():
+                self._shell_config_files[shell] = config_path
                 return config_path
         
         # 既存ファイルがない場合は最初のファイルを使用
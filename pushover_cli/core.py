@@ -3,22 +3,457 @@ Pushover CLI コアモジュール
 """
 
 import http.client
+import ssl
 import urllib.parse
 import json
 import os
-from typing import Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .attachment import (
+    Attachment,
+    AttachmentError,
+    AttachmentResizer,
+    MultipartBody,
+    prepare_attachment,
+)
+from .errors import (
+    PushoverAPIError,
+    PushoverConnectionError,
+    PushoverError,
+    PushoverRateLimitError,
+    PushoverRequestError,
+    PushoverServerError,
+)
+from .metrics import MetricsRegistry
+from .pool import ConnectionPool, PooledResponse, RequestTiming
+from .ratelimit import (
+    RateLimitExceeded,
+    RateLimitScheduler,
+    RateLimitState,
+    parse_limit_headers,
+)
+from .retry import RetryPolicy
+from .settings import load_config_from_file
+
+
+API_HOST = "api.pushover.net"
+API_PORT = 443
+API_PATH = "/1/messages.json"
+RECEIPT_PATH = "/1/receipts/{receipt}.json"
+RECEIPT_CANCEL_PATH = "/1/receipts/{receipt}/cancel.json"
+USER_VALIDATE_PATH = "/1/users/validate.json"
+
+# APIが受け付ける各フィールドの最大文字数
+MAX_MESSAGE_LENGTH = 1024
+MAX_TITLE_LENGTH = 250
+MAX_URL_LENGTH = 512
+MAX_URL_TITLE_LENGTH = 100
+
+# 緊急（優先度 2）の通知の再通知間隔と有効期限（秒）
+EMERGENCY_PRIORITY = 2
+DEFAULT_RETRY_INTERVAL = 60
+DEFAULT_EXPIRE = 3600
+MIN_RETRY_INTERVAL = 30
+MAX_EXPIRE = 10800
+
+
+def resolve_api_endpoint(api_url: Optional[str] = None) -> Tuple[str, int, bool]:
+    """APIのベースURLを (ホスト, ポート, HTTPSかどうか) に分解
+
+    未指定の場合は PUSHOVER_API_URL 環境変数、なければ本番APIを使用する。
+    """
+    api_url = api_url or os.environ.get("PUSHOVER_API_URL")
+    if not api_url:
+        return API_HOST, API_PORT, True
+    parsed = urllib.parse.urlsplit(api_url)
+    secure = parsed.scheme != "http"
+    return parsed.hostname or API_HOST, parsed.port or (API_PORT if secure else 80), secure
+
+
+def truncate_text(text: str, limit: int, suffix: str = "…") -> str:
+    """text が limit 文字を超える場合は末尾を suffix に置き換えて切り詰める"""
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - len(suffix))] + suffix
+
+
+def build_message_data(
+    token: str,
+    user: str,
+    message: str,
+    title: Optional[str] = None,
+    priority: int = 0,
+    url: Optional[str] = None,
+    url_title: Optional[str] = None,
+    device: Optional[str] = None,
+    sound: Optional[str] = None,
+    retry_interval: Optional[int] = None,
+    expire: Optional[int] = None,
+    html: bool = False
+) -> Dict[str, str]:
+    """/1/messages.json に送信するフォームデータを構築
+
+    緊急（優先度 2）の通知には必須の retry と expire を付ける
+    （未指定の場合は DEFAULT_RETRY_INTERVAL と DEFAULT_EXPIRE）。
+    """
+    data = {
+        "token": token,
+        "user": user,
+        "message": message,
+        "priority": str(priority)
+    }
+    
+    # オプションパラメータを追加
+    if title:
+        data["title"] = title
+    if url:
+        data["url"] = url
+    if url_title:
+        data["url_title"] = url_title
+    if device:
+        data["device"] = device
+    if sound:
+        data["sound"] = sound
+    if html:
+        data["html"] = "1"
+    if priority == EMERGENCY_PRIORITY:
+        data["retry"] = str(retry_interval or DEFAULT_RETRY_INTERVAL)
+        data["expire"] = str(expire or DEFAULT_EXPIRE)
+    return data
+
+
+def raise_for_response(status: int, body: bytes, retry_after: float = 0.0) -> Dict[str, Any]:
+    """
+    APIレスポンスを検査し、成功していればJSONを返す
+    
+    Raises:
+        PushoverRateLimitError: HTTP 429
+        PushoverRequestError: 4xx（本文によらない）、またはステータスが1でないレスポンス
+        PushoverServerError: 5xx、または 4xx 以外でJSONとして解釈できないレスポンス
+    """
+    try:
+        response_json = json.loads(body.decode('utf-8'))
+        error_messages = response_json.get("errors") or ["不明なエラー"]
+    except (ValueError, AttributeError):
+        response_json = {}
+        error_messages = [f"HTTP {status}"]
+    
+    if status == 200 and response_json.get("status") == 1:
+        return response_json
+    if status == 429:
+        raise PushoverRateLimitError(status, error_messages, response_json, retry_after=retry_after)
+    # プロキシが返す HTML の 403/404 なども恒久的な失敗として扱う
+    if 400 <= status < 500 or (status < 500 and response_json):
+        raise PushoverRequestError(status, error_messages, response_json)
+    raise PushoverServerError(status, error_messages, response_json)
+
+
+def _connection_error(e: Exception) -> PushoverConnectionError:
+    """通信時の例外を PushoverConnectionError に変換"""
+    error = PushoverConnectionError(str(e) or type(e).__name__)
+    # 証明書の検証失敗は再試行しても解決しない
+    error.retryable = not isinstance(e, ssl.SSLCertVerificationError)
+    return error
+
+
+def parse_api_response(status: int, body: bytes) -> Tuple[bool, str]:
+    """APIレスポンスを (成功フラグ, レスポンスメッセージ) に変換"""
+    try:
+        raise_for_response(status, body)
+    except PushoverAPIError as e:
+        return False, f"送信エラー: {str(e)}"
+    return True, "通知が正常に送信されました"
+
+
+class SendResult(NamedTuple):
+    """send_detailed の結果"""
+
+    success: bool
+    # send_notification と同じメッセージ
+    message: str
+    # 最後のリクエストの HTTP ステータス（接続できなかった場合は None）
+    status: Optional[int]
+    request_id: Optional[str]
+    # 最後のリクエストの所要時間
+    timing: Optional[RequestTiming]
+    # 最後のレスポンスの X-Limit-App-*（limit, remaining, reset）
+    rate_limit: Dict[str, Optional[int]]
+    # 再試行を含むリクエスト回数
+    attempts: int
+    # 緊急（優先度 2）の通知の確認状況を問い合わせるためのレシート
+    receipt: Optional[str] = None
 
 
 class PushoverCLI:
-    """Pushover通知を送信するCLIクラス"""
+    """Pushover通知を送信するCLIクラス
+
+    スレッドセーフで、1つのインスタンス（接続プール）を複数のスレッドから共有できる。
+    送信を待たずに戻る場合は dispatch.QueuedPushover で包む。
+    """
     
-    API_HOST = "api.pushover.net"
-    API_PORT = 443
-    API_PATH = "/1/messages.json"
+    API_HOST = API_HOST
+    API_PORT = API_PORT
+    API_PATH = API_PATH
     
-    def __init__(self, token: str, user: str):
+    def __init__(
+        self,
+        token: str,
+        user: str,
+        api_url: Optional[str] = None,
+        timeout: float = 10.0,
+        pool_size: int = 4,
+        idle_timeout: float = 60.0,
+        scheduler: Optional[RateLimitScheduler] = None,
+        retry: Optional[RetryPolicy] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        attachment_resizer: Optional[AttachmentResizer] = None
+    ):
+        """
+        Args:
+            token: Pushoverアプリトークン
+            user: Pushoverユーザーキー
+            api_url: APIのベースURL（例: http://127.0.0.1:8080）。
+                未指定の場合は PUSHOVER_API_URL 環境変数、なければ本番API
+            timeout: 接続・読み込みのタイムアウト秒数
+            pool_size: 保持するkeep-alive接続の最大数
+            idle_timeout: アイドル接続を破棄するまでの秒数
+            scheduler: 送信ペースと送信枠を制御するスケジューラ（オプション）
+            retry: 一時的な失敗を再試行する方針（オプション、未指定時は再試行しない）
+            ssl_context: HTTPS 接続に使う SSLContext（未指定時は既定の証明書検証）
+            metrics: リクエストごとの計測値を記録する MetricsRegistry（オプション）
+            attachment_resizer: 添付ファイルが上限を超えた場合に縮小する関数（オプション）
+        """
         self.token = token
         self.user = user
+        self.scheduler = scheduler
+        self.retry = retry
+        self.metrics = metrics
+        self.attachment_resizer = attachment_resizer
+        # APIの送信枠（スケジューラを使う場合はその状態を共有する）
+        self.rate_limit = scheduler.state if scheduler else RateLimitState()
+        
+        self.host, self.port, secure = resolve_api_endpoint(api_url)
+        
+        # インスタンスが所有する接続プール（スレッド間で共有可能）
+        self.pool = ConnectionPool(
+            self.host,
+            self.port,
+            secure=secure,
+            timeout=timeout,
+            maxsize=pool_size,
+            idle_timeout=idle_timeout,
+            ssl_context=ssl_context
+        )
+    
+    def close(self) -> None:
+        """保持している接続をすべて閉じる"""
+        self.pool.close()
+    
+    def __enter__(self) -> "PushoverCLI":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _post_message(
+        self,
+        body: Union[bytes, MultipartBody],
+        priority: int,
+        trace: Optional[List[Optional[PooledResponse]]] = None
+    ) -> Dict[str, Any]:
+        """1回分の送信（スケジューラの待機を含む）
+        
+        trace を渡すと、レスポンス（接続できなかった場合は None）を追加する。
+        """
+        if isinstance(body, MultipartBody):
+            # 本文はチャンクで送るため長さを明示する（chunked 転送にしない）
+            headers = {"Content-type": body.content_type, "Content-Length": str(len(body))}
+        else:
+            headers = {"Content-type": "application/x-www-form-urlencoded"}
+        if self.scheduler is not None:
+            self.scheduler.acquire(priority)
+        try:
+            # プールの接続でPOSTリクエストを送信
+            response = self.pool.request("POST", self.API_PATH, body, headers)
+        except (OSError, http.client.HTTPException) as e:
+            if trace is not None:
+                trace.append(None)
+            if self.metrics is not None:
+                self.metrics.observe(None, priority, None)
+            raise _connection_error(e) from e
+        
+        if trace is not None:
+            trace.append(response)
+        if self.metrics is not None:
+            self.metrics.observe(response.status, priority, response.timing)
+        self.rate_limit.record_response(response.status, response.headers)
+        return raise_for_response(
+            response.status, response.body, self.rate_limit.retry_after()
+        )
+    
+    def _api_request(self, method: str, path: str, body: Optional[bytes] = None) -> Dict[str, Any]:
+        """メッセージ送信以外のAPI呼び出し（送信枠の追跡とスケジューラの対象外）"""
+        headers = {"Content-type": "application/x-www-form-urlencoded"} if body is not None else {}
+        try:
+            response = self.pool.request(method, path, body, headers)
+        except (OSError, http.client.HTTPException) as e:
+            raise _connection_error(e) from e
+        return raise_for_response(response.status, response.body)
+    
+    def get_receipt(self, receipt: str) -> Dict[str, Any]:
+        """
+        緊急（優先度 2）の通知の確認状況を取得（/1/receipts/{receipt}.json）
+        
+        送信と同じ接続プールを使うため、keep-alive 接続が再利用される。
+        
+        Raises:
+            PushoverRequestError: レシートが存在しない場合など
+            PushoverServerError / PushoverConnectionError: 一時的な失敗
+        """
+        query = urllib.parse.urlencode({"token": self.token})
+        path = RECEIPT_PATH.format(receipt=urllib.parse.quote(receipt, safe=""))
+        return self._api_request("GET", f"{path}?{query}")
+    
+    def cancel_receipt(self, receipt: str) -> Dict[str, Any]:
+        """緊急（優先度 2）の通知の再通知を取り消す"""
+        path = RECEIPT_CANCEL_PATH.format(receipt=urllib.parse.quote(receipt, safe=""))
+        body = urllib.parse.urlencode({"token": self.token}).encode("utf-8")
+        return self._api_request("POST", path, body)
+    
+    def validate_user(self, user: Optional[str] = None, device: Optional[str] = None) -> Dict[str, Any]:
+        """
+        ユーザー／グループキーとデバイス名を通知を送らずに検証（/1/users/validate.json）
+        
+        Returns:
+            APIのレスポンス（"devices" に有効なデバイス名、"group" はグループキーなら 1）
+        
+        Raises:
+            PushoverRequestError: キーまたはデバイス名が無効な場合（response の "user" や
+                "device" が "invalid"）、トークンが無効な場合
+            PushoverServerError / PushoverConnectionError: 一時的な失敗
+        """
+        data = {"token": self.token, "user": user or self.user}
+        if device:
+            data["device"] = device
+        body = urllib.parse.urlencode(data).encode("utf-8")
+        return self._api_request("POST", USER_VALIDATE_PATH, body)
+    
+    def send(
+        self,
+        message: str,
+        title: Optional[str] = None,
+        priority: int = 0,
+        url: Optional[str] = None,
+        url_title: Optional[str] = None,
+        device: Optional[str] = None,
+        sound: Optional[str] = None,
+        user: Optional[str] = None,
+        attachment: Optional[Union[str, Attachment]] = None,
+        retry_interval: Optional[int] = None,
+        expire: Optional[int] = None,
+        html: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Pushover通知を送信し、APIのレスポンス（JSON）を返す
+        
+        引数は send_notification と同じ。retry が設定されている場合は
+        一時的な失敗を再試行する（再試行でもプールの接続を再利用する）。
+        
+        Raises:
+            PushoverRequestError: トークン・ユーザーキーの誤りなど（再試行不可）
+            PushoverServerError / PushoverRateLimitError / PushoverConnectionError:
+                一時的な失敗（再試行を使い切った場合）
+            RateLimitExceeded: スケジューラが送信を見送った場合
+            AttachmentError: 添付ファイルを読めない、または大きすぎる場合
+        """
+        return self._send(message, title, priority, url, url_title, device, sound, user,
+                          attachment, retry_interval, expire, html)
+    
+    def _send(
+        self,
+        message: str,
+        title: Optional[str],
+        priority: int,
+        url: Optional[str],
+        url_title: Optional[str],
+        device: Optional[str],
+        sound: Optional[str],
+        user: Optional[str],
+        attachment: Optional[Union[str, Attachment]] = None,
+        retry_interval: Optional[int] = None,
+        expire: Optional[int] = None,
+        html: bool = False,
+        trace: Optional[List[Optional[PooledResponse]]] = None
+    ) -> Dict[str, Any]:
+        data = build_message_data(
+            self.token, user or self.user, message, title, priority, url, url_title, device, sound,
+            retry_interval, expire, html
+        )
+        body: Union[bytes, MultipartBody]
+        if attachment is None:
+            body = urllib.parse.urlencode(data).encode('utf-8')
+        else:
+            # サイズは送信前に確認し、上限を超える場合は接続せずにエラーにする
+            body = MultipartBody(data, prepare_attachment(
+                attachment, resizer=self.attachment_resizer
+            ))
+        
+        if self.retry is None:
+            return self._post_message(body, priority, trace)
+        return self.retry.call(lambda: self._post_message(body, priority, trace))
+    
+    def send_detailed(
+        self,
+        message: str,
+        title: Optional[str] = None,
+        priority: int = 0,
+        url: Optional[str] = None,
+        url_title: Optional[str] = None,
+        device: Optional[str] = None,
+        sound: Optional[str] = None,
+        user: Optional[str] = None,
+        attachment: Optional[Union[str, Attachment]] = None,
+        retry_interval: Optional[int] = None,
+        expire: Optional[int] = None,
+        html: bool = False
+    ) -> SendResult:
+        """
+        Pushover通知を送信し、所要時間やレスポンスの情報を含む結果を返す
+        
+        引数は send_notification と同じ。例外は送出せず、失敗も SendResult で返す。
+        """
+        trace: List[Optional[PooledResponse]] = []
+        request_id = receipt = None
+        try:
+            payload = self._send(
+                message, title, priority, url, url_title, device, sound, user, attachment,
+                retry_interval, expire, html, trace
+            )
+            success, response_message = True, "通知が正常に送信されました"
+            request_id = payload.get("request")
+            receipt = payload.get("receipt")
+        except RateLimitExceeded as e:
+            success, response_message = False, f"レート制限: {str(e)}"
+        except AttachmentError as e:
+            success, response_message = False, f"添付エラー: {str(e)}"
+        except PushoverAPIError as e:
+            success, response_message = False, f"送信エラー: {str(e)}"
+            request_id = e.request_id
+        except PushoverError as e:
+            success, response_message = False, f"接続エラー: {str(e)}"
+        
+        last = trace[-1] if trace else None
+        return SendResult(
+            success=success,
+            message=response_message,
+            status=last.status if last is not None else None,
+            request_id=request_id,
+            timing=last.timing if last is not None else None,
+            rate_limit=parse_limit_headers(last.headers if last is not None else None),
+            attempts=len(trace),
+            receipt=receipt,
+        )
     
     def send_notification(
         self,
@@ -28,7 +463,12 @@ class PushoverCLI:
         url: Optional[str] = None,
         url_title: Optional[str] = None,
         device: Optional[str] = None,
-        sound: Optional[str] = None
+        sound: Optional[str] = None,
+        user: Optional[str] = None,
+        attachment: Optional[Union[str, Attachment]] = None,
+        retry_interval: Optional[int] = None,
+        expire: Optional[int] = None,
+        html: bool = False
     ) -> Tuple[bool, str]:
         """
         Pushover通知を送信
@@ -41,76 +481,17 @@ class PushoverCLI:
             url_title: URLのタイトル（オプション）
             device: 送信先デバイス（オプション）
             sound: 通知音（オプション）
+            user: 送信先のユーザー／グループキー（省略時はインスタンスの user）
+            attachment: 添付する画像のパス、または Attachment（最大2.5MB）
+            retry_interval: 緊急の通知を確認されるまで再通知する間隔（秒、30以上）
+            expire: 緊急の通知の再通知を続ける秒数（最大10800）
+            html: メッセージを HTML（<b>, <i>, <u>, <font color>, <a>）として表示する
             
         Returns:
             (成功フラグ, レスポンスメッセージ)
         """
-        
-        # リクエストデータを構築
-        data = {
-            "token": self.token,
-            "user": self.user,
-            "message": message,
-            "priority": str(priority)
-        }
-        
-        # オプションパラメータを追加
-        if title:
-            data["title"] = title
-        if url:
-            data["url"] = url
-        if url_title:
-            data["url_title"] = url_title
-        if device:
-            data["device"] = device
-        if sound:
-            data["sound"] = sound
-        
-        try:
-            # HTTPS接続を確立
-            conn = http.client.HTTPSConnection(f"{self.API_HOST}:{self.API_PORT}")
-            
-            # POSTリクエストを送信
-            conn.request(
-                "POST",
-                self.API_PATH,
-                urllib.parse.urlencode(data),
-                {"Content-type": "application/x-www-form-urlencoded"}
-            )
-            
-            # レスポンスを取得
-            response = conn.getresponse()
-            response_data = response.read().decode('utf-8')
-            
-            # レスポンスをJSON解析
-            response_json = json.loads(response_data)
-            
-            if response.status == 200 and response_json.get("status") == 1:
-                return True, "通知が正常に送信されました"
-            else:
-                error_messages = response_json.get("errors", ["不明なエラー"])
-                return False, f"送信エラー: {', '.join(error_messages)}"
-                
-        except Exception as e:
-            return False, f"接続エラー: {str(e)}"
-        finally:
-            conn.close()
-
-
-def load_config_from_file(config_path: str) -> dict:
-    """設定ファイルから設定を読み込み"""
-    if not os.path.exists(config_path):
-        return {}
-    
-    try:
-        with open(config_path, 'r') as f:
-            config = {}
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        config[key.strip()] = value.strip()
-            return config
-    except Exception:
-        return {} 
\ No newline at end of file
+        result = self.send_detailed(
+            message, title, priority, url, url_title, device, sound, user, attachment,
+            retry_interval, expire, html
+        )
+        return result.success, result.message
@@ -0,0 +1,183 @@
+"""
+Pushover CLI 通知デーモンモジュール
+
+Unix ドメインソケットで通知を受け付け、常駐する PushoverCLI で非同期に配送する
+"""
+
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+from .batch import parse_batch_line
+from .core import PushoverCLI
+from .outbox import Outbox, OutboxWorker
+from .spool import default_socket_path, send_via_daemon
+
+
+class _SpoolHandler(socketserver.StreamRequestHandler):
+    """1行1通知の JSON を受け取りキューに登録するハンドラ"""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                kwargs = parse_batch_line(line.decode("utf-8"))
+                self.server.notification_daemon.enqueue(kwargs)
+                reply = "ok"
+            except queue.Full:
+                reply = "error キューが満杯です"
+            except (ValueError, TypeError, UnicodeDecodeError) as e:
+                # 検証に失敗した場合も応答する（無応答だとクライアントが直接送信に切り替える）
+                reply = f"error {e}"
+            self.wfile.write(reply.encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _SpoolServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class NotificationDaemon:
+    """通知を受け付けて非同期に配送する常駐プロセス
+
+    受け付けた通知はメモリ上のキューに入り、ワーカースレッドが共有の
+    PushoverCLI（keep-alive 接続プール）で順次配送する。
+    ``outbox`` を指定した場合はメモリ上のキューの代わりに永続アウトボックスに
+    記録し、デーモンが異常終了しても次回起動時に未送信分を再送する。
+    """
+
+    def __init__(
+        self,
+        client: PushoverCLI,
+        socket_path: Optional[str] = None,
+        workers: int = 2,
+        queue_size: int = 10000,
+        outbox: Optional[Outbox] = None
+    ):
+        self.client = client
+        self.socket_path = socket_path or default_socket_path()
+        self.workers = workers
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(queue_size)
+        self.outbox = outbox
+        self._sent = 0
+        self._failed = 0
+        self._server: Optional[_SpoolServer] = None
+        self._threads: List[threading.Thread] = []
+        self._outbox_workers: List[OutboxWorker] = []
+        self._lock = threading.Lock()
+
+    @property
+    def sent(self) -> int:
+        return self._sent + sum(worker.sent for worker in self._outbox_workers)
+
+    @property
+    def failed(self) -> int:
+        return self._failed + sum(worker.failed for worker in self._outbox_workers)
+
+    def enqueue(self, kwargs: Dict[str, Any]) -> None:
+        """通知をキューに登録（満杯の場合は queue.Full）"""
+        if self.outbox is not None:
+            self.outbox.enqueue(kwargs)
+        else:
+            self.queue.put_nowait(kwargs)
+
+    def _worker(self) -> None:
+        while True:
+            kwargs = self.queue.get()
+            try:
+                if kwargs is None:
+                    return
+                success, message = self.client.send_notification(**kwargs)
+                with self._lock:
+                    if success:
+                        self._sent += 1
+                    else:
+                        self._failed += 1
+                if not success:
+                    print(f"エラー: {message}: {kwargs.get('message')}", file=sys.stderr)
+            finally:
+                self.queue.task_done()
+
+    def _prepare_socket_path(self) -> None:
+        """古いソケットファイルを片付け、二重起動を防ぐ"""
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"デーモンは既に起動しています: {self.socket_path}")
+        finally:
+            probe.close()
+
+    def start(self) -> None:
+        """ソケットを開いてワーカーと受付スレッドを起動"""
+        self._prepare_socket_path()
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _SpoolServer(self.socket_path, _SpoolHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.notification_daemon = self
+
+        for _ in range(self.workers):
+            if self.outbox is not None:
+                worker = OutboxWorker(self.outbox, self.client)
+                worker.start()
+                self._outbox_workers.append(worker)
+                continue
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self) -> None:
+        """受付を止め、キューに残った通知を配送してから終了
+
+        アウトボックス使用時は処理中のバッチだけを終え、未送信分は次回起動時に再送する。
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        if self.outbox is not None:
+            for worker in self._outbox_workers:
+                worker.stop()
+            self.outbox.close()
+        else:
+            for _ in range(self.workers):
+                self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.client.close()
+
+    def serve_forever(self) -> None:
+        """SIGINT/SIGTERM を受けるまで動作"""
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        self.start()
+        try:
+            while not stop_event.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
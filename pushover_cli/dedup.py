@@ -0,0 +1,200 @@
+"""
+Pushover CLI 重複抑制モジュール
+
+同じ通知が TTL 内に繰り返し送信されるのを抑制する
+"""
+
+import collections
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .core import PushoverCLI, SendResult
+from .ratelimit import parse_limit_headers
+
+
+SUPPRESSED_MESSAGE = "重複のため送信を抑制しました"
+
+DEFAULT_DEDUP_PATH = "~/.cache/pushover-cli/dedup.sqlite3"
+
+
+def dedup_key(
+    user: str,
+    message: str,
+    title: Optional[str] = None,
+    priority: int = 0,
+    device: Optional[str] = None
+) -> str:
+    """(user, device, title, message, priority) のハッシュ"""
+    parts = (user, device or "", title or "", message, str(priority))
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class MemoryDedupStore:
+    """プロセス内の LRU キャッシュ（スレッドセーフ）"""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "collections.OrderedDict[str, float]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def check_and_set(self, key: str, ttl: float) -> bool:
+        """キーが有効期限内に登録済みなら True、そうでなければ登録して False"""
+        now = time.time()
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is not None and expires > now:
+                self._entries.move_to_end(key)
+                return True
+            self._entries[key] = now + ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return False
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteDedupStore:
+    """プロセス間で共有できる SQLite ファイルのストア
+
+    別々の CLI 起動の間でも重複を抑制するために使用する。
+    """
+
+    # この回数の登録ごとに期限切れの行を削除する
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str = DEFAULT_DEDUP_PATH):
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(
+            self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dedup (key TEXT PRIMARY KEY, expires REAL NOT NULL)"
+        )
+
+    def check_and_set(self, key: str, ttl: float) -> bool:
+        """キーが有効期限内に登録済みなら True、そうでなければ登録して False"""
+        now = time.time()
+        with self._lock:
+            # 同時に起動した別プロセスと競合しないよう書き込みロックを取ってから確認する
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT expires FROM dedup WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    return True
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO dedup (key, expires) VALUES (?, ?)", (key, now + ttl)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    self._conn.execute("DELETE FROM dedup WHERE expires <= ?", (now,))
+                return False
+            finally:
+                self._conn.execute("COMMIT")
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM dedup WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class DedupPushover:
+    """重複した通知を抑制する PushoverCLI のラッパー
+
+    (user, device, title, message, priority) が同じ通知を ``ttl`` 秒以内に
+    再送しようとすると、APIを呼ばずに (True, SUPPRESSED_MESSAGE) を返す。
+    送信に失敗した通知は記録から外すため、次回はそのまま再送される。
+    それ以外の属性は元のクライアントに委譲する。
+    """
+
+    def __init__(self, client: PushoverCLI, ttl: float = 300.0, store=None):
+        self.client = client
+        self.ttl = ttl
+        self.store = store if store is not None else MemoryDedupStore()
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _key(self, kwargs: Dict[str, Any]) -> str:
+        return dedup_key(
+            kwargs.get("user") or self.client.user,
+            kwargs["message"],
+            kwargs.get("title"),
+            kwargs.get("priority", 0),
+            kwargs.get("device"),
+        )
+
+    def _is_duplicate(self, key: str) -> bool:
+        if not self.store.check_and_set(key, self.ttl):
+            return False
+        with self._lock:
+            self.suppressed += 1
+        return True
+
+    def send(self, message: str, **kwargs: Any) -> Dict[str, Any]:
+        """PushoverCLI.send と同じ（抑制時は {"status": 1, "suppressed": True}）"""
+        kwargs["message"] = message
+        key = self._key(kwargs)
+        if self._is_duplicate(key):
+            return {"status": 1, "suppressed": True}
+        try:
+            return self.client.send(**kwargs)
+        except BaseException:
+            self.store.forget(key)
+            raise
+
+    def send_notification(self, message: str, **kwargs: Any) -> Tuple[bool, str]:
+        """PushoverCLI.send_notification と同じ（抑制時は (True, SUPPRESSED_MESSAGE)）"""
+        kwargs["message"] = message
+        key = self._key(kwargs)
+        if self._is_duplicate(key):
+            return True, SUPPRESSED_MESSAGE
+        success, response = self.client.send_notification(**kwargs)
+        if not success:
+            self.store.forget(key)
+        return success, response
+
+    def send_detailed(self, message: str, **kwargs: Any) -> SendResult:
+        """PushoverCLI.send_detailed と同じ（抑制時は attempts が 0 の成功）"""
+        kwargs["message"] = message
+        key = self._key(kwargs)
+        if self._is_duplicate(key):
+            return SendResult(True, SUPPRESSED_MESSAGE, None, None, None,
+                              parse_limit_headers(None), 0)
+        result = self.client.send_detailed(**kwargs)
+        if not result.success:
+            self.store.forget(key)
+        return result
+
+    def close(self) -> None:
+        self.store.close()
+        self.client.close()
+
+    def __enter__(self) -> "DedupPushover":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
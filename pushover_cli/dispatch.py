@@ -0,0 +1,431 @@
+"""
+Pushover CLI ディスパッチモジュール
+
+複数のスレッドから受け付けた通知を、優先度順の上限付きキューを通して配送スレッドで送信する
+"""
+
+import collections
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .core import PushoverCLI
+
+
+QUEUED_MESSAGE = "通知を送信キューに登録しました"
+
+# キューが満杯のときの動作
+BLOCK = "block"
+DROP_OLDEST = "drop-oldest"
+DROP_LOWEST_PRIORITY = "drop-lowest-priority"
+POLICIES = (BLOCK, DROP_OLDEST, DROP_LOWEST_PRIORITY)
+
+MIN_PRIORITY = -2
+MAX_PRIORITY = 2
+# この優先度以上の通知は高速レーンで送信する
+FAST_LANE_PRIORITY = 1
+
+# 送信結果を受け取る関数（send_notification の引数, 成功フラグ, レスポンスメッセージ）
+ResultCallback = Callable[[Dict[str, Any], bool, str], None]
+
+
+class QueueFull(Exception):
+    """キューが満杯で通知を登録できなかったことを示す例外"""
+
+
+def lane_of(kwargs: Dict[str, Any]) -> int:
+    """通知の優先度（-2〜2 に丸める。未指定は 0）
+
+    Raises:
+        ValueError: 優先度が整数として解釈できない場合
+    """
+    priority = kwargs.get("priority")
+    try:
+        priority = 0 if priority is None else int(priority)
+    except (TypeError, ValueError):
+        raise ValueError(f"priority は整数で指定してください: {priority!r}") from None
+    return min(MAX_PRIORITY, max(MIN_PRIORITY, priority))
+
+
+class DispatchQueue:
+    """優先度順の上限付き通知キュー（スレッドセーフ）
+
+    優先度ごとのレーン（FIFO）に分けて保持し、高い優先度のレーンから取り出す。
+    優先度が5段階しかないため、ヒープの代わりに各レーンの先頭だけを比べる。
+
+    - 優先度 1 と 2 は高速レーンとして常に先に取り出し、``maxsize`` も別枠で数える
+      （低い優先度の通知が溜まっていても登録を待たされない）
+    - 優先度 0 以下の通知は ``aging`` 秒待つごとに優先度を1つ上げて比べる
+      （0 まで。高い優先度の通知が続いても低い優先度の通知が取り残されない）
+    - 満杯のときは ``policy`` に従い、空きを待つ（block）、同じ枠で最も古い通知を捨てる
+      （drop-oldest）、同じ枠で最も優先度の低い通知を捨てる（drop-lowest-priority）
+    """
+
+    def __init__(self, maxsize: int = 1000, policy: str = BLOCK, aging: float = 30.0):
+        if policy not in POLICIES:
+            raise ValueError(f"不明なポリシー: {policy}（{', '.join(POLICIES)} のいずれか）")
+        if maxsize < 1:
+            raise ValueError("maxsize は1以上で指定してください")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.aging = aging
+        self.dropped = 0
+        # 優先度ごとの (登録時刻, 通知)
+        self._lanes: Dict[int, Deque[Tuple[float, Dict[str, Any]]]] = {
+            priority: collections.deque() for priority in range(MIN_PRIORITY, MAX_PRIORITY + 1)
+        }
+        self._fast_count = 0
+        self._count = 0
+        # 登録されたが送信が終わっていない件数
+        self._unfinished = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._fast_ready = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count
+
+    @property
+    def fast_pending(self) -> int:
+        """高速レーンで待っている通知の数"""
+        with self._lock:
+            return self._fast_count
+
+    @staticmethod
+    def _class_lanes(priority: int) -> range:
+        """同じ枠（高速レーンかそれ以外か）のレーンの優先度（低い順）"""
+        if priority >= FAST_LANE_PRIORITY:
+            return range(FAST_LANE_PRIORITY, MAX_PRIORITY + 1)
+        return range(MIN_PRIORITY, FAST_LANE_PRIORITY)
+
+    def _is_full(self, priority: int) -> bool:
+        if priority >= FAST_LANE_PRIORITY:
+            return self._fast_count >= self.maxsize
+        return self._count - self._fast_count >= self.maxsize
+
+    def _remove(self, priority: int) -> Dict[str, Any]:
+        _, kwargs = self._lanes[priority].popleft()
+        self._count -= 1
+        if priority >= FAST_LANE_PRIORITY:
+            self._fast_count -= 1
+        return kwargs
+
+    def _evict(self, priority: int) -> Optional[Dict[str, Any]]:
+        """満杯のときに同じ枠から1件捨てる（登録する通知の方を捨てる場合は None）"""
+        lanes = [p for p in self._class_lanes(priority) if self._lanes[p]]
+        if self.policy == DROP_OLDEST:
+            oldest = min(lanes, key=lambda p: self._lanes[p][0][0])
+            evicted = self._remove(oldest)
+        else:
+            # 優先度が同じなら古い方を捨てる
+            if lanes[0] > priority:
+                return None
+            evicted = self._remove(lanes[0])
+        self._unfinished -= 1
+        return evicted
+
+    def put(self, kwargs: Dict[str, Any], timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        通知を登録
+
+        Returns:
+            代わりに捨てた通知（捨てなかった場合は None）
+
+        Raises:
+            ValueError: 優先度が整数として解釈できない場合
+            QueueFull: block で timeout 内に空かない場合、または登録する通知の方が
+                優先度が低く捨てられた場合
+            RuntimeError: キューが閉じられている場合
+        """
+        priority = lane_of(kwargs)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("キューは既に閉じられています")
+            dropped = None
+            if self._is_full(priority):
+                if self.policy == BLOCK:
+                    while self._is_full(priority) and not self._closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise QueueFull("送信キューが満杯です")
+                        self._not_full.wait(remaining)
+                    if self._closed:
+                        raise RuntimeError("キューは既に閉じられています")
+                else:
+                    self.dropped += 1
+                    dropped = self._evict(priority)
+                    if dropped is None:
+                        raise QueueFull("送信キューが満杯のため優先度の低い通知を破棄しました")
+            self._lanes[priority].append((time.monotonic(), kwargs))
+            self._count += 1
+            self._unfinished += 1
+            if priority >= FAST_LANE_PRIORITY:
+                self._fast_count += 1
+                self._fast_ready.notify()
+            self._not_empty.notify()
+            return dropped
+
+    def _next_lane(self) -> Optional[int]:
+        """次に取り出すレーン（空なら None）"""
+        for priority in range(MAX_PRIORITY, FAST_LANE_PRIORITY - 1, -1):
+            if self._lanes[priority]:
+                return priority
+        best = None
+        best_key = None
+        now = time.monotonic()
+        for priority in range(FAST_LANE_PRIORITY - 1, MIN_PRIORITY - 1, -1):
+            lane = self._lanes[priority]
+            if not lane:
+                continue
+            enqueued = lane[0][0]
+            boost = int((now - enqueued) / self.aging) if self.aging > 0 else 0
+            # 待ち時間で上げた優先度が同じなら先に登録された方
+            key = (min(FAST_LANE_PRIORITY - 1, priority + boost), -enqueued)
+            if best_key is None or key > best_key:
+                best, best_key = priority, key
+        return best
+
+    def get(self, fast_only: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        最も優先する通知を1件取り出す（空なら待つ。閉じられて空になったら None）
+
+        Args:
+            fast_only: 高速レーン（優先度 1 と 2）の通知だけを取り出す
+        """
+        with self._lock:
+            if fast_only:
+                while not self._fast_count and not self._closed:
+                    self._fast_ready.wait()
+                if not self._fast_count:
+                    return None
+            else:
+                while not self._count and not self._closed:
+                    self._not_empty.wait()
+                if not self._count:
+                    return None
+            kwargs = self._remove(self._next_lane())
+            self._not_full.notify_all()
+            return kwargs
+
+    def clear(self) -> List[Dict[str, Any]]:
+        """送信を待っている通知をすべて取り除いて返す（終了を急ぐ場合用）"""
+        with self._lock:
+            removed = [kwargs for priority in sorted(self._lanes, reverse=True)
+                       for _, kwargs in self._lanes[priority]]
+            for lane in self._lanes.values():
+                lane.clear()
+            self._count = self._fast_count = 0
+            self._unfinished -= len(removed)
+            self._not_full.notify_all()
+            if self._unfinished <= 0:
+                self._all_done.notify_all()
+            return removed
+
+    def task_done(self) -> None:
+        """取り出した通知の送信が終わったことを記録"""
+        with self._lock:
+            self._unfinished -= 1
+            if self._unfinished <= 0:
+                self._all_done.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """登録したすべての通知の送信が終わるまで待つ（タイムアウトした場合は False）"""
+        with self._lock:
+            return self._all_done.wait_for(lambda: self._unfinished <= 0, timeout)
+
+    def close(self) -> None:
+        """新しい登録を受け付けなくする（登録済みの通知は取り出せる）"""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._fast_ready.notify_all()
+            self._not_full.notify_all()
+
+
+class QueuedPushover:
+    """複数のスレッドから共有できる非同期送信のクライアント
+
+    send_notification は通知をキューに登録してすぐに戻り、配送スレッド
+    （``workers`` 本）が共有の PushoverCLI（keep-alive 接続プール）で優先度順に送信する。
+    キューの上限と満杯時の動作は ``maxsize`` と ``policy`` で指定する。
+    それ以外の属性は元のクライアントに委譲する。
+
+    優先度 1 と 2 の通知は高速レーンに入り、専用の配送スレッド（``fast_workers`` 本）も
+    送信する。``preempt_priority`` 以上の通知はクライアントのスケジューラの送信ペースも
+    待たないため、低い優先度の通知が大量に溜まっていても、緊急通知の登録から送信までの
+    時間は送信1回分程度に収まる（スケジューラ自体の設定は変えない）。
+
+    使用例:
+        with QueuedPushover(PushoverCLI(token, user), policy="drop-oldest") as pushover:
+            pushover.send_notification("hello", priority=1)  # どのスレッドからでも呼べる
+        # with を抜けると未送信の通知を送信してから終了する
+    """
+
+    def __init__(
+        self,
+        client: PushoverCLI,
+        workers: int = 1,
+        maxsize: int = 1000,
+        policy: str = BLOCK,
+        block_timeout: Optional[float] = None,
+        on_result: Optional[ResultCallback] = None,
+        fast_workers: int = 1,
+        aging: float = 30.0,
+        preempt_priority: Optional[int] = FAST_LANE_PRIORITY
+    ):
+        """
+        Args:
+            client: 送信に使うクライアント
+            workers: 配送スレッドの数（client の pool_size 以下を推奨）
+            maxsize: キューに保持する通知の最大数
+            policy: キューが満杯のときの動作（block / drop-oldest / drop-lowest-priority）
+            block_timeout: block で空きを待つ最大秒数（None は無制限）
+            on_result: 送信結果を受け取る関数（配送スレッドで呼ばれる）
+            fast_workers: 高速レーン（優先度 1 と 2）専用の配送スレッドの数
+            aging: 優先度 0 以下の通知の優先度を1つ上げるまでの待ち時間（秒）
+            preempt_priority: この優先度以上の通知はクライアントのスケジューラの
+                送信ペースを待たずに送信する（None は追い越さない）
+        """
+        self.client = client
+        self.queue = DispatchQueue(maxsize, policy, aging)
+        self.preempt_priority = preempt_priority
+        self.block_timeout = block_timeout
+        self.on_result = on_result
+        self.sent = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"pushover-dispatch-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ] + [
+            threading.Thread(target=self._run, args=(True,), name=f"pushover-dispatch-fast-{i}",
+                             daemon=True)
+            for i in range(fast_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    @property
+    def dropped(self) -> int:
+        """キューが満杯のため破棄した通知の数"""
+        return self.queue.dropped
+
+    @property
+    def pending(self) -> int:
+        """キューで送信を待っている通知の数"""
+        return len(self.queue)
+
+    def _enqueue(self, kwargs: Dict[str, Any]) -> None:
+        dropped = self.queue.put(kwargs, self.block_timeout)
+        if dropped is not None and self.on_result is not None:
+            self.on_result(dropped, False, "キューエラー: 送信キューが満杯のため破棄しました")
+
+    def send_notification(self, message: str, **kwargs: Any) -> Tuple[bool, str]:
+        """PushoverCLI.send_notification と同じ引数で通知をキューに登録
+
+        Returns:
+            登録できれば (True, QUEUED_MESSAGE)、優先度が不正、キューが満杯などで
+            登録できなければ False
+        """
+        kwargs["message"] = message
+        try:
+            self._enqueue(kwargs)
+        except ValueError as e:
+            return False, f"入力エラー: {str(e)}"
+        except (QueueFull, RuntimeError) as e:
+            return False, f"キューエラー: {str(e)}"
+        return True, QUEUED_MESSAGE
+
+    def send(self, message: str, **kwargs: Any) -> Dict[str, Any]:
+        """PushoverCLI.send と同じ引数で通知をキューに登録（{"status": 1, "queued": True}）
+
+        Raises:
+            ValueError: 優先度が整数として解釈できない場合
+            QueueFull: キューが満杯で登録できなかった場合
+        """
+        kwargs["message"] = message
+        try:
+            self._enqueue(kwargs)
+        except (QueueFull, RuntimeError) as e:
+            raise QueueFull(f"キューエラー: {str(e)}") from None
+        return {"status": 1, "queued": True}
+
+    def _send(self, kwargs: Dict[str, Any]) -> Tuple[bool, str]:
+        scheduler = getattr(self.client, "scheduler", None)
+        if (scheduler is not None and self.preempt_priority is not None
+                and lane_of(kwargs) >= self.preempt_priority):
+            # 共有のスケジューラの設定は変えず、この送信だけ送信ペースの待ちを追い越す
+            with scheduler.preempting():
+                return self.client.send_notification(**kwargs)
+        return self.client.send_notification(**kwargs)
+
+    def _deliver(self, kwargs: Dict[str, Any]) -> None:
+        try:
+            success, response = self._send(kwargs)
+        except Exception as e:
+            # 配送スレッドを止めない（添付ファイルの引数の誤りなど）
+            success, response = False, f"送信エラー: {str(e)}"
+        with self._lock:
+            if success:
+                self.sent += 1
+            else:
+                self.failed += 1
+                self.last_error = response
+        if self.on_result is not None:
+            try:
+                self.on_result(kwargs, success, response)
+            except Exception:
+                pass
+
+    def _run(self, fast_only: bool = False) -> None:
+        while True:
+            kwargs = self.queue.get(fast_only)
+            if kwargs is None:
+                return
+            try:
+                self._deliver(kwargs)
+            finally:
+                self.queue.task_done()
+
+    def discard_pending(self) -> int:
+        """送信を待っている通知をすべて破棄し、その件数を返す"""
+        return len(self.queue.clear())
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """キューに登録済みの通知がすべて送信されるまで待つ（タイムアウトした場合は False）"""
+        return self.queue.join(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        新しい通知の受け付けを止め、登録済みの通知を送信してから元のクライアントを閉じる
+
+        Returns:
+            timeout 内にすべて送信できた場合は True
+        """
+        with self._lock:
+            if self._closed:
+                return True
+            self._closed = True
+        self.queue.close()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        finished = not any(thread.is_alive() for thread in self._threads)
+        self.client.close()
+        return finished
+
+    def __enter__(self) -> "QueuedPushover":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,60 @@
+"""
+Pushover CLI 例外モジュール
+
+送信失敗を再試行すべきもの（一時的）とそうでないもの（恒久的）に分類する
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+class PushoverError(Exception):
+    """Pushover への送信失敗の基底クラス"""
+
+    #: 再試行で成功する見込みがあるかどうか
+    retryable = False
+
+
+class PushoverConnectionError(PushoverError):
+    """接続・タイムアウトなどの通信エラー（一時的）"""
+
+    retryable = True
+
+
+class PushoverAPIError(PushoverError):
+    """APIがエラーレスポンスを返した"""
+
+    def __init__(
+        self,
+        status: int,
+        errors: List[str],
+        response: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(", ".join(errors))
+        self.status = status
+        self.errors = errors
+        self.response = response or {}
+
+    @property
+    def request_id(self) -> Optional[str]:
+        return self.response.get("request")
+
+
+class PushoverRequestError(PushoverAPIError):
+    """トークンやユーザーキーの誤りなど、リクエスト自体が不正（4xx・恒久的）"""
+
+
+class PushoverServerError(PushoverAPIError):
+    """APIサーバー側の障害（5xx・一時的）"""
+
+    retryable = True
+
+
+class PushoverRateLimitError(PushoverAPIError):
+    """送信枠の超過（HTTP 429・一時的）"""
+
+    retryable = True
+
+    def __init__(self, *args, retry_after: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        #: 再送までに待つべき秒数
+        self.retry_after = retry_after
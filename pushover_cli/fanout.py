@@ -0,0 +1,91 @@
+"""
+Pushover CLI 複数宛先送信モジュール
+
+1つの通知を複数のユーザー／グループキーへ並行して配送する
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from .core import PushoverCLI
+
+
+class FanoutResult(NamedTuple):
+    """1宛先分の送信結果"""
+
+    user: str
+    success: bool
+    message: str
+
+
+class FanoutReport:
+    """宛先ごとの送信結果の集計"""
+
+    def __init__(self, results: List[FanoutResult]):
+        self.results = results
+
+    @property
+    def succeeded(self) -> List[FanoutResult]:
+        return [result for result in self.results if result.success]
+
+    @property
+    def failed(self) -> List[FanoutResult]:
+        return [result for result in self.results if not result.success]
+
+    @property
+    def all_succeeded(self) -> bool:
+        return all(result.success for result in self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+
+def parse_recipients(value: str) -> List[str]:
+    """カンマまたは空白区切りのキー一覧を分割"""
+    return [key for key in value.replace(",", " ").split() if key]
+
+
+def send_to_many(
+    client: PushoverCLI,
+    users: Iterable[str],
+    message: str,
+    concurrency: int = 8,
+    **kwargs: Any
+) -> FanoutReport:
+    """
+    1つの通知を複数の宛先へ並行送信
+
+    宛先ごとに個別のリクエストを送るため、一部の宛先が失敗しても
+    他の宛先には配送され、失敗した宛先だけを結果から判別できる。
+
+    Args:
+        client: 送信に使用するクライアント（接続プールを共有）
+        users: ユーザー／グループキー（重複は1回にまとめる）
+        message: 送信するメッセージ
+        concurrency: 同時送信数（client の pool_size 以下を推奨）
+        **kwargs: send_notification のその他の引数
+
+    Returns:
+        入力順の宛先ごとの結果
+    """
+    recipients = list(dict.fromkeys(users))
+
+    def send_one(user: str) -> FanoutResult:
+        success, response = client.send_notification(message, user=user, **kwargs)
+        return FanoutResult(user, success, response)
+
+    if not recipients:
+        return FanoutReport([])
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(recipients))) as executor:
+        return FanoutReport(list(executor.map(send_one, recipients)))
+
+
+def load_group(config: Dict[str, str], name: str) -> Optional[List[str]]:
+    """設定ファイルの PUSHOVER_GROUP_<NAME> から宛先一覧を取得"""
+    value = config.get(f"PUSHOVER_GROUP_{name.upper()}")
+    if value is None:
+        return None
+    return parse_recipients(value)
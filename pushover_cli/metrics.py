@@ -0,0 +1,219 @@
+"""
+Pushover CLI メトリクスモジュール
+
+リクエストごとの計測値を集計し、Prometheus のテキスト形式または JSON で出力する
+"""
+
+import bisect
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .pool import RequestTiming
+
+
+# レイテンシのヒストグラムの上限値（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 接続エラーなどで HTTP ステータスがない場合の status ラベル
+NO_STATUS = "error"
+
+# フェーズ別ヒストグラムに記録する RequestTiming の項目
+TIMING_PHASES = ("connect", "tls", "write", "ttfb")
+
+
+class Histogram:
+    """累積バケットのヒストグラム（ロックは MetricsRegistry が持つ）"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # 最後の要素は +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le ラベル, 累積件数) のリスト"""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+
+class MetricsRegistry:
+    """送信のメトリクス（スレッドセーフ）
+
+    - pushover_requests_total{status, priority}: HTTP リクエスト数（再試行を含む）
+    - pushover_request_duration_seconds{status, priority}: リクエスト全体の所要時間
+    - pushover_request_phase_seconds{phase}: 接続・TLS・書き込み・最初の応答までの時間
+    - pushover_connections_total{reused}: 新規接続と再利用の件数
+
+    使用例:
+        metrics = MetricsRegistry()
+        client = PushoverCLI(token, user, metrics=metrics)
+        ...
+        print(metrics.to_prometheus())
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._requests: Dict[Tuple[str, str], int] = {}
+        self._durations: Dict[Tuple[str, str], Histogram] = {}
+        self._phases: Dict[str, Histogram] = {}
+        self._connections = {"true": 0, "false": 0}
+        self._lock = threading.Lock()
+
+    def observe(
+        self,
+        status: Optional[int],
+        priority: int,
+        timing: Optional[RequestTiming]
+    ) -> None:
+        """1回分のリクエストを記録（status が None は接続エラー）"""
+        key = (NO_STATUS if status is None else str(status), str(priority))
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if timing is None:
+                return
+            histogram = self._durations.get(key)
+            if histogram is None:
+                histogram = self._durations[key] = Histogram(self.buckets)
+            histogram.observe(timing.total)
+            self._connections["true" if timing.reused else "false"] += 1
+            for phase in TIMING_PHASES:
+                # 再利用した接続では接続と TLS の時間は発生しない
+                if timing.reused and phase in ("connect", "tls"):
+                    continue
+                phase_histogram = self._phases.get(phase)
+                if phase_histogram is None:
+                    phase_histogram = self._phases[phase] = Histogram(self.buckets)
+                phase_histogram.observe(getattr(timing, phase))
+
+    def requests(self, status: Optional[int] = None, priority: Optional[int] = None) -> int:
+        """条件に一致するリクエスト数の合計"""
+        with self._lock:
+            return sum(
+                count for (s, p), count in self._requests.items()
+                if (status is None or s == str(status))
+                and (priority is None or p == str(priority))
+            )
+
+    def to_prometheus(self) -> str:
+        """Prometheus のテキスト形式（exposition format 0.0.4）"""
+        lines = []
+        with self._lock:
+            lines.append("# HELP pushover_requests_total Pushover API requests (including retries).")
+            lines.append("# TYPE pushover_requests_total counter")
+            for (status, priority), count in sorted(self._requests.items()):
+                lines.append(
+                    f'pushover_requests_total{{status="{status}",priority="{priority}"}} {count}'
+                )
+
+            lines.append("# HELP pushover_request_duration_seconds Pushover API request latency.")
+            lines.append("# TYPE pushover_request_duration_seconds histogram")
+            for (status, priority), histogram in sorted(self._durations.items()):
+                labels = f'status="{status}",priority="{priority}"'
+                lines.extend(_histogram_lines("pushover_request_duration_seconds", labels, histogram))
+
+            lines.append("# HELP pushover_request_phase_seconds Time spent in each request phase.")
+            lines.append("# TYPE pushover_request_phase_seconds histogram")
+            for phase, histogram in sorted(self._phases.items()):
+                lines.extend(_histogram_lines("pushover_request_phase_seconds",
+                                              f'phase="{phase}"', histogram))
+
+            lines.append("# HELP pushover_connections_total Requests by connection reuse.")
+            lines.append("# TYPE pushover_connections_total counter")
+            for reused, count in sorted(self._connections.items()):
+                lines.append(f'pushover_connections_total{{reused="{reused}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, list]:
+        """JSON に変換できる辞書"""
+        with self._lock:
+            return {
+                "requests": [
+                    {"status": status, "priority": int(priority), "count": count}
+                    for (status, priority), count in sorted(self._requests.items())
+                ],
+                "durations": [
+                    dict(status=status, priority=int(priority), **_histogram_dict(histogram))
+                    for (status, priority), histogram in sorted(self._durations.items())
+                ],
+                "phases": [
+                    dict(phase=phase, **_histogram_dict(histogram))
+                    for phase, histogram in sorted(self._phases.items())
+                ],
+                "connections": [
+                    {"reused": reused == "true", "count": count}
+                    for reused, count in sorted(self._connections.items())
+                ],
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    def write_prometheus(self, path: str) -> None:
+        """Prometheus のテキスト形式でファイルに書き出す（node_exporter の textfile 用）
+
+        読み込み途中のファイルを見せないよう、一時ファイルに書いてから置き換える。
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+class MetricsFileWriter:
+    """一定間隔でメトリクスを Prometheus のテキスト形式でファイルに書き出すスレッド"""
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float = 15.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.registry.write_prometheus(self.path)
+            except OSError:
+                # 書き出せない間も送信は続ける（次の間隔で再試行）
+                pass
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="pushover-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """スレッドを止め、最後の値を書き出す"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.registry.write_prometheus(self.path)
+
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    lines = [
+        f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+        for bound, count in histogram.cumulative()
+    ]
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum!r}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def _histogram_dict(histogram: Histogram) -> Dict[str, object]:
+    return {
+        "count": histogram.count,
+        "sum": histogram.sum,
+        "buckets": [{"le": bound, "count": count} for bound, count in histogram.cumulative()],
+    }
@@ -0,0 +1,254 @@
+"""
+Pushover CLI システム監視モジュール
+
+ディスク・メモリ・負荷を外部コマンドを使わずに取得し、閾値を超えたときに通知する
+"""
+
+import os
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .core import PushoverCLI
+
+
+# 状態のレベル
+OK = 0
+WARNING = 1
+CRITICAL = 2
+
+# レベルが上がったときの通知の優先度（下がったときは -1）
+LEVEL_PRIORITIES = {WARNING: 1, CRITICAL: 2}
+RECOVERY_PRIORITY = -1
+
+
+class SystemSampler:
+    """/proc と statvfs からシステムの状態を読み込む
+
+    /proc のファイルは開いたまま保持し、pread で先頭から読み直す
+    （サンプリングのたびにファイルを開いたりプロセスを起動したりしない）。
+    """
+
+    def __init__(self, proc: str = "/proc"):
+        """
+        Raises:
+            OSError: /proc/meminfo や /proc/loadavg を開けない場合（Linux 以外など）
+        """
+        self._meminfo = os.open(os.path.join(proc, "meminfo"), os.O_RDONLY)
+        try:
+            self._loadavg = os.open(os.path.join(proc, "loadavg"), os.O_RDONLY)
+        except OSError:
+            os.close(self._meminfo)
+            raise
+        self.cpu_count = os.cpu_count() or 1
+
+    def meminfo(self) -> Dict[str, int]:
+        """/proc/meminfo の値（kB）"""
+        values = {}
+        for line in os.pread(self._meminfo, 16384, 0).split(b"\n"):
+            name, _, rest = line.partition(b":")
+            fields = rest.split()
+            if fields:
+                values[name.decode("ascii")] = int(fields[0])
+        return values
+
+    def memory_percent(self) -> float:
+        """使用中のメモリの割合（MemAvailable を空きとみなす）"""
+        info = self.meminfo()
+        total = info.get("MemTotal", 0)
+        if not total:
+            return 0.0
+        available = info.get("MemAvailable", info.get("MemFree", 0))
+        return (total - available) * 100.0 / total
+
+    def loadavg(self) -> Tuple[float, float, float]:
+        """1分・5分・15分の平均負荷"""
+        fields = os.pread(self._loadavg, 256, 0).split()
+        return float(fields[0]), float(fields[1]), float(fields[2])
+
+    def load_percent(self) -> float:
+        """1分間の平均負荷の CPU 数に対する割合"""
+        return self.loadavg()[0] * 100.0 / self.cpu_count
+
+    @staticmethod
+    def disk_percent(path: str) -> float:
+        """ファイルシステムの使用率（df の Use% と同じ計算）"""
+        st = os.statvfs(path)
+        used = st.f_blocks - st.f_bfree
+        usable = used + st.f_bavail
+        return used * 100.0 / usable if usable else 0.0
+
+    def close(self) -> None:
+        os.close(self._meminfo)
+        os.close(self._loadavg)
+
+
+class Check(NamedTuple):
+    """閾値で監視する項目"""
+
+    name: str
+    # 通知に表示する名前（例: "ディスク使用量 (/)"）
+    label: str
+    # 現在値（%）を返す関数
+    read: Callable[[], float]
+    warning: Optional[float]
+    critical: Optional[float] = None
+    # レベルを下げるには閾値をこの値だけ下回る必要がある（閾値付近でのばたつき防止）
+    hysteresis: float = 5.0
+
+
+def threshold_level(check: Check, value: float) -> int:
+    """値が超えている閾値のレベル"""
+    if check.critical is not None and value >= check.critical:
+        return CRITICAL
+    if check.warning is not None and value >= check.warning:
+        return WARNING
+    return OK
+
+
+def next_level(check: Check, value: float, current: int) -> int:
+    """ヒステリシスを考慮した次のレベル
+
+    上がる方向はすぐに変わり、下がる方向は値が閾値を hysteresis 以上下回った場合のみ変わる。
+    """
+    level = threshold_level(check, value)
+    if level >= current:
+        return level
+    return max(level, min(current, threshold_level(check, value + check.hysteresis)))
+
+
+class Transition(NamedTuple):
+    """レベルの変化"""
+
+    check: Check
+    value: float
+    previous: int
+    level: int
+
+
+def build_alert(transition: Transition) -> Dict[str, object]:
+    """レベルの変化を send_notification の引数に変換"""
+    check, value = transition.check, transition.value
+    if transition.level > transition.previous:
+        if transition.level == CRITICAL:
+            return {
+                "title": f"{check.label}緊急",
+                "message": f"{check.label}が{value:.0f}%に達しました！緊急対応が必要です",
+                "priority": LEVEL_PRIORITIES[CRITICAL],
+            }
+        return {
+            "title": f"{check.label}警告",
+            "message": f"{check.label}が{value:.0f}%に達しました",
+            "priority": LEVEL_PRIORITIES[WARNING],
+        }
+    state = "警告レベル" if transition.level == WARNING else "正常"
+    return {
+        "title": f"{check.label}回復",
+        "message": f"{check.label}が{value:.0f}%に下がりました（{state}）",
+        "priority": RECOVERY_PRIORITY,
+    }
+
+
+class SystemMonitor:
+    """監視項目を定期的にサンプリングし、レベルが変わったときに通知する
+
+    レベルはサンプリングの間で保持し、同じ状態が続く間は再通知しない
+    （送信に失敗した変化は保持せず、次のサンプリングで改めて通知する）。
+    送信には1つのクライアント（keep-alive 接続）を使い続ける。
+    """
+
+    def __init__(
+        self,
+        client: PushoverCLI,
+        checks: List[Check],
+        notify_recovery: bool = True,
+        **send_kwargs: object
+    ):
+        """
+        Args:
+            client: 送信に使うクライアント
+            checks: 監視項目
+            notify_recovery: レベルが下がったときも通知する
+            **send_kwargs: send_notification のその他の引数（device, sound など）
+        """
+        self.client = client
+        self.checks = checks
+        self.notify_recovery = notify_recovery
+        self.send_kwargs = send_kwargs
+        self.levels: Dict[str, int] = {check.name: OK for check in checks}
+        self.samples = 0
+        self.sent = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    def sample(self) -> List[Transition]:
+        """全項目を1回サンプリングし、レベルが変わったものを返す"""
+        self.samples += 1
+        transitions = []
+        for check in self.checks:
+            try:
+                value = check.read()
+            except OSError as e:
+                # マウントが外れた場合など。次のサンプリングで再試行する
+                self.last_error = f"{check.label}: {e}"
+                continue
+            previous = self.levels[check.name]
+            level = next_level(check, value, previous)
+            if level != previous:
+                self.levels[check.name] = level
+                transitions.append(Transition(check, value, previous, level))
+        return transitions
+
+    def run_once(self) -> int:
+        """サンプリングして必要な通知を送信し、送信した件数を返す"""
+        sent = 0
+        for transition in self.sample():
+            if transition.level < transition.previous and not self.notify_recovery:
+                continue
+            kwargs = dict(self.send_kwargs)
+            kwargs.update(build_alert(transition))
+            success, response = self.client.send_notification(**kwargs)
+            if success:
+                self.sent += 1
+                sent += 1
+            else:
+                self.failed += 1
+                self.last_error = response
+                # 通知できなかった変化は確定させず、次のサンプリングで再送する
+                self.levels[transition.check.name] = transition.previous
+        return sent
+
+    def run(self, interval: float = 5.0, stop: Optional[threading.Event] = None) -> None:
+        """stop がセットされるまで interval 秒ごとに run_once を繰り返す"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.run_once()
+            stop.wait(interval)
+
+
+def default_checks(
+    sampler: SystemSampler,
+    disk_paths: List[str],
+    disk_warning: Optional[float] = 90.0,
+    disk_critical: Optional[float] = 95.0,
+    memory_warning: Optional[float] = 90.0,
+    memory_critical: Optional[float] = None,
+    load_warning: Optional[float] = 80.0,
+    load_critical: Optional[float] = None,
+    hysteresis: float = 5.0
+) -> List[Check]:
+    """ディスク・メモリ・負荷の監視項目（None の閾値は使わない。両方 None の項目は監視しない）"""
+    checks = []
+    if disk_warning is not None or disk_critical is not None:
+        for path in disk_paths:
+            checks.append(Check(
+                f"disk:{path}", f"ディスク使用量 ({path})",
+                lambda path=path: sampler.disk_percent(path),
+                disk_warning, disk_critical, hysteresis
+            ))
+    if memory_warning is not None or memory_critical is not None:
+        checks.append(Check("memory", "メモリ使用量", sampler.memory_percent,
+                            memory_warning, memory_critical, hysteresis))
+    if load_warning is not None or load_critical is not None:
+        checks.append(Check("load", "CPU負荷", sampler.load_percent,
+                            load_warning, load_critical, hysteresis))
+    return checks
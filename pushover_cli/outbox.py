@@ -0,0 +1,484 @@
+"""
+Pushover CLI 永続アウトボックスモジュール
+
+送信待ちの通知を追記専用のセグメントログに記録し、クラッシュ後に再送する
+"""
+
+import collections
+import heapq
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .core import PushoverCLI
+from .errors import PushoverError
+
+
+# レコードヘッダ: ペイロード長, CRC32, レコード種別
+_HEADER = struct.Struct("<IIB")
+# ENQレコードのペイロード先頭: メッセージID, 登録時刻（UNIX時間）
+_ENQ_PREFIX = struct.Struct("<Qd")
+# ACKレコードのペイロード: メッセージID
+_ACK = struct.Struct("<Q")
+
+RECORD_ENQUEUE = 1
+RECORD_ACK = 2
+
+SEGMENT_SUFFIX = ".log"
+
+
+class _Entry:
+    """送信待ちのメッセージ"""
+
+    __slots__ = ("message_id", "created", "kwargs", "segment", "attempts", "in_flight")
+
+    def __init__(self, message_id: int, created: float, kwargs: Dict[str, Any], segment: int):
+        self.message_id = message_id
+        self.created = created
+        self.kwargs = kwargs
+        self.segment = segment
+        self.attempts = 0
+        self.in_flight = False
+
+
+def _encode_record(record_type: int, payload: bytes) -> bytes:
+    return _HEADER.pack(len(payload), zlib.crc32(payload), record_type) + payload
+
+
+class Outbox:
+    """クラッシュ耐性のある送信待ちキュー
+
+    すべての登録（ENQ）と送信完了（ACK）は現在のセグメントファイルに追記される。
+    書き込みは登録ごとに OS へ渡すためプロセスが異常終了しても失われず、
+    fsync はバックグラウンドスレッドが ``sync_interval`` 秒ごとにまとめて行う。
+    起動時にはセグメントを先頭から再生して未完了のメッセージを復元する。
+
+    古いセグメントはすべてのメッセージが ACK されると先頭から順に削除され、
+    未完了のメッセージがわずかに残っているだけのセグメントは
+    現在のセグメントに書き直して（コンパクション）削除する。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 4 * 1024 * 1024,
+        sync_interval: float = 0.05,
+        compact_ratio: float = 0.5
+    ):
+        """
+        Args:
+            directory: セグメントファイルを置くディレクトリ
+            segment_size: セグメントを切り替えるサイズ（バイト）
+            sync_interval: fsync をまとめて行う間隔（秒）
+            compact_ratio: 古いセグメントの未完了率がこれを下回るとコンパクションする
+        """
+        self.directory = os.path.expanduser(directory)
+        self.segment_size = segment_size
+        self.sync_interval = sync_interval
+        self.compact_ratio = compact_ratio
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._synced = threading.Condition(self._lock)
+
+        self._pending: "collections.OrderedDict[int, _Entry]" = collections.OrderedDict()
+        self._ready: Deque[int] = collections.deque()
+        self._delayed: List[Tuple[float, int]] = []
+        # セグメント番号 -> [ENQレコード数, 未完了数]
+        self._segments: "collections.OrderedDict[int, List[int]]" = collections.OrderedDict()
+        self._next_id = 1
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._fd = -1
+        self._segment = 0
+        self._segment_bytes = 0
+        self._closed = False
+        self._compacting = False
+        self._wakeup = threading.Event()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._replay()
+        self._open_segment(max(self._segments, default=0) + 1)
+
+        self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self._sync_thread.start()
+
+    # ---- 再生 ----
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:010d}{SEGMENT_SUFFIX}")
+
+    def _replay(self) -> None:
+        """既存のセグメントを再生して未完了のメッセージを復元"""
+        segments = sorted(
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+        )
+        for segment in segments:
+            counts = self._segments.setdefault(segment, [0, 0])
+            path = self._segment_path(segment)
+            with open(path, "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                length, crc, record_type = _HEADER.unpack_from(data, offset)
+                start = offset + _HEADER.size
+                payload = data[start:start + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                offset = start + length
+                if record_type == RECORD_ENQUEUE:
+                    message_id, created = _ENQ_PREFIX.unpack_from(payload)
+                    kwargs = json.loads(payload[_ENQ_PREFIX.size:].decode("utf-8"))
+                    previous = self._pending.get(message_id)
+                    if previous is not None:
+                        # コンパクション途中のクラッシュで重複したレコード
+                        self._segments[previous.segment][1] -= 1
+                    self._pending[message_id] = _Entry(message_id, created, kwargs, segment)
+                    counts[0] += 1
+                    counts[1] += 1
+                    self._next_id = max(self._next_id, message_id + 1)
+                elif record_type == RECORD_ACK:
+                    (message_id,) = _ACK.unpack(payload)
+                    entry = self._pending.pop(message_id, None)
+                    if entry is not None:
+                        self._segments[entry.segment][1] -= 1
+            if offset < len(data):
+                # 書き込み途中で中断された末尾のレコードを切り捨てる
+                print(f"警告: {path} の破損したレコード以降を破棄しました", file=sys.stderr)
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+        # ID順（登録順）に並べ直して送信待ちにする
+        self._pending = collections.OrderedDict(sorted(self._pending.items()))
+        self._ready.extend(self._pending)
+        self._drop_finished_segments()
+
+    # ---- 書き込み ----
+
+    def _open_segment(self, segment: int) -> None:
+        self._fd = os.open(
+            self._segment_path(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600
+        )
+        self._segment = segment
+        self._segment_bytes = os.fstat(self._fd).st_size
+        self._segments.setdefault(segment, [0, 0])
+
+    def _append(self, record: bytes) -> None:
+        """レコードを現在のセグメントに追記（ロック取得済みで呼び出す）"""
+        if self._segment_bytes + len(record) > self.segment_size and self._segment_bytes:
+            self._roll()
+        os.write(self._fd, record)
+        self._segment_bytes += len(record)
+        self._written_seq += 1
+
+    def _write_enqueue(self, entry: _Entry) -> None:
+        payload = _ENQ_PREFIX.pack(entry.message_id, entry.created) + json.dumps(
+            entry.kwargs, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        self._append(_encode_record(RECORD_ENQUEUE, payload))
+        entry.segment = self._segment
+        counts = self._segments[self._segment]
+        counts[0] += 1
+        counts[1] += 1
+
+    def _roll(self) -> None:
+        """現在のセグメントを確定して次のセグメントに切り替える"""
+        os.fsync(self._fd)
+        os.close(self._fd)
+        self._synced_seq = self._written_seq
+        self._synced.notify_all()
+        self._open_segment(self._segment + 1)
+        self._drop_finished_segments()
+        if not self._compacting:
+            self._maybe_compact()
+
+    def _drop_finished_segments(self) -> None:
+        """先頭から、すべて ACK 済みのセグメントを削除
+
+        後続のセグメントにある ACK が参照する ENQ を残さないよう、
+        削除は必ず古い順に行う。
+        """
+        while self._segments:
+            segment, (_, live) = next(iter(self._segments.items()))
+            if live > 0 or segment == self._segment:
+                break
+            del self._segments[segment]
+            try:
+                os.unlink(self._segment_path(segment))
+            except FileNotFoundError:
+                pass
+
+    def _maybe_compact(self) -> None:
+        closed = [counts for segment, counts in self._segments.items() if segment != self._segment]
+        total = sum(counts[0] for counts in closed)
+        live = sum(counts[1] for counts in closed)
+        if total and live / total < self.compact_ratio:
+            self._compact()
+
+    def _compact(self) -> None:
+        """古いセグメントの未完了メッセージを現在のセグメントに書き直して削除"""
+        self._compacting = True
+        try:
+            for entry in list(self._pending.values()):
+                if entry.segment != self._segment:
+                    self._segments[entry.segment][1] -= 1
+                    self._write_enqueue(entry)
+        finally:
+            self._compacting = False
+        # 書き直した内容を永続化してから古いセグメントを消す
+        os.fsync(self._fd)
+        self._synced_seq = self._written_seq
+        self._synced.notify_all()
+        self._drop_finished_segments()
+
+    def compact(self) -> None:
+        """コンパクションを実行"""
+        with self._lock:
+            self._compact()
+
+    # ---- fsync ----
+
+    def _sync_loop(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.sync_interval)
+            self._wakeup.clear()
+            self._sync_once()
+
+    def _sync_once(self) -> None:
+        with self._lock:
+            if self._closed or self._synced_seq == self._written_seq:
+                return
+            seq = self._written_seq
+            # fsync 中もロックを握らないよう、複製したディスクリプタで同期する
+            fd = os.dup(self._fd)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        with self._lock:
+            if seq > self._synced_seq:
+                self._synced_seq = seq
+                self._synced.notify_all()
+
+    def sync(self) -> None:
+        """書き込み済みのレコードをすぐにディスクへ同期"""
+        self._sync_once()
+
+    # ---- キュー操作 ----
+
+    def enqueue(self, kwargs: Dict[str, Any], durable: bool = False) -> int:
+        """
+        送信待ちのメッセージを登録
+
+        Args:
+            kwargs: send_notification の引数
+            durable: True の場合は fsync の完了まで待つ
+
+        Returns:
+            メッセージID
+        """
+        with self._lock:
+            if self._closed:
+                raise ValueError("アウトボックスは閉じられています")
+            entry = _Entry(self._next_id, time.time(), kwargs, self._segment)
+            self._next_id += 1
+            self._write_enqueue(entry)
+            self._pending[entry.message_id] = entry
+            self._ready.append(entry.message_id)
+            self._available.notify()
+            if durable:
+                seq = self._written_seq
+                self._wakeup.set()
+                while self._synced_seq < seq:
+                    self._synced.wait()
+            return entry.message_id
+
+    def take(self, limit: int = 32, timeout: Optional[float] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        送信可能なメッセージを取り出して送信中にする
+
+        Args:
+            limit: 取り出す最大件数
+            timeout: 送信可能なメッセージがない場合に待つ秒数（None は無期限）
+
+        Returns:
+            (メッセージID, send_notification の引数) のリスト
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = time.time()
+                while self._delayed and self._delayed[0][0] <= now:
+                    self._ready.append(heapq.heappop(self._delayed)[1])
+                batch = []
+                while self._ready and len(batch) < limit:
+                    entry = self._pending.get(self._ready.popleft())
+                    if entry is None or entry.in_flight:
+                        continue
+                    entry.in_flight = True
+                    entry.attempts += 1
+                    batch.append((entry.message_id, entry.kwargs))
+                if batch or self._closed:
+                    return batch
+                wait = None if deadline is None else deadline - time.monotonic()
+                if self._delayed:
+                    until_due = self._delayed[0][0] - now
+                    wait = until_due if wait is None else min(wait, until_due)
+                if wait is not None and wait <= 0:
+                    return batch
+                self._available.wait(wait)
+
+    def ack(self, message_id: int) -> None:
+        """送信が完了したメッセージを記録から外す"""
+        with self._lock:
+            entry = self._pending.pop(message_id, None)
+            if entry is None:
+                return
+            self._append(_encode_record(RECORD_ACK, _ACK.pack(message_id)))
+            self._segments[entry.segment][1] -= 1
+            if entry.segment != self._segment:
+                self._drop_finished_segments()
+
+    def release(self, message_id: int, delay: float = 0.0) -> None:
+        """送信に失敗したメッセージを ``delay`` 秒後に再び送信待ちにする"""
+        with self._lock:
+            entry = self._pending.get(message_id)
+            if entry is None:
+                return
+            entry.in_flight = False
+            if delay > 0:
+                heapq.heappush(self._delayed, (time.time() + delay, message_id))
+            else:
+                self._ready.append(message_id)
+            self._available.notify()
+
+    def attempts(self, message_id: int) -> int:
+        """メッセージの送信試行回数（このプロセス内）"""
+        with self._lock:
+            entry = self._pending.get(message_id)
+            return entry.attempts if entry is not None else 0
+
+    # ---- 統計 ----
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def depth(self) -> int:
+        """送信待ち（送信中を含む）のメッセージ数"""
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def oldest_age(self) -> float:
+        """最も古い送信待ちメッセージの経過秒数（なければ 0）"""
+        with self._lock:
+            if not self._pending:
+                return 0.0
+            return max(0.0, time.time() - next(iter(self._pending.values())).created)
+
+    def stats(self) -> Dict[str, Any]:
+        """キューの状態を取得"""
+        with self._lock:
+            oldest = next(iter(self._pending.values())).created if self._pending else None
+            return {
+                "depth": len(self._pending),
+                "in_flight": sum(1 for entry in self._pending.values() if entry.in_flight),
+                "oldest_age": max(0.0, time.time() - oldest) if oldest is not None else 0.0,
+                "segments": len(self._segments),
+            }
+
+    # ---- 終了処理 ----
+
+    def close(self) -> None:
+        """未同期のレコードを fsync してファイルを閉じる"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._available.notify_all()
+        self._wakeup.set()
+        self._sync_thread.join()
+        with self._lock:
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._synced_seq = self._written_seq
+            self._synced.notify_all()
+
+    def __enter__(self) -> "Outbox":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class OutboxWorker:
+    """アウトボックスからメッセージを取り出して配送するワーカー
+
+    一時的な失敗（通信エラー、5xx、429）は指数的に延ばした間隔で再送し、
+    4xx など再送しても成功しない失敗のメッセージは破棄する。
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        client: PushoverCLI,
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 300.0,
+        batch_size: int = 32
+    ):
+        self.outbox = outbox
+        self.client = client
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.batch_size = batch_size
+        self.sent = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _deliver(self, message_id: int, kwargs: Dict[str, Any]) -> None:
+        try:
+            self.client.send(**kwargs)
+        except PushoverError as e:
+            if e.retryable:
+                attempts = self.outbox.attempts(message_id)
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (attempts - 1))
+                self.outbox.release(message_id, delay)
+                return
+            self.failed += 1
+            print(f"エラー: {e}（破棄しました）: {kwargs.get('message')}", file=sys.stderr)
+        else:
+            self.sent += 1
+        self.outbox.ack(message_id)
+
+    def run_once(self, timeout: Optional[float] = 0.0) -> int:
+        """送信可能なメッセージを1バッチ配送して処理件数を返す"""
+        batch = self.outbox.take(self.batch_size, timeout=timeout)
+        for message_id, kwargs in batch:
+            self._deliver(message_id, kwargs)
+        return len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self.run_once(timeout=0.5) and self.outbox.closed:
+                return
+
+    def start(self) -> None:
+        """バックグラウンドスレッドで配送を開始"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """処理中のバッチを終えてから停止（未送信分はアウトボックスに残る）"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,315 @@
+"""
+Pushover CLI コネクションプールモジュール
+
+keep-alive な HTTP(S) 接続をインスタンス単位で再利用する
+"""
+
+import collections
+import http.client
+import select
+import ssl
+import threading
+import time
+from typing import BinaryIO, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+
+# 再利用した接続がサーバー側で既に閉じられていた場合に発生する例外
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+class RequestTiming(NamedTuple):
+    """1回のリクエストの所要時間（秒）
+
+    再利用した接続では connect と tls は 0 になる。
+    """
+
+    connect: float
+    tls: float
+    write: float
+    # リクエストの送信完了からステータス行とヘッダを受け取るまで
+    ttfb: float
+    total: float
+    reused: bool
+
+
+class PooledResponse(NamedTuple):
+    """プール経由で取得したレスポンス"""
+
+    status: int
+    headers: http.client.HTTPMessage
+    body: bytes
+    timing: Optional[RequestTiming] = None
+
+
+def _read_chunked(reader: BinaryIO) -> bytes:
+    """chunked 転送の本文を読み込む"""
+    chunks = []
+    while True:
+        line = reader.readline(65537)
+        if not line:
+            raise http.client.IncompleteRead(b"".join(chunks))
+        size = int(line.split(b";", 1)[0], 16)
+        if size == 0:
+            # トレーラーを読み飛ばす
+            while reader.readline(65537) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(chunks)
+        chunk = reader.read(size)
+        if len(chunk) < size:
+            raise http.client.IncompleteRead(chunk)
+        chunks.append(chunk)
+        reader.readline(65537)
+
+
+def read_response(reader: BinaryIO) -> Optional[Tuple[PooledResponse, bool]]:
+    """
+    バッファ付きの読み込み元からレスポンスを1つ読み込む
+
+    パイプラインでは後続のレスポンスが同じバッファに読み込まれているため、
+    http.client.HTTPResponse（レスポンスごとにバッファを作る）は使えない。
+
+    Returns:
+        (レスポンス, サーバーが接続を閉じるか)。レスポンスの前に接続が閉じられた場合は None
+
+    Raises:
+        http.client.HTTPException: レスポンスが不正、または途中で切断された場合
+    """
+    while True:
+        line = reader.readline(65537)
+        if not line:
+            return None
+        parts = line.decode("iso-8859-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise http.client.BadStatusLine(line.decode("iso-8859-1", "replace"))
+        version, status = parts[0], int(parts[1])
+        headers = http.client.parse_headers(reader)
+        if status != 100:
+            break
+    connection = (headers.get("Connection") or "").lower()
+    will_close = "close" in connection or (version == "HTTP/1.0" and "keep-alive" not in connection)
+    if "chunked" in (headers.get("Transfer-Encoding") or "").lower():
+        body = _read_chunked(reader)
+    elif headers.get("Content-Length") is not None:
+        length = int(headers["Content-Length"])
+        body = reader.read(length)
+        if len(body) < length:
+            raise http.client.IncompleteRead(body, length - len(body))
+    else:
+        # 長さの指定がなければ接続が閉じられるまでが本文
+        body = reader.read()
+        will_close = True
+    return PooledResponse(status, headers, body), will_close
+
+
+class ConnectionPool:
+    """スレッドセーフな keep-alive 接続プール
+
+    アイドル接続は最大 ``maxsize`` 本まで保持し、``idle_timeout`` 秒以上
+    使われなかった接続やサーバー側で閉じられた接続は取り出し時に破棄する。
+    同時に必要な接続数が ``maxsize`` を超えた場合は一時的な接続を作成し、
+    返却時に溢れた分を閉じる。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        secure: bool = True,
+        timeout: float = 10.0,
+        maxsize: int = 4,
+        idle_timeout: float = 60.0,
+        ssl_context: Optional[ssl.SSLContext] = None
+    ):
+        self.host = host
+        self.port = port
+        self.secure = secure
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        # SSLコンテキストは証明書の読み込みが重いため全接続で共有する
+        if secure and ssl_context is None:
+            ssl_context = ssl.create_default_context()
+        self.ssl_context = ssl_context
+
+        self._idle: Deque[Tuple[http.client.HTTPConnection, float]] = collections.deque()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        """新しい接続オブジェクトを作成（接続自体は初回リクエスト時に確立）"""
+        if self.secure:
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout, context=self.ssl_context
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _connect(self, conn: http.client.HTTPConnection) -> Tuple[float, float]:
+        """新しい接続を確立し (TCP接続の秒数, TLSハンドシェイクの秒数) を返す"""
+        started = time.perf_counter()
+        # HTTPSConnection.connect は TCP 接続と TLS を続けて行うため、分けて計測する
+        http.client.HTTPConnection.connect(conn)
+        connected = time.perf_counter()
+        if not self.secure:
+            return connected - started, 0.0
+        conn.sock = self.ssl_context.wrap_socket(conn.sock, server_hostname=self.host)
+        return connected - started, time.perf_counter() - connected
+
+    @staticmethod
+    def _is_stale(conn: http.client.HTTPConnection) -> bool:
+        """アイドル中の接続がサーバー側で閉じられていないか確認"""
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            # アイドル中に読み込み可能になるのは EOF（切断）か想定外のデータのみ
+            readable, _, _ = select.select([sock], [], [], 0)
+        except Exception:
+            return True
+        return bool(readable)
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """接続を取り出す
+
+        Returns:
+            (接続, 再利用された接続かどうか)
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if now - last_used > self.idle_timeout or self._is_stale(conn):
+                    conn.close()
+                    continue
+                return conn, True
+        return self._new_connection(), False
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool = True) -> None:
+        """接続をプールに返却"""
+        with self._lock:
+            if reusable and not self._closed and len(self._idle) < self.maxsize:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> PooledResponse:
+        """プールの接続でリクエストを送信しレスポンス全体を読み込む
+
+        再利用した接続が既に切断されていてリクエストを書き込めなかった場合は、
+        新しい接続で一度だけ再送する。書き込んだ後（レスポンスの読み込み中）の切断は
+        サーバーが処理済みの可能性があるため再送せず、例外をそのまま送出する
+        （再試行するかどうかは呼び出し側の RetryPolicy が判断する）。
+        """
+        headers = headers or {}
+        while True:
+            started = time.perf_counter()
+            conn, reused = self.acquire()
+            try:
+                connect = tls = 0.0
+                if conn.sock is None:
+                    connect, tls = self._connect(conn)
+                sending = time.perf_counter()
+                conn.request(method, path, body, headers)
+                sent = time.perf_counter()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            try:
+                response = conn.getresponse()
+                first_byte = time.perf_counter()
+                data = response.read()
+            except BaseException:
+                conn.close()
+                raise
+            self.release(conn, reusable=not response.will_close)
+            timing = RequestTiming(
+                connect=connect,
+                tls=tls,
+                write=sent - sending,
+                ttfb=first_byte - sent,
+                total=time.perf_counter() - started,
+                reused=reused,
+            )
+            return PooledResponse(response.status, response.headers, data, timing)
+
+    def pipeline(
+        self,
+        payload: bytes,
+        count: int
+    ) -> Tuple[List[PooledResponse], Optional[Exception]]:
+        """
+        HTTP/1.1 パイプライン: count 件分のリクエストをまとめて書き込んでからレスポンスを順に読む
+
+        payload は完全な HTTP リクエスト（リクエスト行・ヘッダ・本文）を並べたもの。
+        書き込みとレスポンスの待ち合わせが1回で済むため、小さなリクエストを連続して送る場合の
+        往復とシステムコールが減る。再利用した接続が既に切断されていた場合は、
+        レスポンスを1つも受け取っていなければ新しい接続で一度だけやり直す。
+
+        Returns:
+            (受け取ったレスポンス, 読み込みを中断した例外)。サーバーが Connection: close で
+            途中から応答しなかった場合、レスポンスは count 件より少なく例外は None
+            （応答のなかったリクエストはサーバーに処理されていない）
+        """
+        while True:
+            conn, reused = self.acquire()
+            responses: List[PooledResponse] = []
+            will_close = False
+            try:
+                if conn.sock is None:
+                    self._connect(conn)
+                conn.sock.sendall(payload)
+                reader = conn.sock.makefile("rb")
+                try:
+                    while len(responses) < count and not will_close:
+                        result = read_response(reader)
+                        if result is None:
+                            raise http.client.RemoteDisconnected(
+                                "Remote end closed connection without response"
+                            )
+                        response, will_close = result
+                        responses.append(response)
+                finally:
+                    reader.close()
+            except STALE_CONNECTION_ERRORS as e:
+                conn.close()
+                if reused and not responses:
+                    continue
+                return responses, e
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                return responses, e
+            except BaseException:
+                conn.close()
+                raise
+            self.release(conn, reusable=not will_close)
+            return responses, None
+
+    def close(self) -> None:
+        """保持しているすべてのアイドル接続を閉じる"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._idle)
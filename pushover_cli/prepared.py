@@ -0,0 +1,249 @@
+"""
+Pushover CLI 事前エンコード送信モジュール
+
+大量送信向けに、クライアントごとに変わらない部分をエンコード済みで保持し、
+複数のリクエストを HTTP/1.1 パイプラインでまとめて送信する
+"""
+
+import urllib.parse
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .core import (
+    API_PATH,
+    DEFAULT_EXPIRE,
+    DEFAULT_RETRY_INTERVAL,
+    EMERGENCY_PRIORITY,
+    PushoverCLI,
+    raise_for_response,
+)
+from .errors import PushoverError
+from .pool import PooledResponse
+from .ratelimit import RateLimitExceeded
+
+
+# 1回にまとめて書き込むリクエストの最大数
+# （応答を読まずに書き込み続けるとソケットのバッファが埋まり、互いに待ち続けるため）
+MAX_PIPELINE_DEPTH = 64
+
+_PRIORITY_FIELDS = {priority: f"&priority={priority}".encode("ascii") for priority in range(-2, 3)}
+
+
+def _quote(value: Any) -> bytes:
+    """urllib.parse.urlencode と同じ規則で値をエンコード"""
+    return urllib.parse.quote_plus(str(value)).encode("ascii")
+
+
+class RequestEncoder:
+    """/1/messages.json へのリクエストをバイト列に組み立てる
+
+    token と user のフォームフィールド、リクエスト行と固定のヘッダは最初に一度だけ
+    エンコードし、通知ごとには変わる部分だけをエンコードして再利用するバッファに追加する。
+    本文は urllib.parse.urlencode(build_message_data(...)) と同じバイト列になる。
+    """
+
+    def __init__(self, token: str, user: str, host: str, path: str = API_PATH):
+        """
+        Args:
+            token: Pushoverアプリトークン
+            user: 既定の送信先ユーザーキー
+            host: Host ヘッダの値（既定のポート以外では "host:port"）
+            path: リクエストのパス
+        """
+        self.token = token
+        self.user = user
+        self._token_field = b"token=" + _quote(token)
+        self._prefixes: Dict[str, bytes] = {}
+        self._head = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            "Accept-Encoding: identity\r\n"
+            "Content-Type: application/x-www-form-urlencoded\r\n"
+            "Content-Length: "
+        ).encode("ascii")
+
+    def _prefix(self, user: str) -> bytes:
+        prefix = self._prefixes.get(user)
+        if prefix is None:
+            if len(self._prefixes) >= 256:
+                self._prefixes.clear()
+            prefix = self._prefixes[user] = self._token_field + b"&user=" + _quote(user)
+        return prefix
+
+    def encode_body(
+        self,
+        body: bytearray,
+        message: str,
+        title: Optional[str] = None,
+        priority: int = 0,
+        url: Optional[str] = None,
+        url_title: Optional[str] = None,
+        device: Optional[str] = None,
+        sound: Optional[str] = None,
+        user: Optional[str] = None,
+        retry_interval: Optional[int] = None,
+        expire: Optional[int] = None,
+        html: bool = False
+    ) -> bytearray:
+        """body の内容をフォームデータで置き換えて返す（引数は send_notification と同じ）"""
+        del body[:]
+        body += self._prefix(user or self.user)
+        body += b"&message="
+        body += _quote(message)
+        body += _PRIORITY_FIELDS.get(priority) or f"&priority={priority}".encode("ascii")
+        if title:
+            body += b"&title="
+            body += _quote(title)
+        if url:
+            body += b"&url="
+            body += _quote(url)
+        if url_title:
+            body += b"&url_title="
+            body += _quote(url_title)
+        if device:
+            body += b"&device="
+            body += _quote(device)
+        if sound:
+            body += b"&sound="
+            body += _quote(sound)
+        if html:
+            body += b"&html=1"
+        if priority == EMERGENCY_PRIORITY:
+            body += b"&retry="
+            body += _quote(retry_interval or DEFAULT_RETRY_INTERVAL)
+            body += b"&expire="
+            body += _quote(expire or DEFAULT_EXPIRE)
+        return body
+
+    def encode_request(self, out: bytearray, body: bytes) -> None:
+        """リクエスト行・ヘッダ・本文を out に追加"""
+        out += self._head
+        out += str(len(body)).encode("ascii")
+        out += b"\r\n\r\n"
+        out += body
+
+
+def _host_header(client: PushoverCLI) -> str:
+    default_port = 443 if client.pool.secure else 80
+    if client.port == default_port:
+        return client.host
+    return f"{client.host}:{client.port}"
+
+
+class PipelinedSender:
+    """1つの keep-alive 接続に複数の通知をまとめて書き込んで送信する
+
+    通知を ``depth`` 件ずつ、事前エンコードしたリクエストとして1回で書き込み、
+    レスポンスを順に読む。バッファは送信のたびに再利用する。
+    スケジューラ・送信枠の追跡・メトリクスは通常の送信と同じく適用する。
+
+    - 添付ファイル付きの通知はパイプラインに乗せず、通常の経路で送信する
+    - 再試行できる失敗（5xx・429・通信エラー）は、クライアントに retry が設定されていれば
+      通常の経路（再試行を含む）で送り直す
+    - サーバーが途中で Connection: close を返した場合、応答のなかった通知は新しい接続で送り直す
+
+    スレッドごとに1つ作成して使う（インスタンスはスレッドセーフではない）。
+    POST のパイプラインに対応しないサーバーもあるため、大量送信で明示的に使う場合に限る。
+    """
+
+    def __init__(self, client: PushoverCLI, depth: int = 8):
+        """
+        Args:
+            client: 送信に使うクライアント（接続プール・スケジューラを共有）
+            depth: 1回にまとめて書き込む通知の数（最大 MAX_PIPELINE_DEPTH）
+        """
+        self.client = client
+        self.depth = max(1, min(depth, MAX_PIPELINE_DEPTH))
+        self.encoder = RequestEncoder(
+            client.token, client.user, _host_header(client), client.API_PATH
+        )
+        self._body = bytearray()
+        self._out = bytearray()
+
+    def send_many(self, messages: Iterable[Mapping[str, Any]]) -> List[Tuple[bool, str]]:
+        """
+        send_notification の引数の並びを送信し、入力順の (成功フラグ, レスポンスメッセージ) を返す
+        """
+        results: List[Tuple[bool, str]] = []
+        window: List[Mapping[str, Any]] = []
+        for kwargs in messages:
+            if kwargs.get("attachment") is not None:
+                # 順序を保つため、先に溜まっている分を送信する
+                if window:
+                    results.extend(self._send_window(window))
+                    window = []
+                results.append(self.client.send_notification(**kwargs))
+                continue
+            if "attachment" in kwargs:
+                kwargs = {key: value for key, value in kwargs.items() if key != "attachment"}
+            window.append(kwargs)
+            if len(window) >= self.depth:
+                results.extend(self._send_window(window))
+                window = []
+        if window:
+            results.extend(self._send_window(window))
+        return results
+
+    def _record(self, response: PooledResponse, priority: int) -> Tuple[bool, str, bool]:
+        """レスポンスを記録し (成功フラグ, レスポンスメッセージ, 再試行できるか) を返す"""
+        client = self.client
+        if client.metrics is not None:
+            client.metrics.observe(response.status, priority, None)
+        client.rate_limit.record_response(response.status, response.headers)
+        try:
+            raise_for_response(response.status, response.body)
+        except PushoverError as e:
+            return False, f"送信エラー: {str(e)}", e.retryable
+        return True, "通知が正常に送信されました", False
+
+    def _send_window(self, window: List[Mapping[str, Any]]) -> List[Tuple[bool, str]]:
+        client = self.client
+        results: List[Optional[Tuple[bool, str]]] = [None] * len(window)
+        retry: List[int] = []
+        queue = list(range(len(window)))
+        while queue:
+            out = self._out
+            del out[:]
+            written = []
+            for index in queue:
+                kwargs = window[index]
+                priority = kwargs.get("priority", 0)
+                if client.scheduler is not None:
+                    try:
+                        client.scheduler.acquire(priority)
+                    except RateLimitExceeded as e:
+                        results[index] = (False, f"レート制限: {str(e)}")
+                        continue
+                self.encoder.encode_request(out, self.encoder.encode_body(self._body, **kwargs))
+                written.append(index)
+            if not written:
+                break
+            responses, error = client.pool.pipeline(out, len(written))
+            for index, response in zip(written, responses):
+                success, message, retryable = self._record(response, window[index].get("priority", 0))
+                results[index] = (success, message)
+                if retryable:
+                    retry.append(index)
+            unanswered = written[len(responses):]
+            if error is None or not unanswered:
+                # Connection: close で応答されなかった分は処理されていないので送り直す
+                queue = unanswered if len(responses) else []
+                continue
+            for index in unanswered:
+                if client.metrics is not None:
+                    client.metrics.observe(None, window[index].get("priority", 0), None)
+                results[index] = (False, f"接続エラー: {str(error) or type(error).__name__}")
+                retry.append(index)
+            queue = []
+        if client.retry is not None:
+            for index in sorted(retry):
+                results[index] = client.send_notification(**window[index])
+        return [result or (False, "接続エラー: 応答がありません") for result in results]
+
+
+def send_pipelined(
+    client: PushoverCLI,
+    messages: Iterable[Mapping[str, Any]],
+    depth: int = 8
+) -> List[Tuple[bool, str]]:
+    """PipelinedSender で messages を送信（1回限りの送信用）"""
+    return PipelinedSender(client, depth).send_many(messages)
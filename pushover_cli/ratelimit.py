@@ -0,0 +1,203 @@
+"""
+Pushover CLI レート制限モジュール
+
+APIの X-Limit-App-* ヘッダから送信枠を追跡し、送信ペースを制御する
+"""
+
+import contextlib
+import threading
+import time
+from typing import Dict, Iterator, Mapping, Optional
+
+from .errors import PushoverError
+
+
+# 月間の残り送信枠（割合）がこれを下回ると、その優先度の通知は送信しない
+DEFAULT_RESERVES: Dict[int, float] = {-2: 0.20, -1: 0.10, 0: 0.02}
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    return headers.get(name) or headers.get(name.lower())
+
+
+def parse_limit_headers(headers: Optional[Mapping[str, str]]) -> Dict[str, Optional[int]]:
+    """X-Limit-App-Limit / Remaining / Reset ヘッダを整数に変換（ないものは None）"""
+    values: Dict[str, Optional[int]] = {}
+    for key, name in (("limit", "X-Limit-App-Limit"),
+                      ("remaining", "X-Limit-App-Remaining"),
+                      ("reset", "X-Limit-App-Reset")):
+        value = _header(headers, name) if headers is not None else None
+        try:
+            values[key] = int(value) if value is not None else None
+        except (TypeError, ValueError):
+            values[key] = None
+    return values
+
+
+class RateLimitState:
+    """アプリケーションの送信枠の状態（スレッドセーフ）
+
+    複数のクライアントで共有でき、レスポンスを受け取るたびに更新される。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[float] = None
+        self.backoff_until = 0.0
+        self._backoff = 0.0
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """X-Limit-App-Limit / Remaining / Reset ヘッダを取り込む"""
+        if headers is None:
+            return
+        values = parse_limit_headers(headers)
+        limit, remaining, reset = values["limit"], values["remaining"], values["reset"]
+        with self._lock:
+            if limit is not None:
+                self.limit = limit
+            if remaining is not None:
+                self.remaining = remaining
+            if reset is not None:
+                self.reset = float(reset)
+
+    def record_response(self, status: int, headers: Optional[Mapping[str, str]] = None) -> None:
+        """レスポンスを記録し、HTTP 429 の場合はバックオフ期間を設定"""
+        self.update_from_headers(headers)
+        now = time.time()
+        with self._lock:
+            if status != 429:
+                self._backoff = 0.0
+                return
+            retry_after = _header(headers, "Retry-After") if headers is not None else None
+            if retry_after is not None and retry_after.isdigit():
+                wait = float(retry_after)
+            else:
+                # 連続する 429 では待ち時間を倍にしていく（最大1時間）
+                self._backoff = min(3600.0, max(1.0, self._backoff * 2))
+                wait = self._backoff
+            self.backoff_until = max(self.backoff_until, now + wait)
+
+    def retry_after(self) -> float:
+        """バックオフ期間の残り秒数"""
+        with self._lock:
+            return max(0.0, self.backoff_until - time.time())
+
+    @property
+    def remaining_fraction(self) -> Optional[float]:
+        """月間の送信枠の残り割合（不明な場合は None）"""
+        with self._lock:
+            if not self.limit or self.remaining is None:
+                return None
+            return self.remaining / self.limit
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset": self.reset,
+                "backoff_until": self.backoff_until or None,
+            }
+
+
+class RateLimitExceeded(PushoverError):
+    """送信枠の不足により送信しなかったことを示す例外"""
+
+
+class RateLimitScheduler:
+    """トークンバケットによる送信ペース制御
+
+    - 毎秒 ``rate`` 件、最大 ``burst`` 件までの連続送信を許可する
+    - HTTP 429 を受けた後は Retry-After の秒数（ない場合は連続するたびに倍になる
+      最大1時間の待ち時間）の間、送信を待たせる。X-Limit-App-Reset は月間の送信枠の
+      リセット時刻のため待ち時間には使わない
+    - 月間の送信枠が少なくなると、低い優先度の通知から送信を拒否する
+      （優先度 1 と 2 は拒否しない）
+    - ``preempt_priority`` 以上の優先度の通知と、``preempting()`` のブロック内の送信は
+      トークンを待たずに送信する（使ったトークンは後続の通知の待ち時間として返済される）
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 10,
+        state: Optional[RateLimitState] = None,
+        reserves: Optional[Dict[int, float]] = None,
+        preempt_priority: Optional[int] = None
+    ):
+        self.rate = rate
+        self.preempt_priority = preempt_priority
+        self.burst = burst
+        self.state = state or RateLimitState()
+        self.reserves = DEFAULT_RESERVES if reserves is None else reserves
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def check_budget(self, priority: int) -> None:
+        """送信枠が優先度の予約分を下回っていれば RateLimitExceeded"""
+        reserve = self.reserves.get(priority)
+        fraction = self.state.remaining_fraction
+        if reserve is None or fraction is None:
+            return
+        if fraction < reserve:
+            raise RateLimitExceeded(
+                f"月間の送信枠が残り{fraction:.0%}のため優先度{priority}の通知を送信しません"
+            )
+
+    def _reserve_token(self) -> float:
+        """トークンを1つ予約し、使用可能になるまでの秒数を返す"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def _return_token(self) -> None:
+        """予約したトークンを返却する"""
+        with self._lock:
+            self._tokens += 1
+
+    @contextlib.contextmanager
+    def preempting(self) -> Iterator[None]:
+        """このブロック内で同じスレッドから acquire した送信はトークンを待たない
+
+        スケジューラを共有するほかの利用者の設定（preempt_priority）を変えずに、
+        特定の送信だけに追い越しを許可する。
+        """
+        previous = getattr(self._local, "preempt", False)
+        self._local.preempt = True
+        try:
+            yield
+        finally:
+            self._local.preempt = previous
+
+    def acquire(self, priority: int = 0, timeout: Optional[float] = None) -> None:
+        """
+        送信してよくなるまで待つ
+
+        Args:
+            priority: 通知の優先度
+            timeout: 待機の上限秒数（None は無制限）
+
+        Raises:
+            RateLimitExceeded: 送信枠が不足している、または timeout 内に送信できない場合
+        """
+        self.check_budget(priority)
+        wait = self._reserve_token()
+        if getattr(self._local, "preempt", False) or (
+            self.preempt_priority is not None and priority >= self.preempt_priority
+        ):
+            wait = 0.0
+        wait = max(self.state.retry_after(), wait)
+        if timeout is not None and wait > timeout:
+            self._return_token()
+            raise RateLimitExceeded(f"送信可能になるまで{wait:.1f}秒かかります")
+        if wait > 0:
+            time.sleep(wait)
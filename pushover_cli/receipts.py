@@ -0,0 +1,384 @@
+"""
+Pushover CLI レシートモジュール
+
+緊急（優先度 2）の通知のレシートを保存し、確認されたか・期限切れになったかを追跡する
+"""
+
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .core import PushoverCLI
+from .errors import PushoverError
+
+
+DEFAULT_RECEIPTS_PATH = "~/.cache/pushover-cli/receipts.sqlite3"
+
+
+class ReceiptStatus(NamedTuple):
+    """/1/receipts/{receipt}.json の応答"""
+
+    receipt: str
+    acknowledged: bool
+    acknowledged_at: Optional[int]
+    acknowledged_by: Optional[str]
+    acknowledged_by_device: Optional[str]
+    last_delivered_at: Optional[int]
+    expired: bool
+    expires_at: Optional[int]
+
+    @property
+    def done(self) -> bool:
+        """これ以上状態が変わらない（確認済み、または期限切れ）"""
+        return self.acknowledged or self.expired
+
+
+def parse_receipt(receipt: str, payload: Dict[str, Any]) -> ReceiptStatus:
+    """API のレスポンスを ReceiptStatus に変換（0 や空文字は None）"""
+    return ReceiptStatus(
+        receipt=receipt,
+        acknowledged=bool(payload.get("acknowledged")),
+        acknowledged_at=payload.get("acknowledged_at") or None,
+        acknowledged_by=payload.get("acknowledged_by") or None,
+        acknowledged_by_device=payload.get("acknowledged_by_device") or None,
+        last_delivered_at=payload.get("last_delivered_at") or None,
+        expired=bool(payload.get("expired")),
+        expires_at=payload.get("expires_at") or None,
+    )
+
+
+class ReceiptHandle:
+    """ReceiptPoller で追跡中のレシート"""
+
+    def __init__(self, receipt: str, interval: float):
+        self.receipt = receipt
+        #: 最後に取得した状態（未取得の場合は None）
+        self.status: Optional[ReceiptStatus] = None
+        #: 追跡を続けられなくなった原因（レシートが存在しない場合など）
+        self.error: Optional[PushoverError] = None
+        #: 問い合わせ回数
+        self.polls = 0
+        self.interval = interval
+        self._callbacks: List[Callable[["ReceiptHandle"], None]] = []
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def acknowledged(self) -> bool:
+        return self.status is not None and self.status.acknowledged
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """追跡が終わるまで待つ（タイムアウトした場合は False）"""
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback: Callable[["ReceiptHandle"], None]) -> None:
+        """追跡が終わったときに呼ぶ関数を登録（終了済みの場合はすぐに呼ぶ）"""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        _call(callback, self)
+
+    def _finish(self, status: Optional[ReceiptStatus], error: Optional[PushoverError]) -> None:
+        with self._lock:
+            if status is not None:
+                self.status = status
+            self.error = error
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            _call(callback, self)
+
+
+def _call(callback: Callable[[ReceiptHandle], None], handle: ReceiptHandle) -> None:
+    try:
+        callback(handle)
+    except Exception:
+        # 呼び出し側の不具合で他のレシートの追跡を止めない
+        pass
+
+
+class ReceiptPoller:
+    """多数のレシートを1つのスレッドで追跡する
+
+    問い合わせはクライアントの接続プール（keep-alive 接続）を使って順番に行うため、
+    追跡するレシートが増えてもスレッドや TLS ハンドシェイクは増えない。
+    問い合わせ間隔はレシートごとに ``min_interval`` から始めて、状態が変わらない間は
+    ``backoff`` 倍ずつ ``max_interval`` まで延ばす。再通知が届いた直後は確認されやすい
+    ため、last_delivered_at が変わったら ``min_interval`` に戻す。
+
+    使用例:
+        poller = ReceiptPoller(client)
+        handle = poller.track(receipt, callback=lambda h: print(h.status))
+        handle.wait(600)
+        poller.close()
+    """
+
+    def __init__(
+        self,
+        client: PushoverCLI,
+        min_interval: float = 5.0,
+        max_interval: float = 60.0,
+        backoff: float = 1.5
+    ):
+        """
+        Args:
+            client: 問い合わせに使うクライアント（送信と接続プールを共有できる）
+            min_interval: 問い合わせ間隔の最小値（秒、API の推奨は5秒以上）
+            max_interval: 問い合わせ間隔の最大値（秒）
+            backoff: 状態が変わらない場合に間隔を延ばす倍率
+        """
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self._handles: Dict[str, ReceiptHandle] = {}
+        # (次に問い合わせる時刻, 登録順, ハンドル)
+        self._heap: List[Tuple[float, int, ReceiptHandle]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> int:
+        """追跡中のレシート数"""
+        with self._cond:
+            return len(self._handles)
+
+    def track(
+        self,
+        receipt: str,
+        callback: Optional[Callable[[ReceiptHandle], None]] = None
+    ) -> ReceiptHandle:
+        """
+        レシートの追跡を開始
+
+        同じレシートを複数回指定した場合は同じハンドルを返す。
+
+        Args:
+            receipt: 送信時に返されたレシート
+            callback: 確認・期限切れ・エラーで追跡が終わったときに
+                ハンドルを引数として呼ぶ関数（ポーリングのスレッドで実行される）
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ReceiptPoller は既に閉じられています")
+            handle = self._handles.get(receipt)
+            if handle is None:
+                handle = self._handles[receipt] = ReceiptHandle(receipt, self.min_interval)
+                self._schedule(handle, self.min_interval)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="pushover-receipts", daemon=True
+                )
+                self._thread.start()
+        if callback is not None:
+            handle.add_done_callback(callback)
+        return handle
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """追跡中のすべてのレシートが終わるまで待つ（タイムアウトした場合は False）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            handles = list(self._handles.values())
+        for handle in handles:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not handle.wait(remaining):
+                return False
+        return True
+
+    def _schedule(self, handle: ReceiptHandle, delay: float) -> None:
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), handle))
+        self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._heap:
+                        delay = self._heap[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+                _, _, handle = heapq.heappop(self._heap)
+            self._poll(handle)
+
+    def _poll(self, handle: ReceiptHandle) -> None:
+        handle.polls += 1
+        try:
+            status = parse_receipt(handle.receipt, self.client.get_receipt(handle.receipt))
+        except PushoverError as e:
+            if not e.retryable:
+                self._done(handle, None, e)
+                return
+            # 一時的な失敗の間は間隔を延ばして問い合わせを続ける
+            handle.interval = min(handle.interval * self.backoff, self.max_interval)
+            with self._cond:
+                if not self._closed:
+                    self._schedule(handle, handle.interval)
+            return
+
+        if status.done:
+            self._done(handle, status, None)
+            return
+        previous = handle.status
+        if previous is not None and status.last_delivered_at != previous.last_delivered_at:
+            handle.interval = self.min_interval
+        else:
+            handle.interval = min(handle.interval * self.backoff, self.max_interval)
+        handle.status = status
+        delay = handle.interval
+        if status.expires_at:
+            # 期限切れになった直後に確認できるようにする
+            delay = max(self.min_interval, min(delay, status.expires_at - time.time() + 1.0))
+        with self._cond:
+            if not self._closed:
+                self._schedule(handle, delay)
+
+    def _done(
+        self,
+        handle: ReceiptHandle,
+        status: Optional[ReceiptStatus],
+        error: Optional[PushoverError]
+    ) -> None:
+        with self._cond:
+            self._handles.pop(handle.receipt, None)
+        handle._finish(status, error)
+
+    def close(self) -> None:
+        """ポーリングを止める（追跡中のレシートは終了しないまま残る）"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def __enter__(self) -> "ReceiptPoller":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class StoredReceipt(NamedTuple):
+    """ReceiptStore に保存したレシート"""
+
+    receipt: str
+    sent_at: float
+    expires_at: float
+    message: str
+    title: Optional[str]
+    user: Optional[str]
+    acknowledged: bool
+    acknowledged_by: Optional[str]
+    acknowledged_at: Optional[int]
+    expired: bool
+
+
+class ReceiptStore:
+    """送信した緊急の通知のレシートを保存する SQLite ファイル
+
+    send で送信したレシートを、別の起動の receipts wait / list から参照するために使用する。
+    """
+
+    def __init__(self, path: str = DEFAULT_RECEIPTS_PATH):
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS receipts ("
+            " receipt TEXT PRIMARY KEY,"
+            " sent_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " message TEXT NOT NULL,"
+            " title TEXT,"
+            " user TEXT,"
+            " acknowledged INTEGER NOT NULL DEFAULT 0,"
+            " acknowledged_by TEXT,"
+            " acknowledged_at INTEGER,"
+            " expired INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def add(
+        self,
+        receipt: str,
+        expire: float,
+        message: str,
+        title: Optional[str] = None,
+        user: Optional[str] = None
+    ) -> None:
+        """送信したレシートを記録（expire は再通知を続ける秒数）"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO receipts (receipt, sent_at, expires_at, message, title, user)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (receipt, now, now + expire, message, title, user)
+            )
+
+    def update(self, status: ReceiptStatus) -> None:
+        """取得した状態を記録"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE receipts SET acknowledged = ?, acknowledged_by = ?, acknowledged_at = ?,"
+                " expired = ?, expires_at = COALESCE(?, expires_at) WHERE receipt = ?",
+                (int(status.acknowledged), status.acknowledged_by, status.acknowledged_at,
+                 int(status.expired), status.expires_at, status.receipt)
+            )
+
+    def get(self, receipt: str) -> Optional[StoredReceipt]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM receipts WHERE receipt = ?", (receipt,)
+            ).fetchone()
+        return _stored(row) if row is not None else None
+
+    def pending(self) -> List[StoredReceipt]:
+        """確認も期限切れもしていないレシート（送信順）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM receipts WHERE acknowledged = 0 AND expired = 0 AND expires_at > ?"
+                " ORDER BY sent_at", (time.time(),)
+            ).fetchall()
+        return [_stored(row) for row in rows]
+
+    def recent(self, limit: int = 20) -> List[StoredReceipt]:
+        """最近送信したレシート（新しい順）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM receipts ORDER BY sent_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_stored(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _stored(row: tuple) -> StoredReceipt:
+    receipt, sent_at, expires_at, message, title, user, acknowledged, by, at, expired = row
+    return StoredReceipt(
+        receipt, sent_at, expires_at, message, title, user, bool(acknowledged), by, at,
+        # 問い合わせていなくても有効期限を過ぎたものは期限切れとして扱う
+        bool(expired) or (not acknowledged and expires_at <= time.time())
+    )
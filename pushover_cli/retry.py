@@ -0,0 +1,75 @@
+"""
+Pushover CLI 再試行モジュール
+
+一時的な送信失敗を指数バックオフ（フルジッター）で再試行する
+"""
+
+import random
+import time
+from typing import Callable, Optional, TypeVar
+
+from .errors import PushoverError, PushoverRateLimitError
+
+
+T = TypeVar("T")
+
+
+class RetryPolicy:
+    """再試行の方針
+
+    ``retryable`` な PushoverError（通信エラー、5xx、429）のみを再試行し、
+    4xx などの恒久的なエラーは即座に呼び出し元へ返す。
+    n 回目の失敗後の待ち時間は 0〜min(max_delay, base_delay * 2**(n-1)) の一様乱数。
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        deadline: Optional[float] = 60.0
+    ):
+        """
+        Args:
+            max_attempts: 最初の送信を含む最大試行回数
+            base_delay: バックオフの基準秒数
+            max_delay: 1回の待ち時間の上限秒数
+            deadline: 最初の試行からの合計時間の上限秒数（None は無制限）
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt: int) -> float:
+        """attempt 回目の失敗後に待つ秒数"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(
+        self,
+        func: Callable[[], T],
+        sleep: Callable[[float], None] = time.sleep
+    ) -> T:
+        """
+        func を方針に従って再試行しながら呼び出す
+
+        Raises:
+            PushoverError: 恒久的なエラー、または試行回数・期限を使い切った場合の最後のエラー
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func()
+            except PushoverError as e:
+                if not e.retryable or attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt)
+                if isinstance(e, PushoverRateLimitError):
+                    delay = max(delay, e.retry_after)
+                if self.deadline is not None:
+                    remaining = self.deadline - (time.monotonic() - started)
+                    if delay >= remaining:
+                        raise
+                sleep(delay)
@@ -0,0 +1,237 @@
+"""
+Pushover CLI 設定解決モジュール
+
+設定ファイル（~/.pushover_config）の解析結果をキャッシュし、
+コマンドライン引数・環境変数・設定ファイルから送信設定を解決する
+"""
+
+import marshal
+import os
+import threading
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+
+DEFAULT_CONFIG_PATH = "~/.pushover_config"
+
+# プロファイルで既定値を指定できる項目
+PROFILE_FIELDS = ("token", "user", "device", "sound")
+
+# バイナリキャッシュの形式（変更したら上げる）
+_CACHE_VERSION = 2
+
+# テンプレートのセクション名の接頭辞（[template:名前]）
+TEMPLATE_SECTION_PREFIX = "template:"
+
+
+class ConfigFile(NamedTuple):
+    """解析済みの設定ファイル"""
+
+    # 最初の [プロファイル名] より前の KEY=VALUE
+    values: Dict[str, str]
+    # プロファイル名ごとの KEY=VALUE
+    profiles: Dict[str, Dict[str, str]]
+    # テンプレート名ごとの KEY=VALUE（[template:名前] のセクション）
+    templates: Dict[str, Dict[str, str]]
+
+
+class ResolvedConfig(NamedTuple):
+    """解決済みの送信設定"""
+
+    token: Optional[str]
+    user: Optional[str]
+    device: Optional[str]
+    sound: Optional[str]
+    profile: Optional[str]
+
+
+EMPTY_CONFIG = ConfigFile({}, {}, {})
+
+# パス -> ((mtime_ns, size), 解析結果)
+_file_cache: Dict[str, Tuple[Tuple[int, int], ConfigFile]] = {}
+# 引数・環境変数・ファイルの状態 -> 解決結果
+_resolved_cache: Dict[tuple, ResolvedConfig] = {}
+_lock = threading.Lock()
+
+# 解決結果をこの件数まで保持する（引数の組み合わせが増え続ける場合の上限）
+_RESOLVED_CACHE_SIZE = 256
+
+
+def parse_config(text: str) -> ConfigFile:
+    """設定ファイルの内容を解析
+
+    "#" で始まる行と空行は無視し、"[名前]" の行以降はそのプロファイルの設定、
+    "[template:名前]" の行以降はそのテンプレートの設定とする。
+    """
+    values: Dict[str, str] = {}
+    profiles: Dict[str, Dict[str, str]] = {}
+    templates: Dict[str, Dict[str, str]] = {}
+    section = values
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            name = line[1:-1].strip()
+            if name.startswith(TEMPLATE_SECTION_PREFIX):
+                section = templates.setdefault(name[len(TEMPLATE_SECTION_PREFIX):].strip(), {})
+            else:
+                section = profiles.setdefault(name, {})
+        elif '=' in line:
+            key, value = line.split('=', 1)
+            section[key.strip()] = value.strip()
+    return ConfigFile(values, profiles, templates)
+
+
+def binary_cache_path(config_path: str) -> str:
+    """設定ファイルの隣に置くバイナリキャッシュのパス"""
+    directory, name = os.path.split(config_path)
+    return os.path.join(directory, f".{name.lstrip('.')}.cache")
+
+
+def _read_binary_cache(config_path: str, stamp: Tuple[int, int]) -> Optional[ConfigFile]:
+    try:
+        with open(binary_cache_path(config_path), 'rb') as f:
+            version, cached_stamp, *fields = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != _CACHE_VERSION or tuple(cached_stamp) != stamp:
+        return None
+    return ConfigFile(*fields)
+
+
+def _write_binary_cache(config_path: str, stamp: Tuple[int, int], config: ConfigFile) -> None:
+    path = binary_cache_path(config_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        # 設定ファイルと同じくトークンを含むため所有者のみ読み書きできるようにする
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump((_CACHE_VERSION, stamp) + tuple(config), f)
+        os.replace(tmp_path, path)
+    except OSError:
+        # キャッシュは最適化にすぎないので、書けなくても設定の読み込みは続ける
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def _load(path: str, binary_cache: bool) -> Tuple[Optional[Tuple[int, int]], ConfigFile]:
+    """(ファイルの状態, 解析結果) を返す（ファイルがなければ状態は None）"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, EMPTY_CONFIG
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _lock:
+        cached = _file_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached
+
+    config = _read_binary_cache(path, stamp) if binary_cache else None
+    if config is None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                config = parse_config(f.read())
+        except (OSError, UnicodeDecodeError):
+            return None, EMPTY_CONFIG
+        if binary_cache:
+            _write_binary_cache(path, stamp, config)
+
+    with _lock:
+        _file_cache[path] = (stamp, config)
+    return stamp, config
+
+
+def load_config(config_path: str, binary_cache: bool = False) -> ConfigFile:
+    """
+    設定ファイルを読み込む（更新時刻とサイズが変わらない限りキャッシュを返す）
+
+    Args:
+        config_path: 設定ファイルのパス（~ は展開する）
+        binary_cache: 解析結果をファイルの隣にバイナリ形式でも保存し、
+            別プロセスでの読み込みに再利用する
+
+    Returns:
+        解析済みの設定（ファイルがない・読めない場合は空）
+    """
+    return _load(os.path.expanduser(config_path), binary_cache)[1]
+
+
+def load_config_from_file(config_path: str) -> dict:
+    """設定ファイルから設定を読み込み（プロファイル外の KEY=VALUE）"""
+    return dict(load_config(config_path).values)
+
+
+def clear_cache() -> None:
+    """プロセス内のキャッシュを破棄"""
+    with _lock:
+        _file_cache.clear()
+        _resolved_cache.clear()
+
+
+def resolve_config(
+    token: Optional[str] = None,
+    user: Optional[str] = None,
+    device: Optional[str] = None,
+    sound: Optional[str] = None,
+    profile: Optional[str] = None,
+    config_path: str = DEFAULT_CONFIG_PATH,
+    environ: Optional[Mapping[str, str]] = None,
+    binary_cache: bool = False
+) -> ResolvedConfig:
+    """
+    送信設定を解決
+
+    各項目の優先順位は コマンドライン引数 > プロファイル > 環境変数 > 設定ファイル。
+    プロファイルは引数 profile、PUSHOVER_PROFILE 環境変数、設定ファイルの
+    PUSHOVER_PROFILE の順に選ばれる。引数・環境変数で選んだプロファイルは明示的に
+    選んだものなので環境変数より優先するが、設定ファイルで選んだプロファイルは
+    設定ファイルの一部として扱い、環境変数 > プロファイル > 設定ファイル の順になる。
+    同じ引数・環境変数・設定ファイルに対する解決はプロセス内で1回だけ行う。
+
+    Raises:
+        KeyError: 指定したプロファイルが設定ファイルにない場合
+    """
+    env = os.environ if environ is None else environ
+    path = os.path.expanduser(config_path)
+    stamp, config = _load(path, binary_cache)
+    env_values = tuple(
+        env.get(name) for name in
+        ("PUSHOVER_PROFILE", "PUSHOVER_TOKEN", "PUSHOVER_USER", "PUSHOVER_DEVICE", "PUSHOVER_SOUND")
+    )
+    key = (path, stamp, token, user, device, sound, profile, env_values)
+    with _lock:
+        resolved = _resolved_cache.get(key)
+    if resolved is not None:
+        return resolved
+
+    explicit = profile or env_values[0]
+    profile_name = explicit or config.values.get("PUSHOVER_PROFILE")
+    if profile_name:
+        if profile_name not in config.profiles:
+            raise KeyError(profile_name)
+        profile_values = config.profiles[profile_name]
+    else:
+        profile_values = {}
+    if explicit:
+        sources = [profile_values, env, config.values]
+    else:
+        sources = [env, profile_values, config.values]
+
+    arguments = {"token": token, "user": user, "device": device, "sound": sound}
+    values = []
+    for field in PROFILE_FIELDS:
+        name = f"PUSHOVER_{field.upper()}"
+        value = arguments[field]
+        for source in sources:
+            value = value or source.get(name)
+        values.append(value)
+    resolved = ResolvedConfig(*values, profile=profile_name or None)
+
+    with _lock:
+        if len(_resolved_cache) >= _RESOLVED_CACHE_SIZE:
+            _resolved_cache.clear()
+        _resolved_cache[key] = resolved
+    return resolved
@@ -0,0 +1,60 @@
+"""
+Pushover CLI 通知デーモン接続モジュール
+
+起動中の通知デーモンに通知を登録する（送信側）。
+send --via-daemon の起動を軽くするため、接続プールや HTTP のモジュールには依存しない。
+"""
+
+import json
+import os
+import socket
+from typing import Any, Dict, Optional
+
+from .errors import PushoverConnectionError
+
+
+def default_socket_path() -> str:
+    """デーモンのソケットパスを取得
+
+    PUSHOVER_SOCKET 環境変数、XDG_RUNTIME_DIR、~/.cache/pushover-cli の順に使用する。
+    """
+    path = os.environ.get("PUSHOVER_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "pushover-cli.sock")
+    return os.path.expanduser("~/.cache/pushover-cli/daemon.sock")
+
+
+def send_via_daemon(
+    payload: Dict[str, Any],
+    socket_path: Optional[str] = None,
+    timeout: float = 1.0
+) -> None:
+    """
+    通知をデーモンのキューに登録
+
+    デーモンはキューへの登録直後に応答するため、配送の完了は待たない。
+
+    Raises:
+        OSError: デーモンに接続できない場合（起動していない。通知は登録されていない）
+        PushoverConnectionError: 接続後に送信・応答の待機に失敗した場合
+            （デーモンが登録済みの可能性があるため、直接送信に切り替えてはならない）
+        ValueError: デーモンが通知を拒否した場合
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or default_socket_path())
+        try:
+            sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            reply = sock.makefile("rb").readline().decode("utf-8").strip()
+        except OSError as e:
+            raise PushoverConnectionError(f"デーモンの応答を待てませんでした: {e}") from e
+    finally:
+        sock.close()
+    if not reply:
+        raise PushoverConnectionError("デーモンから応答がありません")
+    if reply != "ok":
+        raise ValueError(reply.partition(" ")[2] or reply)
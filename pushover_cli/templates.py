@@ -0,0 +1,275 @@
+"""
+Pushover CLI テンプレートモジュール
+
+設定ファイルの [template:名前] に定義したメッセージテンプレートを変数で展開する
+"""
+
+import functools
+import html
+import re
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .core import (
+    MAX_MESSAGE_LENGTH,
+    MAX_TITLE_LENGTH,
+    MAX_URL_LENGTH,
+    MAX_URL_TITLE_LENGTH,
+    truncate_text,
+)
+from .settings import ConfigFile
+
+
+# {名前} の置換、{{ と }} は括弧そのもの
+_TOKEN = re.compile(r"\{\{|\}\}|\{([A-Za-z_][A-Za-z0-9_.-]*)\}|[{}]")
+
+# テンプレートにできる項目と、設定ファイルのキー・最大文字数
+TEMPLATE_FIELDS: Tuple[Tuple[str, str, Optional[int]], ...] = (
+    ("title", "TITLE", MAX_TITLE_LENGTH),
+    ("message", "MESSAGE", MAX_MESSAGE_LENGTH),
+    ("url", "URL", MAX_URL_LENGTH),
+    ("url_title", "URL_TITLE", MAX_URL_TITLE_LENGTH),
+    ("sound", "SOUND", None),
+)
+
+# 末尾で途切れた文字参照（"&am" など）
+_PARTIAL_ENTITY = re.compile(r"&[#A-Za-z0-9]*$")
+
+
+class TemplateError(ValueError):
+    """テンプレートの構文エラー、または変数の不足"""
+
+
+class CompiledTemplate:
+    """解析済みのテンプレート文字列
+
+    固定部分と変数名を交互に保持し、展開時は結合するだけで済むようにする。
+    """
+
+    __slots__ = ("source", "literals", "names", "fixed_length")
+
+    def __init__(self, source: str):
+        """
+        Raises:
+            TemplateError: 対応しない括弧がある場合
+        """
+        self.source = source
+        literals: List[str] = []
+        names: List[str] = []
+        buffer: List[str] = []
+        pos = 0
+        for token in _TOKEN.finditer(source):
+            buffer.append(source[pos:token.start()])
+            pos = token.end()
+            text = token.group(0)
+            if text in ("{{", "}}"):
+                buffer.append(text[0])
+            elif token.group(1):
+                literals.append("".join(buffer))
+                buffer = []
+                names.append(token.group(1))
+            else:
+                raise TemplateError(f"対応しない括弧があります: {source!r}")
+        buffer.append(source[pos:])
+        literals.append("".join(buffer))
+        self.literals = tuple(literals)
+        self.names = tuple(names)
+        self.fixed_length = sum(len(literal) for literal in literals)
+
+    def render(
+        self,
+        variables: Mapping[str, Any],
+        limit: Optional[int] = None,
+        escape: bool = False
+    ) -> str:
+        """
+        変数を展開
+
+        Args:
+            variables: 変数名と値
+            limit: 最大文字数。超える場合は固定部分を残して長い変数の値から切り詰める
+            escape: 変数の値を HTML としてエスケープする（固定部分はそのまま）
+
+        Raises:
+            TemplateError: 変数が指定されていない場合
+        """
+        if not self.names:
+            text = self.literals[0]
+            return truncate_text(text, limit) if limit is not None else text
+        try:
+            values = [str(variables[name]) for name in self.names]
+        except KeyError as e:
+            raise TemplateError(f"変数 {e.args[0]} が指定されていません") from None
+        if escape:
+            values = [html.escape(value, quote=False) for value in values]
+        if limit is not None:
+            values = _fit(values, limit - self.fixed_length, escape)
+        parts = [self.literals[0]]
+        for value, literal in zip(values, self.literals[1:]):
+            parts.append(value)
+            parts.append(literal)
+        text = "".join(parts)
+        if limit is not None and len(text) > limit:
+            # 固定部分だけで上限を超える場合
+            text = truncate_text(text, limit)
+        return text
+
+
+@functools.lru_cache(maxsize=512)
+def compile_template(source: str) -> CompiledTemplate:
+    """テンプレート文字列を解析（同じ文字列の解析結果は再利用する）"""
+    return CompiledTemplate(source)
+
+
+def _truncate_value(value: str, limit: int, escaped: bool) -> str:
+    if len(value) <= limit:
+        return value
+    text = truncate_text(value, limit)
+    if escaped:
+        # 文字参照の途中で切らない
+        head = _PARTIAL_ENTITY.sub("", text[:-1])
+        text = head + text[-1]
+    return text
+
+
+def _fit(values: List[str], budget: int, escaped: bool) -> List[str]:
+    """値の合計が budget 文字に収まるよう、長いものから均等に切り詰める"""
+    if sum(len(value) for value in values) <= budget:
+        return values
+    result = list(values)
+    remaining = max(0, budget)
+    order = sorted(range(len(values)), key=lambda i: len(values[i]))
+    for count, index in enumerate(order):
+        share = remaining // (len(order) - count)
+        result[index] = _truncate_value(values[index], share, escaped)
+        remaining -= len(result[index])
+    return result
+
+
+class MessageTemplate:
+    """名前付きのメッセージテンプレート
+
+    設定ファイルの例:
+        [template:disk]
+        TITLE=ディスク容量警告 ({host})
+        MESSAGE=<b>{mount}</b> の使用量が {usage}% に達しました
+        PRIORITY=1
+        HTML=1
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fields: Mapping[str, str],
+        priority: Optional[int] = None,
+        html: bool = False
+    ):
+        """
+        Args:
+            name: テンプレート名
+            fields: 項目名（title, message, url, url_title, sound）とテンプレート文字列
+            priority: 優先度（省略時は送信時の指定に従う）
+            html: メッセージを HTML として送信し、変数の値をエスケープする
+
+        Raises:
+            TemplateError: テンプレート文字列の構文エラー
+        """
+        self.name = name
+        self.priority = priority
+        self.html = html
+        self.fields: Dict[str, CompiledTemplate] = {
+            field: compile_template(fields[field])
+            for field, _, _ in TEMPLATE_FIELDS if fields.get(field)
+        }
+
+    @classmethod
+    def from_config(cls, name: str, section: Mapping[str, str]) -> "MessageTemplate":
+        """設定ファイルの [template:名前] セクションから作成"""
+        fields = {field: section[key] for field, key, _ in TEMPLATE_FIELDS if key in section}
+        priority = None
+        if section.get("PRIORITY"):
+            try:
+                priority = int(section["PRIORITY"])
+            except ValueError:
+                raise TemplateError(f"テンプレート {name} の PRIORITY が不正です") from None
+            if priority not in (-2, -1, 0, 1, 2):
+                raise TemplateError(f"テンプレート {name} の PRIORITY は -2〜2 で指定してください")
+        return cls(name, fields, priority, section.get("HTML") == "1")
+
+    @property
+    def variables(self) -> List[str]:
+        """テンプレートが使う変数名（出現順）"""
+        names: Dict[str, None] = {}
+        for compiled in self.fields.values():
+            names.update(dict.fromkeys(compiled.names))
+        return list(names)
+
+    def render(self, variables: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        変数を展開し send_notification の引数を返す
+
+        各項目は API の最大文字数に収まるように切り詰める。URL は切り詰めると
+        リンクとして使えないため、上限を超える場合はエラーにする。
+
+        Raises:
+            TemplateError: 変数が不足している、または URL が長すぎる場合
+        """
+        kwargs: Dict[str, Any] = {}
+        for field, _, limit in TEMPLATE_FIELDS:
+            compiled = self.fields.get(field)
+            if compiled is None:
+                continue
+            escape = self.html and field == "message"
+            if field == "url":
+                value = compiled.render(variables)
+                if len(value) > MAX_URL_LENGTH:
+                    raise TemplateError(f"URL が {MAX_URL_LENGTH} 文字を超えています")
+            else:
+                value = compiled.render(variables, limit, escape)
+            kwargs[field] = value
+        if self.priority is not None:
+            kwargs["priority"] = self.priority
+        if self.html:
+            kwargs["html"] = True
+        return kwargs
+
+
+def load_templates(config: ConfigFile) -> Dict[str, MessageTemplate]:
+    """設定ファイルのすべてのテンプレート
+
+    Raises:
+        TemplateError: テンプレートの定義が不正な場合
+    """
+    return {
+        name: MessageTemplate.from_config(name, section)
+        for name, section in config.templates.items()
+    }
+
+
+def parse_variables(items: List[str]) -> Dict[str, str]:
+    """--var の "名前=値" のリストを辞書に変換
+
+    Raises:
+        TemplateError: "=" を含まない場合
+    """
+    variables = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep or not name:
+            raise TemplateError(f"変数は 名前=値 の形式で指定してください: {item}")
+        variables[name] = value
+    return variables
+
+
+def render_with(
+    templates: Mapping[str, MessageTemplate],
+    name: str,
+    variables: Mapping[str, Any],
+    overrides: Mapping[str, Any]
+) -> Dict[str, Any]:
+    """テンプレートを展開し、明示的に指定された引数で上書きした send_notification の引数"""
+    template = templates.get(name)
+    if template is None:
+        raise TemplateError(f"テンプレート {name} が設定ファイルにありません")
+    kwargs = template.render(variables)
+    kwargs.update((key, value) for key, value in overrides.items() if value is not None)
+    return kwargs
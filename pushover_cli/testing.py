@@ -0,0 +1,359 @@
+"""
+Pushover CLI テスト支援モジュール
+
+ローカルで動作する Pushover API のスタンドイン（/1/messages.json, /1/receipts, /1/users/validate.json）を提供する
+"""
+
+import http.server
+import json
+import random
+import re
+import ssl
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+
+_RECEIPT_PATH = re.compile(r"^/1/receipts/([^/]+?)(/cancel)?\.json$")
+
+# devices に登録していないユーザーのデバイス
+DEFAULT_DEVICES = ("phone", "tablet")
+
+
+class _FakeAPIHandler(http.server.BaseHTTPRequestHandler):
+    """Pushover API を模倣するリクエストハンドラ"""
+
+    protocol_version = "HTTP/1.1"
+    # ヘッダと本文を別々に書き込むため、Nagle アルゴリズムと遅延 ACK が重なると
+    # 応答ごとに約 40ms 待たされる（ベンチマークの結果を歪めないよう無効にする）
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.fake.connection_opened()
+
+    def log_message(self, format: str, *args) -> None:
+        # テスト出力を汚さないようにアクセスログは出さない
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: Dict[str, str]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        content_type = self.headers.get("Content-Type", "")
+        attachment = None
+        if content_type.startswith("multipart/form-data"):
+            fields, attachment = _parse_multipart(raw, content_type)
+        else:
+            fields = dict(urllib.parse.parse_qsl(raw.decode("utf-8"), keep_blank_values=True))
+        status, payload, headers = self.server.fake.handle(self.path, fields, attachment)
+        if status == 0:
+            # 応答せずに接続を切断する（通信エラーの再現）
+            self.close_connection = True
+            return
+        self._send_json(status, payload, headers)
+
+    def do_GET(self) -> None:
+        path, _, query = self.path.partition("?")
+        fields = dict(urllib.parse.parse_qsl(query))
+        status, payload, headers = self.server.fake.handle_get(path, fields)
+        self._send_json(status, payload, headers)
+
+
+def _parse_multipart(raw: bytes, content_type: str):
+    """multipart/form-data を (フィールド, 添付ファイル) に分解"""
+    boundary = content_type.split("boundary=", 1)[1].strip().strip('"').encode("ascii")
+    fields: Dict[str, str] = {}
+    attachment = None
+    for part in raw.split(b"--" + boundary):
+        if not part.strip() or part.strip() == b"--":
+            continue
+        head, _, body = part.lstrip(b"\r\n").partition(b"\r\n\r\n")
+        body = body[:-2] if body.endswith(b"\r\n") else body
+        params = {}
+        part_type = None
+        for line in head.decode("utf-8").split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.lower() == "content-type":
+                part_type = value.strip()
+            elif name.lower() == "content-disposition":
+                for item in value.split(";")[1:]:
+                    key, _, item_value = item.strip().partition("=")
+                    params[key] = item_value.strip('"')
+        if "filename" in params:
+            attachment = FakeAttachment(params["filename"], part_type, body)
+        else:
+            fields[params.get("name", "")] = body.decode("utf-8")
+    return fields, attachment
+
+
+class FakeAttachment(NamedTuple):
+    """スタンドインサーバーが受け取った添付ファイル"""
+
+    filename: str
+    content_type: Optional[str]
+    data: bytes
+
+
+class _FakeHTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    # 同時接続のベンチマークで接続要求が取りこぼされないようにする
+    request_queue_size = 128
+
+
+class FakePushoverServer:
+    """テスト用のローカル Pushover API サーバー
+
+    使用例:
+        with FakePushoverServer() as server:
+            client = PushoverCLI("token", "user", api_url=server.url)
+            client.send_notification("hello")
+            assert server.messages[0]["message"] == "hello"
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        app_limit: Optional[int] = None,
+        error_rate: float = 0.0,
+        certfile: Optional[str] = None,
+        keyfile: Optional[str] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            host: 待ち受けるアドレス
+            port: 待ち受けるポート（0 の場合は空きポートを自動選択）
+            latency: 各リクエストに加える応答遅延（秒）
+            app_limit: 月間の送信枠。指定すると X-Limit-App-* ヘッダを返し、
+                使い切った後は HTTP 429 を返す
+            error_rate: ランダムに HTTP 500 を返す割合（0.0〜1.0）
+            certfile: 指定すると HTTPS で待ち受ける（サーバー証明書のPEMファイル）
+            keyfile: certfile の秘密鍵（certfile に含まれる場合は省略可）
+            seed: error_rate の乱数のシード（再現性のあるベンチマーク用）
+        """
+        self._httpd = _FakeHTTPServer((host, port), _FakeAPIHandler)
+        self._httpd.fake = self
+        self.secure = certfile is not None
+        if self.secure:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self._httpd.socket = context.wrap_socket(self._httpd.socket, server_side=True)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.app_limit = app_limit
+        self.app_remaining = app_limit
+        self.app_reset = int(time.time()) + 30 * 24 * 3600
+        self.requests: List[Dict[str, str]] = []
+        # 添付ファイル付きで届いたリクエストの添付ファイル（届いた順）
+        self.attachments: List[FakeAttachment] = []
+        self.connections = 0
+        # このユーザーキー宛ての送信は HTTP 400 で拒否する
+        self.invalid_users: Set[str] = set()
+        # ユーザーキーごとの登録済みデバイス（ここにないユーザーの検証は DEFAULT_DEVICES を返し、
+        # 送信ではデバイス名を確認しない）
+        self.devices: Dict[str, List[str]] = {}
+        # /1/users/validate.json の呼び出し回数
+        self.validations = 0
+        # 発行したレシートの状態（GET /1/receipts/{receipt}.json の応答）
+        self.receipts: Dict[str, Dict[str, Any]] = {}
+        # レシートの問い合わせ回数
+        self.receipt_polls = 0
+        self._failures: List[int] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        scheme = "https" if self.secure else "http"
+        return f"{scheme}://{host}:{port}"
+
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """/1/messages.json に届いたリクエストのフォームデータ"""
+        with self._lock:
+            return list(self.requests)
+
+    def connection_opened(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def inject_failures(self, *statuses: int) -> None:
+        """次のリクエストから順に、指定したHTTPステータスで失敗させる
+
+        ステータス 0 は応答を返さずに接続を切断する。
+        """
+        with self._lock:
+            self._failures.extend(statuses)
+
+    def _limit_headers(self) -> Dict[str, str]:
+        if self.app_limit is None:
+            return {}
+        return {
+            "X-Limit-App-Limit": str(self.app_limit),
+            "X-Limit-App-Remaining": str(self.app_remaining),
+            "X-Limit-App-Reset": str(self.app_reset),
+        }
+
+    def acknowledge(self, receipt: str, user: str = "user", device: str = "phone") -> None:
+        """緊急の通知をユーザーが確認したことにする"""
+        with self._lock:
+            status = self.receipts[receipt]
+            status.update(
+                acknowledged=1,
+                acknowledged_at=int(time.time()),
+                acknowledged_by=user,
+                acknowledged_by_device=device,
+            )
+
+    def _receipt_status(self, receipt: str) -> Optional[Dict[str, Any]]:
+        status = self.receipts.get(receipt)
+        if status is None:
+            return None
+        if not status["acknowledged"] and not status["expired"] and time.time() >= status["expires_at"]:
+            status["expired"] = 1
+        return dict(status)
+
+    def handle_get(self, path: str, fields: Dict[str, str]):
+        """GET リクエストを処理して (HTTPステータス, JSON, 追加ヘッダ) を返す"""
+        if self.latency:
+            time.sleep(self.latency)
+        match = _RECEIPT_PATH.match(path)
+        if match is None or match.group(2):
+            return 404, {"status": 0, "errors": ["not found"]}, {}
+        with self._lock:
+            self.receipt_polls += 1
+            if self._failures:
+                status = self._failures.pop(0)
+                return status, {"status": 0, "errors": [f"injected failure {status}"]}, {}
+            status = self._receipt_status(match.group(1))
+        if not fields.get("token"):
+            return 400, {"status": 0, "errors": ["application token is invalid"]}, {}
+        if status is None:
+            return 404, {"status": 0, "errors": ["receipt not found"]}, {}
+        return 200, dict(status, status=1, request="fake-receipt-poll"), {}
+
+    def _cancel_receipt(self, receipt: str):
+        with self._lock:
+            status = self.receipts.get(receipt)
+            if status is None:
+                return 404, {"status": 0, "errors": ["receipt not found"]}, {}
+            # 取り消した通知は再通知されず、期限切れとして扱われる
+            status.update(expired=1, expires_at=int(time.time()))
+        return 200, {"status": 1, "request": "fake-cancel"}, {}
+
+    def handle(self, path: str, fields: Dict[str, str], attachment: Optional[FakeAttachment] = None):
+        """リクエストを処理して (HTTPステータス, JSON, 追加ヘッダ) を返す"""
+        if self.latency:
+            time.sleep(self.latency)
+        match = _RECEIPT_PATH.match(path)
+        if match is not None and match.group(2):
+            return self._cancel_receipt(match.group(1))
+        if path == "/1/users/validate.json":
+            return self._validate_user(fields)
+        if path != "/1/messages.json":
+            return 404, {"status": 0, "errors": ["not found"]}, {}
+        with self._lock:
+            if self._failures:
+                status = self._failures.pop(0)
+                return status, {"status": 0, "errors": [f"injected failure {status}"]}, {}
+            if self.error_rate and self._random.random() < self.error_rate:
+                return 500, {"status": 0, "errors": ["random failure"]}, {}
+            if self.app_remaining is not None:
+                if self.app_remaining <= 0:
+                    payload = {"status": 0, "errors": ["application is over quota"]}
+                    return 429, payload, self._limit_headers()
+                self.app_remaining -= 1
+            self.requests.append(fields)
+            if attachment is not None:
+                self.attachments.append(attachment)
+            headers = self._limit_headers()
+            request_id = f"fake-{len(self.requests)}"
+        if not fields.get("token") or not fields.get("user") or fields["user"] in self.invalid_users:
+            return 400, {"status": 0, "errors": ["token or user is invalid"]}, headers
+        if not fields.get("message"):
+            return 400, {"status": 0, "errors": ["message cannot be blank"]}, headers
+        if fields.get("device") and fields["user"] in self.devices and \
+                not set(fields["device"].split(",")) <= set(self.devices[fields["user"]]):
+            return 400, {"status": 0, "device": "invalid",
+                         "errors": ["device name is not valid for user"]}, headers
+        if attachment is not None and len(attachment.data) > 2621440:
+            return 400, {"status": 0, "errors": ["attachment is too large"]}, headers
+        if fields.get("priority") == "2":
+            return self._emergency(fields, request_id, headers)
+        return 200, {"status": 1, "request": request_id}, headers
+
+    def _validate_user(self, fields: Dict[str, str]):
+        """ユーザーキーと登録済みデバイスを返す"""
+        with self._lock:
+            self.validations += 1
+            if self._failures:
+                status = self._failures.pop(0)
+                return status, {"status": 0, "errors": [f"injected failure {status}"]}, {}
+        if not fields.get("token"):
+            return 400, {"status": 0, "token": "invalid",
+                         "errors": ["application token is invalid"]}, {}
+        user = fields.get("user")
+        if not user or user in self.invalid_users:
+            return 400, {"status": 0, "user": "invalid", "errors": ["user key is invalid"]}, {}
+        devices = self.devices.get(user, DEFAULT_DEVICES)
+        if fields.get("device") and fields["device"] not in devices:
+            return 400, {"status": 0, "device": "invalid",
+                         "errors": ["device name is not valid for user"]}, {}
+        return 200, {"status": 1, "group": 0, "devices": list(devices),
+                     "licenses": ["Android"], "request": "fake-validate"}, {}
+
+    def _emergency(self, fields: Dict[str, str], request_id: str, headers: Dict[str, str]):
+        """緊急の通知を検証し、レシートを発行する"""
+        if not fields.get("retry") or not fields.get("expire"):
+            return 400, {"status": 0, "errors": ["retry and expire are required"]}, headers
+        if int(fields["retry"]) < 30:
+            return 400, {"status": 0, "errors": ["retry must be at least 30 seconds"]}, headers
+        if int(fields["expire"]) > 10800:
+            return 400, {"status": 0, "errors": ["expire must be at most 10800 seconds"]}, headers
+        now = int(time.time())
+        with self._lock:
+            receipt = f"r{len(self.receipts) + 1:029d}"
+            self.receipts[receipt] = {
+                "acknowledged": 0,
+                "acknowledged_at": 0,
+                "acknowledged_by": "",
+                "acknowledged_by_device": "",
+                "last_delivered_at": now,
+                "expired": 0,
+                "expires_at": now + int(fields["expire"]),
+                "called_back": 0,
+                "called_back_at": 0,
+            }
+        return 200, {"status": 1, "request": request_id, "receipt": receipt}, headers
+
+    def start(self) -> "FakePushoverServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakePushoverServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,310 @@
+"""
+Pushover CLI キー検証モジュール
+
+/1/users/validate.json の結果を TTL 付きでキャッシュし、無効なユーザーキーや
+デバイス名への送信を API に問い合わせずに拒否する
+"""
+
+import collections
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from .core import PushoverCLI, SendResult
+from .errors import PushoverError, PushoverRequestError
+from .ratelimit import parse_limit_headers
+
+
+DEFAULT_VALIDATION_PATH = "~/.cache/pushover-cli/validation.sqlite3"
+
+# 有効なキーの結果を保持する秒数（デバイスの追加・削除はこの間反映されない）
+DEFAULT_TTL = 24 * 3600
+# 無効なキーの結果を保持する秒数
+DEFAULT_NEGATIVE_TTL = 3600
+
+# 送信がこのステータスで失敗した宛先は検証結果を破棄する（429 を除く 4xx）
+_REJECTED_STATUSES = frozenset(range(400, 500)) - {429}
+
+
+class UserValidation(NamedTuple):
+    """ユーザー／グループキーの検証結果"""
+
+    valid: bool
+    # 登録済みのデバイス名
+    devices: Tuple[str, ...] = ()
+    group: bool = False
+    # 無効な場合の API のエラーメッセージ
+    error: Optional[str] = None
+
+    def check_device(self, device: Optional[str]) -> Optional[str]:
+        """device（カンマ区切り可）に登録されていないものがあればその理由を返す
+
+        グループキーと、デバイスの一覧が返らなかったキーは確認しない。
+        """
+        if not device or self.group or not self.devices:
+            return None
+        unknown = [name for name in device.split(",") if name.strip() not in self.devices]
+        if unknown:
+            return f"デバイス {', '.join(unknown)} は登録されていません（登録済み: {', '.join(self.devices)}）"
+        return None
+
+
+def validation_key(token: str, user: str) -> str:
+    """(token, user) のハッシュ（キャッシュファイルにキーを平文で残さない）"""
+    return hashlib.blake2b(f"{token}\x1f{user}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class MemoryValidationStore:
+    """プロセス内の LRU キャッシュ（スレッドセーフ）"""
+
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self._entries: "collections.OrderedDict[str, Tuple[float, UserValidation]]"
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[UserValidation]:
+        """有効期限内の結果（なければ None）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, validation: UserValidation, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, validation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteValidationStore:
+    """プロセス間で共有できる SQLite ファイルのストア
+
+    別々の CLI 起動や pushover broadcast のワーカーの間で検証結果を共有する。
+    """
+
+    # この回数の登録ごとに期限切れの行を削除する
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str = DEFAULT_VALIDATION_PATH):
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(
+            self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS validation ("
+            "key TEXT PRIMARY KEY, expires REAL NOT NULL, valid INTEGER NOT NULL, "
+            "devices TEXT NOT NULL, grp INTEGER NOT NULL, error TEXT)"
+        )
+
+    def get(self, key: str) -> Optional[UserValidation]:
+        """有効期限内の結果（なければ None）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT valid, devices, grp, error FROM validation WHERE key = ? AND expires > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        valid, devices, group, error = row
+        return UserValidation(bool(valid), tuple(filter(None, devices.split(","))), bool(group), error)
+
+    def set(self, key: str, validation: UserValidation, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO validation (key, expires, valid, devices, grp, error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, now + ttl, int(validation.valid), ",".join(validation.devices),
+                 int(validation.group), validation.error)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM validation WHERE expires <= ?", (now,))
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM validation WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class UserValidator:
+    """/1/users/validate.json の結果を TTL 付きでキャッシュする検証器
+
+    デバイス名を付けずに検証して登録済みデバイスの一覧を保存するため、
+    同じキーへの別のデバイス名もリクエストなしで確認できる。
+    """
+
+    def __init__(
+        self,
+        client: PushoverCLI,
+        store=None,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL
+    ):
+        """
+        Args:
+            client: 検証に使うクライアント（送信と同じ接続プールを使う）
+            store: 結果の保存先（省略時は MemoryValidationStore）
+            ttl: 有効なキーの結果を保持する秒数
+            negative_ttl: 無効なキーの結果を保持する秒数
+        """
+        self.client = client
+        self.store = store if store is not None else MemoryValidationStore()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # API に問い合わせた回数
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _key(self, user: Optional[str]) -> str:
+        return validation_key(self.client.token, user or self.client.user)
+
+    def validate(self, user: Optional[str] = None, refresh: bool = False) -> UserValidation:
+        """
+        キーを検証（キャッシュに有効期限内の結果があれば問い合わせない）
+
+        Raises:
+            PushoverRequestError: トークンが無効な場合など、キー以外の理由で検証できない場合
+            PushoverServerError / PushoverConnectionError: 一時的な失敗（結果は保存しない）
+        """
+        key = self._key(user)
+        if not refresh:
+            cached = self.store.get(key)
+            if cached is not None:
+                return cached
+        with self._lock:
+            self.requests += 1
+        try:
+            response = self.client.validate_user(user)
+        except PushoverRequestError as e:
+            if e.response.get("user") != "invalid":
+                raise
+            validation = UserValidation(False, error=str(e))
+            self.store.set(key, validation, self.negative_ttl)
+            return validation
+        validation = UserValidation(
+            True, tuple(response.get("devices") or ()), bool(response.get("group"))
+        )
+        self.store.set(key, validation, self.ttl)
+        return validation
+
+    def check(self, user: Optional[str] = None, device: Optional[str] = None) -> Optional[str]:
+        """
+        送信前の確認。送信しても失敗することが分かっている場合はその理由を返す
+
+        一時的な失敗などで検証できない場合は None（送信して API の判断に任せる）。
+        """
+        try:
+            validation = self.validate(user)
+        except PushoverError:
+            return None
+        if not validation.valid:
+            return f"ユーザーキーが無効です: {validation.error}"
+        return validation.check_device(device)
+
+    def forget(self, user: Optional[str] = None) -> None:
+        """キーの検証結果を破棄（次回は API に問い合わせる）"""
+        self.store.forget(self._key(user))
+
+
+class ValidatingPushover:
+    """送信前にキーとデバイス名を検証する PushoverCLI のラッパー
+
+    UserValidator のキャッシュで無効と分かっている宛先には API を呼ばずに失敗を返す。
+    キャッシュ上は有効でも送信が恒久的な失敗（4xx）になった場合は、その宛先の結果を
+    破棄して次回は問い合わせ直す。それ以外の属性は元のクライアントに委譲する。
+
+    使用例:
+        with ValidatingPushover(client, store=SQLiteValidationStore()) as pushover:
+            send_to_many(pushover, roster, "お知らせ")  # 無効なキーは次回から送信しない
+    """
+
+    def __init__(
+        self,
+        client: PushoverCLI,
+        store=None,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL
+    ):
+        self.client = client
+        self.validator = UserValidator(client, store, ttl, negative_ttl)
+        # ローカルで拒否した送信の数
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _check(self, kwargs: Dict[str, Any]) -> Optional[str]:
+        reason = self.validator.check(kwargs.get("user"), kwargs.get("device"))
+        if reason is not None:
+            with self._lock:
+                self.rejected += 1
+        return reason
+
+    def send(self, message: str, **kwargs: Any) -> Dict[str, Any]:
+        """PushoverCLI.send と同じ（無効な宛先は PushoverRequestError）"""
+        kwargs["message"] = message
+        reason = self._check(kwargs)
+        if reason is not None:
+            raise PushoverRequestError(400, [reason])
+        try:
+            return self.client.send(**kwargs)
+        except PushoverRequestError:
+            self.validator.forget(kwargs.get("user"))
+            raise
+
+    def send_notification(self, message: str, **kwargs: Any) -> Tuple[bool, str]:
+        """PushoverCLI.send_notification と同じ（無効な宛先は送信せずに失敗を返す）"""
+        result = self.send_detailed(message, **kwargs)
+        return result.success, result.message
+
+    def send_detailed(self, message: str, **kwargs: Any) -> SendResult:
+        """PushoverCLI.send_detailed と同じ（無効な宛先は attempts が 0 の失敗）"""
+        kwargs["message"] = message
+        reason = self._check(kwargs)
+        if reason is not None:
+            return SendResult(False, f"送信エラー: {reason}", None, None, None,
+                              parse_limit_headers(None), 0)
+        result = self.client.send_detailed(**kwargs)
+        if not result.success and result.status in _REJECTED_STATUSES:
+            # キーやデバイスが削除された可能性があるため、次回は問い合わせ直す
+            self.validator.forget(kwargs.get("user"))
+        return result
+
+    def close(self) -> None:
+        self.validator.store.close()
+        self.client.close()
+
+    def __enter__(self) -> "ValidatingPushover":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
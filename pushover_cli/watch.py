@@ -0,0 +1,347 @@
+"""
+Pushover CLI ログ監視モジュール
+
+ログファイルを追跡し、パターンに一致した行をまとめて通知する
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .core import MAX_MESSAGE_LENGTH, MAX_TITLE_LENGTH, PushoverCLI, truncate_text
+from .ratelimit import RateLimitExceeded, RateLimitScheduler
+
+
+# 1回に読み込むバイト数
+READ_SIZE = 1024 * 1024
+
+# 改行が現れないまま溜められる最大バイト数（超えた分は1行として扱う）
+MAX_LINE_BYTES = 64 * 1024
+
+
+class LogFollower:
+    """ログファイルを tail -F のように追跡する
+
+    ファイルの状態をポーリングし、追記分を行の区切りで切った文字列として返す
+    （1行ずつではなく、読み込んだ分をまとめて返す）。
+    ローテーション（inode の変化）では古いファイルを最後まで読んでから新しいファイルに移り、
+    切り詰め（サイズの縮小）では先頭から読み直す。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        from_start: bool = False,
+        poll_interval: float = 0.25,
+        read_size: int = READ_SIZE
+    ):
+        """
+        Args:
+            path: 追跡するファイル（まだ存在しなくてもよい）
+            from_start: 既存の内容も先頭から読む（False の場合は末尾から追跡）
+            poll_interval: 追記がないときにファイルを確認する間隔（秒）
+            read_size: 1回に読み込むバイト数
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self.read_size = read_size
+        self.rotations = 0
+        self.truncations = 0
+        self._file = None
+        self._pending = b""
+        self._open(seek_end=not from_start)
+
+    def _open(self, seek_end: bool = False) -> bool:
+        try:
+            self._file = open(self.path, "rb", buffering=0)
+        except OSError:
+            self._file = None
+            return False
+        if seek_end:
+            self._file.seek(0, os.SEEK_END)
+        return True
+
+    def take_partial_line(self) -> Optional[str]:
+        """改行で終わっていない読み込み済みの行を返す（なければ None）"""
+        if not self._pending:
+            return None
+        text, self._pending = self._pending.decode("utf-8", "replace") + "\n", b""
+        return text
+
+    def read_available(self) -> Iterator[str]:
+        """現在読める分を行の区切りまで返す（ファイルの末尾に達したら終了）"""
+        if self._file is None and not self._open():
+            return
+        while True:
+            data = self._file.read(self.read_size)
+            if data:
+                cut = data.rfind(b"\n")
+                if cut == -1:
+                    self._pending += data
+                    if len(self._pending) > MAX_LINE_BYTES:
+                        yield self.take_partial_line()
+                    continue
+                text = (self._pending + data[:cut + 1]) if self._pending else data[:cut + 1]
+                self._pending = data[cut + 1:]
+                yield text.decode("utf-8", "replace")
+                continue
+
+            # 末尾に達した: ローテーションと切り詰めを確認する
+            try:
+                current = os.stat(self.path)
+            except OSError:
+                # ローテーション後の新しいファイルがまだ作られていない
+                return
+            opened = os.fstat(self._file.fileno())
+            if (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev):
+                # 古いファイルの最後の行（改行なし）も取りこぼさない
+                pending = self.take_partial_line()
+                if pending:
+                    yield pending
+                self._file.close()
+                self.rotations += 1
+                if not self._open():
+                    return
+                continue
+            if opened.st_size < self._file.tell():
+                self._file.seek(0)
+                self._pending = b""
+                self.truncations += 1
+                continue
+            return
+
+    def follow(self, stop: Optional[threading.Event] = None) -> Iterator[Optional[str]]:
+        """追記を待ちながら読み続ける
+
+        追記がない間は poll_interval ごとに None を返す（呼び出し側の定期処理用）。
+        ``stop`` がセットされると終了する。
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            idle = True
+            for text in self.read_available():
+                idle = False
+                yield text
+            if idle:
+                yield None
+                stop.wait(self.poll_interval)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class PatternMatcher:
+    """複数の正規表現に一致する行を探す
+
+    すべてのパターンを1つの正規表現にまとめて読み込んだ文字列全体を一度に検索し、
+    一致した箇所の行だけを個々のパターンで確認する。一致しない行が大半のログでは、
+    行ごとにパターンを試すより大幅に速い。
+    """
+
+    def __init__(self, patterns: Sequence[str], ignore_case: bool = False):
+        """
+        Raises:
+            re.error: パターンが正規表現として不正な場合
+        """
+        if not patterns:
+            raise ValueError("パターンを1つ以上指定してください")
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        self.patterns = [re.compile(pattern, flags) for pattern in patterns]
+        try:
+            self._combined: Optional[re.Pattern] = re.compile(
+                "|".join(f"(?:{pattern})" for pattern in patterns), flags
+            )
+        except re.error:
+            # インラインフラグなど、まとめられないパターンは1つずつ検索する
+            self._combined = None
+
+    def match_line(self, line: str) -> Optional[int]:
+        """一致した最初のパターンの番号（一致しなければ None）"""
+        for index, pattern in enumerate(self.patterns):
+            if pattern.search(line):
+                return index
+        return None
+
+    def scan(self, text: str) -> Iterator[Tuple[int, str]]:
+        """text（改行区切りの複数行）から一致した行を (パターンの番号, 行) で返す"""
+        if self._combined is None:
+            for line in text.splitlines():
+                index = self.match_line(line)
+                if index is not None:
+                    yield index, line
+            return
+        search = self._combined.search
+        pos = 0
+        length = len(text)
+        while pos < length:
+            found = search(text, pos)
+            if found is None:
+                return
+            start = text.rfind("\n", 0, found.start()) + 1
+            end = text.find("\n", found.start())
+            if end == -1:
+                end = length
+            line = text[start:end]
+            index = self.match_line(line)
+            if index is not None:
+                yield index, line
+            pos = end + 1
+
+
+class _Group:
+    """1つのパターンの未送信の一致"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.count = 0
+        self.samples: List[str] = []
+
+
+class LogWatcher:
+    """一致した行をパターンごとにまとめて通知する
+
+    最初の一致から ``window`` 秒の間の一致を1件の通知（件数と最初の数行）にまとめ、
+    送信は1分あたり ``max_per_minute`` 件までに制限する。制限を超えた分は送信せずに
+    次の機会まで件数を数え続けるため、一致が大量に続いてもメモリ使用量は増えない。
+    """
+
+    def __init__(
+        self,
+        client: PushoverCLI,
+        path: str,
+        patterns: Sequence[str],
+        ignore_case: bool = False,
+        title: Optional[str] = None,
+        window: float = 10.0,
+        max_per_minute: float = 6.0,
+        max_samples: int = 5,
+        **send_kwargs: Any
+    ):
+        """
+        Args:
+            client: 送信に使うクライアント
+            path: 追跡するログファイル
+            patterns: 通知する行の正規表現
+            ignore_case: 大文字と小文字を区別しない
+            title: 通知のタイトル（省略時は "ファイル名: パターン"）
+            window: 一致をまとめる秒数
+            max_per_minute: 1分あたりの最大通知数
+            max_samples: 通知に含める行数
+            **send_kwargs: send_notification のその他の引数（priority, device, sound など）
+        """
+        self.client = client
+        self.path = path
+        self.pattern_texts = list(patterns)
+        self.matcher = PatternMatcher(patterns, ignore_case)
+        self.title = title
+        self.window = window
+        self.max_samples = max_samples
+        self.send_kwargs = send_kwargs
+        # 送信ペースの制御（待たずに送れない場合は次の機会に回す）
+        self.scheduler = RateLimitScheduler(
+            rate=max_per_minute / 60.0, burst=max(1, int(max_per_minute))
+        )
+        self.lines = 0
+        self.matched = 0
+        self.sent = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self._groups: Dict[int, _Group] = {}
+
+    def process(self, text: str) -> int:
+        """読み込んだ文字列を検索し、一致した行数を返す"""
+        self.lines += text.count("\n")
+        matched = 0
+        now = time.monotonic()
+        for index, line in self.matcher.scan(text):
+            group = self._groups.get(index)
+            if group is None:
+                group = self._groups[index] = _Group(now)
+            group.count += 1
+            if len(group.samples) < self.max_samples:
+                group.samples.append(line)
+            matched += 1
+        self.matched += matched
+        return matched
+
+    def build_notification(self, index: int, count: int, samples: List[str]) -> Dict[str, Any]:
+        """まとめた一致を send_notification の引数に変換"""
+        title = self.title or f"{os.path.basename(self.path)}: {self.pattern_texts[index]}"
+        if count > 1:
+            title = f"{title}（{count}件）"
+        lines = [truncate_text(line.strip(), MAX_MESSAGE_LENGTH) for line in samples]
+        if count > len(samples):
+            lines.append(f"…ほか{count - len(samples)}件")
+        message = "\n".join(lines)
+        if len(message) > MAX_MESSAGE_LENGTH and count > len(samples):
+            # 件数の行は残して、それより前を切り詰める
+            suffix = "\n" + lines[-1]
+            message = truncate_text(message[:-len(suffix)], MAX_MESSAGE_LENGTH - len(suffix)) + suffix
+        kwargs = dict(self.send_kwargs)
+        kwargs.update(message=truncate_text(message, MAX_MESSAGE_LENGTH),
+                      title=truncate_text(title, MAX_TITLE_LENGTH))
+        return kwargs
+
+    def flush(self, force: bool = False) -> int:
+        """
+        まとめる期間が過ぎたグループを送信
+
+        Args:
+            force: 期間と送信ペースに関係なくすべて送信する（終了時用）
+
+        Returns:
+            送信した通知の件数
+        """
+        now = time.monotonic()
+        sent = 0
+        for index in sorted(self._groups):
+            group = self._groups[index]
+            if not force:
+                if now - group.started < self.window:
+                    continue
+                try:
+                    self.scheduler.acquire(self.send_kwargs.get("priority", 0), timeout=0)
+                except RateLimitExceeded:
+                    # 送信枠が空くまで一致を数え続ける
+                    continue
+            del self._groups[index]
+            success, response = self.client.send_notification(
+                **self.build_notification(index, group.count, group.samples)
+            )
+            if success:
+                self.sent += 1
+                sent += 1
+            else:
+                self.failed += 1
+                self.last_error = response
+        return sent
+
+    def run(self, stop: Optional[threading.Event] = None, from_start: bool = False,
+            poll_interval: float = 0.25) -> None:
+        """ファイルを追跡し続ける（stop がセットされたら残りを送信して終了）"""
+        follower = LogFollower(self.path, from_start=from_start, poll_interval=poll_interval)
+        try:
+            for text in follower.follow(stop):
+                if text is not None:
+                    self.process(text)
+                self.flush()
+        finally:
+            follower.close()
+            self.flush(force=True)
+
+    def run_once(self) -> None:
+        """ファイルの現在の内容を先頭から検索して送信し、終了する"""
+        follower = LogFollower(self.path, from_start=True)
+        try:
+            for text in follower.read_available():
+                self.process(text)
+            pending = follower.take_partial_line()
+            if pending:
+                self.process(pending)
+        finally:
+            follower.close()
+        self.flush(force=True)
@@ -0,0 +1,432 @@
+"""
+Pushover CLI webhook 受信モジュール
+
+HTTP で受け付けた JSON を send_notification の引数に変換し、共有のクライアントの
+送信キューに登録する（pushover serve）
+"""
+
+import asyncio
+import hmac
+import http
+import json
+import signal
+import sys
+import threading
+import urllib.parse
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .batch import BATCH_FIELDS, parse_batch_item
+from .dispatch import QueuedPushover
+from .templates import (
+    TEMPLATE_FIELDS as TEMPLATE_LIMITS,
+    CompiledTemplate,
+    MessageTemplate,
+    TemplateError,
+    compile_template,
+)
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# リクエスト本文の最大バイト数
+MAX_BODY_SIZE = 1024 * 1024
+
+# webhook で指定できる send_notification の引数
+# （attachment はサーバー上のファイルを読むため受け付けない）
+WEBHOOK_FIELDS = tuple(field for field in BATCH_FIELDS if field != "attachment")
+
+# 設定ファイルのテンプレートで変換するパス（/template/名前）
+TEMPLATE_PATH_PREFIX = "/template/"
+
+_FIELD_LIMITS = {field: limit for field, _, limit in TEMPLATE_LIMITS}
+
+_JSON_HEADERS = b"Content-Type: application/json; charset=utf-8\r\n"
+
+
+class PayloadVariables(Mapping[str, Any]):
+    """JSON の値を "a.b.0.c" 形式のパスで参照する変数（テンプレートの展開用）
+
+    必要なパスだけをその都度たどるため、大きなペイロードでも事前の平坦化は行わない。
+    オブジェクトや配列はJSON文字列として展開する。
+    """
+
+    def __init__(self, payload: Any):
+        self.payload = payload
+
+    def __getitem__(self, path: str) -> Any:
+        value = self.payload
+        for key in path.split("."):
+            if isinstance(value, dict):
+                value = value[key]
+            elif isinstance(value, list):
+                try:
+                    value = value[int(key)]
+                except (ValueError, IndexError):
+                    raise KeyError(path) from None
+            else:
+                raise KeyError(path)
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.payload) if isinstance(self.payload, dict) else iter(())
+
+    def __len__(self) -> int:
+        return len(self.payload) if isinstance(self.payload, dict) else 0
+
+
+class FieldMapping:
+    """受け付けた JSON を send_notification の引数に変換する対応表
+
+    各項目の値はテンプレート文字列で、{a.b.0.c} でペイロード内の値を参照する。
+    例（Alertmanager）:
+        FieldMapping.parse([
+            "title={commonLabels.alertname}",
+            "message={commonAnnotations.summary}",
+            "priority=1",
+        ])
+    """
+
+    def __init__(
+        self,
+        fields: Mapping[str, str],
+        template: Optional[MessageTemplate] = None
+    ):
+        """
+        Args:
+            fields: 引数名とテンプレート文字列
+            template: 先に展開する設定ファイルのテンプレート（fields の値が優先する）
+
+        Raises:
+            TemplateError: 引数名が不明、またはテンプレート文字列の構文エラー
+        """
+        unknown = set(fields) - set(WEBHOOK_FIELDS)
+        if unknown:
+            raise TemplateError(f"対応付けできない項目: {', '.join(sorted(unknown))}")
+        self.template = template
+        self.fields: Dict[str, CompiledTemplate] = {
+            field: compile_template(source) for field, source in fields.items()
+        }
+
+    @classmethod
+    def parse(
+        cls,
+        items: List[str],
+        template: Optional[MessageTemplate] = None
+    ) -> "FieldMapping":
+        """--map の "引数名=テンプレート" のリストから作成
+
+        Raises:
+            TemplateError: "=" を含まない、または引数名・テンプレートが不正な場合
+        """
+        fields = {}
+        for item in items:
+            name, sep, source = item.partition("=")
+            if not sep or not name:
+                raise TemplateError(f"対応は 引数名=テンプレート の形式で指定してください: {item}")
+            fields[name.strip()] = source
+        return cls(fields, template)
+
+    def apply(self, payload: Any) -> Dict[str, Any]:
+        """
+        ペイロードを send_notification の引数に変換
+
+        Raises:
+            ValueError: 参照した値がない、または変換結果が不正な場合
+        """
+        variables = PayloadVariables(payload)
+        kwargs = self.template.render(variables) if self.template is not None else {}
+        for field, compiled in self.fields.items():
+            kwargs[field] = compiled.render(variables, _FIELD_LIMITS.get(field))
+        return parse_batch_item(kwargs, fields=WEBHOOK_FIELDS)
+
+
+class WebhookServer:
+    """webhook を受け付けて送信キューに登録する asyncio の HTTP サーバー
+
+    POST の本文は JSON オブジェクト（1件）または配列（複数件）で、各要素を
+    ``mapping``（省略時は pushover batch の1行と同じ形式）で変換し、送信キューに
+    登録した時点で 202 を返す（実際の送信は QueuedPushover の配送スレッドが行う）。
+    配列の要素に1件でも不正なものがあれば、どれも登録せずに 400 を返す。
+
+    - ``POST /``: mapping で変換
+    - ``POST /template/名前``: 設定ファイルの [template:名前] にペイロードを変数として渡す
+    - ``GET /health``: キューと送信件数
+
+    HTTP/1.1 の keep-alive に対応し、1つのイベントループで多数の接続を処理する。
+    レスポンスは Pushover API と同じく {"status": 1, ...} / {"status": 0, "errors": [...]}。
+    """
+
+    def __init__(
+        self,
+        pushover: QueuedPushover,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        mapping: Optional[FieldMapping] = None,
+        templates: Optional[Mapping[str, MessageTemplate]] = None,
+        secret: Optional[str] = None,
+        max_body_size: int = MAX_BODY_SIZE
+    ):
+        """
+        Args:
+            pushover: 通知を登録する送信キュー（満杯のときに待たない block_timeout=0 を推奨）
+            host: 待ち受けるアドレス
+            port: 待ち受けるポート（0 は空いているポート）
+            mapping: POST / のペイロードの変換（省略時は batch と同じ形式）
+            templates: /template/名前 と "template" フィールドで使うテンプレート
+            secret: 指定すると "Authorization: Bearer <secret>" のないリクエストを拒否する
+            max_body_size: リクエスト本文の最大バイト数
+        """
+        self.pushover = pushover
+        self.host = host
+        self.port = port
+        self.mapping = mapping
+        self.templates = templates or {}
+        self.max_body_size = max_body_size
+        self.accepted = 0
+        self.rejected = 0
+        self._authorization = f"Bearer {secret}".encode("utf-8") if secret else None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """待ち受けているアドレスとポート（port=0 の場合は割り当てられたポート）"""
+        if self._server is not None and self._server.sockets:
+            return self._server.sockets[0].getsockname()[:2]
+        return self.host, self.port
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    def _convert(self, path: str, item: Any) -> Dict[str, Any]:
+        if path == "/":
+            if self.mapping is not None:
+                return self.mapping.apply(item)
+            return parse_batch_item(item, self.templates or None, WEBHOOK_FIELDS)
+        name = urllib.parse.unquote(path[len(TEMPLATE_PATH_PREFIX):])
+        template = self.templates.get(name)
+        if template is None:
+            raise ValueError(f"テンプレート {name} が設定ファイルにありません")
+        return parse_batch_item(template.render(PayloadVariables(item)), fields=WEBHOOK_FIELDS)
+
+    def handle_request(
+        self,
+        method: str,
+        target: str,
+        headers: Mapping[str, str],
+        body: bytes
+    ) -> Tuple[int, Dict[str, Any]]:
+        """
+        1件のリクエストを処理し (ステータスコード, レスポンスの JSON) を返す
+
+        Args:
+            headers: ヘッダ（名前は小文字）
+        """
+        path = target.split("?", 1)[0]
+        if method == "GET" and path in ("/", "/health"):
+            return 200, {
+                "status": 1,
+                "pending": self.pushover.pending,
+                "sent": self.pushover.sent,
+                "failed": self.pushover.failed,
+                "dropped": self.pushover.dropped,
+            }
+        if path != "/" and not path.startswith(TEMPLATE_PATH_PREFIX):
+            return 404, {"status": 0, "errors": [f"不明なパス: {path}"]}
+        if method != "POST":
+            return 405, {"status": 0, "errors": ["POST で送信してください"]}
+        if self._authorization is not None and not hmac.compare_digest(
+            headers.get("authorization", "").encode("utf-8"), self._authorization
+        ):
+            return 401, {"status": 0, "errors": ["認証に失敗しました"]}
+
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            return 400, {"status": 0, "errors": [f"JSONとして不正です: {e}"]}
+        items = payload if isinstance(payload, list) else [payload]
+        notifications = []
+        errors = []
+        for index, item in enumerate(items):
+            try:
+                notifications.append(self._convert(path, item))
+            except (ValueError, TypeError) as e:
+                errors.append(f"{index}: {e}" if isinstance(payload, list) else str(e))
+        if errors:
+            self.rejected += len(items)
+            return 400, {"status": 0, "errors": errors}
+
+        queued = 0
+        for kwargs in notifications:
+            success, response = self.pushover.send_notification(kwargs.pop("message"), **kwargs)
+            if not success:
+                self.accepted += queued
+                self.rejected += len(notifications) - queued
+                return 503, {"status": 0, "queued": queued, "errors": [response]}
+            queued += 1
+        self.accepted += queued
+        return 202, {"status": 1, "queued": queued}
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(_encode_response(400, {"status": 0, "errors": ["不正なリクエスト"]},
+                                                  False))
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.1":
+                    keep_alive = connection != "close"
+                else:
+                    keep_alive = connection == "keep-alive"
+
+                if "transfer-encoding" in headers:
+                    writer.write(_encode_response(
+                        411, {"status": 0, "errors": ["Content-Length を指定してください"]}, False
+                    ))
+                    return
+                try:
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= self.max_body_size:
+                    writer.write(_encode_response(
+                        413, {"status": 0, "errors": [f"本文は {self.max_body_size} バイトまでです"]},
+                        False
+                    ))
+                    return
+                if length and headers.get("expect", "").lower() == "100-continue":
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+
+                status, payload = self.handle_request(method, target, headers, body)
+                writer.write(_encode_response(status, payload, keep_alive))
+                if not keep_alive:
+                    return
+                # 書き込みが溜まっている場合だけ待つ（通常はすぐに戻る）
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start_serving(self) -> None:
+        """現在のイベントループで待ち受けを開始"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+
+    async def stop_serving(self) -> None:
+        """待ち受けを止める（処理中のリクエストは打ち切る）"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def start(self) -> None:
+        """バックグラウンドのスレッドでイベントループを起動し、待ち受けを開始"""
+        started = threading.Event()
+        failure: List[BaseException] = []
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            self._loop = loop
+            try:
+                loop.run_until_complete(self.start_serving())
+            except BaseException as e:
+                failure.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+                loop.run_until_complete(self.stop_serving())
+            finally:
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name="pushover-webhook", daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            raise failure[0]
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """
+        受付を止め、登録済みの通知を送信してから終了
+
+        Returns:
+            timeout 内にすべて送信できた場合は True
+        """
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+        return self.pushover.close(timeout)
+
+    def serve_forever(self) -> None:
+        """SIGINT/SIGTERM を受けるまで現在のスレッドで動作し、登録済みの通知を送信してから終了"""
+
+        async def run() -> None:
+            stop_event = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(signum, stop_event.set)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            await self.start_serving()
+            print(f"🚀 webhook の受け付けを開始しました: {self.url}", file=sys.stderr, flush=True)
+            try:
+                await stop_event.wait()
+            finally:
+                await self.stop_serving()
+
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.pushover.close()
+
+
+def _status_line(status: int) -> bytes:
+    return f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n".encode("ascii")
+
+
+_STATUS_LINES = {status: _status_line(status) for status in (200, 202, 400, 401, 404, 405,
+                                                             411, 413, 503)}
+
+
+def _encode_response(status: int, payload: Dict[str, Any], keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return b"".join((
+        _STATUS_LINES.get(status) or _status_line(status),
+        _JSON_HEADERS,
+        b"Content-Length: ", str(len(body)).encode("ascii"), b"\r\n",
+        b"" if keep_alive else b"Connection: close\r\n",
+        b"\r\n",
+        body,
+    ))
@@ -0,0 +1,78 @@
+"""
+AsyncPushoverCLI のテスト
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pushover_cli.aio import AsyncPushoverCLI
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_async_send_notification():
+    """非同期で1件送信できること"""
+    async def run():
+        async with AsyncPushoverCLI("token", "user", api_url=server.url) as client:
+            return await client.send_notification("hello", title="async")
+
+    with FakePushoverServer() as server:
+        success, message = asyncio.run(run())
+    assert success, message
+    assert server.messages[0]["title"] == "async"
+
+
+def test_send_many_preserves_order_and_reuses_connections():
+    """send_many が入力順の結果を返し、接続数が上限内に収まること"""
+    async def run():
+        async with AsyncPushoverCLI("token", "user", api_url=server.url, pool_size=4) as client:
+            messages = [f"message {i}" for i in range(30)]
+            messages.append({"message": "", "title": "empty"})
+            return await client.send_many(messages, concurrency=4)
+
+    with FakePushoverServer() as server:
+        results = asyncio.run(run())
+    assert len(results) == 31
+    assert all(success for success, _ in results[:30])
+    assert server.connections <= 4
+    assert sorted(m["message"] for m in server.messages if m["message"]) == sorted(
+        f"message {i}" for i in range(30)
+    )
+
+
+def test_send_many_runs_concurrently():
+    """同時送信により往復遅延が重ならないこと"""
+    async def run():
+        async with AsyncPushoverCLI("token", "user", api_url=server.url, pool_size=10) as client:
+            return await client.send_many([f"m{i}" for i in range(20)], concurrency=10)
+
+    with FakePushoverServer(latency=0.1) as server:
+        started = time.monotonic()
+        results = asyncio.run(run())
+        elapsed = time.monotonic() - started
+    assert all(success for success, _ in results)
+    # 逐次送信なら 2 秒以上かかる
+    assert elapsed < 1.0
+
+
+def test_handshake_timeout():
+    """TLS ハンドシェイクが応答しない場合も timeout で失敗すること"""
+    async def run():
+        client = AsyncPushoverCLI("token", "user", api_url=f"https://127.0.0.1:{port}",
+                                  timeout=0.3)
+        async with client:
+            return await client.send_many(["a", "b"])
+
+    # 接続は受け付けるが何も応答しないサーバー
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(8)
+        port = listener.getsockname()[1]
+        started = time.monotonic()
+        results = asyncio.run(run())
+    assert time.monotonic() - started < 3
+    assert all(not success and "タイムアウト" in message for success, message in results)
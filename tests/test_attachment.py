@@ -0,0 +1,119 @@
+"""
+添付ファイル（multipart/form-data）送信のテスト
+"""
+
+import mmap
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.attachment import (
+    MAX_ATTACHMENT_SIZE,
+    Attachment,
+    AttachmentError,
+    MultipartBody,
+    prepare_attachment,
+)
+from pushover_cli.core import PushoverCLI
+from pushover_cli.testing import FakePushoverServer
+
+
+def write_image(path, size):
+    data = bytes(range(256)) * (size // 256) + b"\x00" * (size % 256)
+    path.write_bytes(data)
+    return data
+
+
+def test_send_streams_file_attachment(tmp_path):
+    """ファイルの内容がそのまま multipart で届くこと"""
+    image = tmp_path / "graph.png"
+    data = write_image(image, 300 * 1024 + 7)
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            success, message = client.send_notification("CPU 使用率", title="グラフ",
+                                                        attachment=str(image))
+            # 同じ接続で通常の送信も続けられること
+            assert client.send_notification("next")[0]
+    assert success, message
+    assert server.messages[0]["message"] == "CPU 使用率"
+    assert server.messages[0]["title"] == "グラフ"
+    received = server.attachments[0]
+    assert (received.filename, received.content_type) == ("graph.png", "image/png")
+    assert received.data == data
+    assert server.connections == 1
+
+
+def test_send_from_mmap(tmp_path):
+    """mmap の内容をコピーせずに送信できること"""
+    image = tmp_path / "snapshot.jpg"
+    data = write_image(image, 100 * 1024)
+    with open(image, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        attachment = Attachment(data=mapped, filename="snapshot.jpg")
+        with FakePushoverServer() as server:
+            with PushoverCLI("token", "user", api_url=server.url) as client:
+                assert client.send_notification("snap", attachment=attachment)[0]
+            assert server.attachments[0].data == data
+        attachment.data.release()
+
+
+def test_multipart_length_matches_body(tmp_path):
+    """Content-Length に使う長さと実際の本文が一致し、繰り返し生成できること"""
+    image = tmp_path / "a.gif"
+    write_image(image, 5000)
+    body = MultipartBody({"token": "t", "message": "日本語"}, Attachment(path=str(image)),
+                         chunk_size=1024)
+    first = b"".join(bytes(chunk) for chunk in body)
+    assert len(first) == len(body)
+    assert b"".join(bytes(chunk) for chunk in body) == first
+
+
+def test_oversized_attachment_is_rejected_before_sending(tmp_path):
+    """上限を超える添付ファイルは接続せずにエラーになること"""
+    image = tmp_path / "huge.png"
+    write_image(image, MAX_ATTACHMENT_SIZE + 1)
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            success, message = client.send_notification("big", attachment=str(image))
+    assert not success and message.startswith("添付エラー")
+    assert server.connections == 0
+
+    with pytest.raises(AttachmentError):
+        prepare_attachment(str(tmp_path / "missing.png"))
+
+
+def test_resizer_hook_shrinks_attachment(tmp_path):
+    """上限を超えた場合は縮小関数の結果が送信されること"""
+    image = tmp_path / "huge.png"
+    write_image(image, MAX_ATTACHMENT_SIZE + 1)
+    calls = []
+
+    def resizer(attachment, max_size):
+        calls.append((attachment.filename, max_size))
+        return Attachment(data=b"small", filename="huge.jpg")
+
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url, attachment_resizer=resizer) as client:
+            assert client.send_notification("big", attachment=str(image))[0]
+    assert calls == [("huge.png", MAX_ATTACHMENT_SIZE)]
+    assert server.attachments[0] == ("huge.jpg", "image/jpeg", b"small")
+
+
+def test_cli_attachment_option(tmp_path):
+    """--attachment で添付して送信できること"""
+    image = tmp_path / "graph.png"
+    data = write_image(image, 2048)
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        result = subprocess.run(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+             "-m", "graph", "--attachment", str(image), "--config", str(tmp_path / "none")],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+    assert result.returncode == 0, result.stderr
+    assert server.attachments[0].data == data
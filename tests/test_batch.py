@@ -0,0 +1,91 @@
+"""
+バッチ送信（pushover batch）のテスト
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.batch import run_batch
+from pushover_cli.core import PushoverCLI
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_run_batch_writes_one_result_per_line_in_order():
+    """入力行ごとに入力順で結果が出力されること"""
+    lines = [json.dumps({"message": f"m{i}", "priority": -1}) + "\n" for i in range(20)]
+    lines.insert(5, "\n")
+    lines.insert(10, "{broken\n")
+    output = io.StringIO()
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url, pool_size=4) as client:
+            succeeded, failed = run_batch(client, lines, output, concurrency=4)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert (succeeded, failed) == (20, 1)
+    assert [r["line"] for r in results] == [n for n in range(1, 23) if n != 6]
+    assert results[9]["line"] == 11 and not results[9]["success"]
+    assert len(server.messages) == 20
+    assert server.connections <= 4
+
+
+def test_run_batch_reports_invalid_field_types():
+    """型が不正な行は入力エラーとして報告し、後続の行の送信を続けること"""
+    lines = [
+        json.dumps({"message": "a"}),
+        json.dumps({"message": "b", "priority": None}),
+        json.dumps({"message": "c", "priority": [1]}),
+        json.dumps({"message": "d", "priority": "high"}),
+        json.dumps({"message": "e", "priority": "1"}),
+        json.dumps({"message": "f", "priority": 2, "retry_interval": None}),
+        json.dumps({"message": "g", "priority": 2, "retry_interval": 10}),
+        json.dumps({"message": "h", "priority": 2, "expire": 86400}),
+        json.dumps({"message": "i", "priority": 2, "retry_interval": 30, "expire": "600"}),
+        json.dumps({"message": "j", "attachment": 5}),
+    ]
+    output = io.StringIO()
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            succeeded, failed = run_batch(client, lines, output, concurrency=2)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert (succeeded, failed) == (3, 7)
+    assert [r["success"] for r in results] == [True, False, False, False, True,
+                                               False, False, False, True, False]
+    assert all("priority" in r["message"] for r in results[1:4])
+    assert all("retry_interval" in r["message"] for r in results[5:7])
+    assert "expire" in results[7]["message"]
+    assert "attachment" in results[9]["message"]
+    assert sorted(m["message"] for m in server.messages) == ["a", "e", "i"]
+
+
+def test_batch_command_reads_stdin():
+    """pushover batch が標準入力を読み込んで送信すること"""
+    stdin = "\n".join(json.dumps({"message": f"m{i}", "title": "t"}) for i in range(3))
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        result = subprocess.run(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()", "batch"],
+            input=stdin, capture_output=True, text=True, env=env, cwd=ROOT
+        )
+    assert result.returncode == 0, result.stderr
+    assert len(result.stdout.splitlines()) == 3
+    assert len(server.messages) == 3
+
+
+def test_batch_command_rejects_invalid_concurrency():
+    """--concurrency が1未満ならエラーメッセージを表示して終了すること"""
+    env = dict(os.environ, PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+    result = subprocess.run(
+        [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+         "batch", "--concurrency", "0"],
+        input="", capture_output=True, text=True, env=env, cwd=ROOT
+    )
+    assert result.returncode == 1
+    assert result.stderr.startswith("エラー: --concurrency")
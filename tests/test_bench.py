@@ -0,0 +1,51 @@
+"""
+ベンチマーク（python -m pushover_cli.bench）とスタンドインサーバーのテスト
+"""
+
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.bench import SCENARIOS, compare_results, main, run_benchmarks
+from pushover_cli.core import PushoverCLI
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_fake_server_error_rate_is_reproducible():
+    """同じシードなら同じリクエストが失敗すること"""
+    outcomes = []
+    for _ in range(2):
+        with FakePushoverServer(error_rate=0.5, seed=1) as server:
+            with PushoverCLI("token", "user", api_url=server.url) as client:
+                outcomes.append([client.send_notification(f"m{i}")[0] for i in range(20)])
+    assert outcomes[0] == outcomes[1]
+    assert 0 < outcomes[0].count(False) < 20
+
+
+def test_run_benchmarks_reports_every_scenario():
+    """すべてのシナリオの結果が JSON にできる形で返ること"""
+    report = run_benchmarks(list(SCENARIOS), count=5, concurrency=2, cli_runs=1, app_limit=1000)
+    assert set(report["results"]) == set(SCENARIOS)
+    assert report["results"]["sequential"]["failed"] == 0
+    assert report["results"]["concurrent"]["per_second"] > 0
+    assert report["results"]["memory"]["bytes_per_message"] > 0
+    json.dumps(report)
+
+
+def test_main_writes_output_and_compares(tmp_path, capsys):
+    """--output で書き出した結果と --compare で比較できること"""
+    before = tmp_path / "before.json"
+    main(["--scenarios", "sequential", "--count", "3", "--output", str(before)])
+    main(["--scenarios", "sequential", "--count", "3", "--compare", str(before)])
+    captured = capsys.readouterr()
+    assert json.loads(captured.out)["results"]["sequential"]["count"] == 3
+    assert "sequential.per_second" in captured.err
+
+    lines = compare_results(
+        {"results": {"single": {"p50_ms": 10.0}}},
+        {"results": {"single": {"p50_ms": 5.0, "count": 3}}},
+    )
+    assert lines == ["single.p50_ms: 10.000 -> 5.000 (-50.0%)"]
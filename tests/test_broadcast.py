@@ -0,0 +1,70 @@
+"""
+一斉送信（pushover broadcast）のテスト
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.broadcast import read_recipients, run_broadcast
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_broadcast_across_processes():
+    """宛先を複数のプロセスに分けて送信し、入力順の結果と進捗を返すこと"""
+    users = [f"user{i}" for i in range(300)] + ["user0", "bad"]
+    progress = []
+    streamed = []
+    with FakePushoverServer() as server:
+        server.invalid_users.add("bad")
+        report = run_broadcast(
+            "token", users, "お知らせ", processes=3, threads=2, chunk_size=50,
+            api_url=server.url, on_result=streamed.append, on_progress=progress.append,
+            title="月次", priority=-1
+        )
+    assert [result.user for result in report] == [f"user{i}" for i in range(300)] + ["bad"]
+    assert [result.user for result in report.failed] == ["bad"]
+    assert len(streamed) == 301
+    assert progress[-1].done == progress[-1].total == 301
+    assert progress[-1].failed == 1
+    assert len(server.messages) == 301
+    assert {m["title"] for m in server.messages} == {"月次"}
+    # ワーカーは接続を保持してタスクの間で使い回す
+    assert server.connections <= 3 * 2
+
+
+def test_broadcast_shares_rate_limit_between_workers():
+    """送信ペースが全ワーカーの合計で守られること"""
+    with FakePushoverServer() as server:
+        started = time.monotonic()
+        report = run_broadcast("token", [f"u{i}" for i in range(40)], "m", processes=4,
+                               rate=50, burst=5, chunk_size=5, api_url=server.url)
+        elapsed = time.monotonic() - started
+    assert report.all_succeeded
+    # 最初の5件以降は毎秒50件: 35 / 50 = 0.7秒以上
+    assert elapsed >= 0.65
+
+
+def test_broadcast_command(tmp_path):
+    """pushover broadcast が宛先ファイルの全員に送信すること"""
+    recipients = tmp_path / "users.txt"
+    recipients.write_text("# 月次のお知らせ\nu1, u2\nu3  # 管理者\n\n", encoding="utf-8")
+    assert read_recipients(recipients.read_text(encoding="utf-8").splitlines()) == ["u1", "u2", "u3"]
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        result = subprocess.run(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()", "broadcast",
+             str(recipients), "-m", "メンテナンスのお知らせ", "--processes", "2"],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+    assert result.returncode == 0, result.stderr
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert sorted(line["user"] for line in lines) == ["u1", "u2", "u3"]
+    assert "送信完了: 成功 3 件" in result.stderr
+    assert sorted(m["user"] for m in server.messages) == ["u1", "u2", "u3"]
@@ -0,0 +1,208 @@
+"""
+PushoverCLI コアモジュールのテスト
+
+ローカルのスタンドインサーバーに対して送信処理を検証する
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pushover_cli.core import PushoverCLI, raise_for_response
+from pushover_cli.errors import PushoverConnectionError, PushoverRequestError, PushoverServerError
+from pushover_cli.ratelimit import RateLimitExceeded, RateLimitScheduler, RateLimitState
+from pushover_cli.retry import RetryPolicy
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_send_notification_success():
+    """スタンドインサーバーへの送信が成功すること"""
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            success, message = client.send_notification("hello", title="t", priority=1)
+    assert success, message
+    assert server.messages[0]["message"] == "hello"
+    assert server.messages[0]["title"] == "t"
+    assert server.messages[0]["priority"] == "1"
+
+
+def test_connection_reused_between_sends():
+    """連続送信で接続が再利用されること"""
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            for i in range(5):
+                success, _ = client.send_notification(f"message {i}")
+                assert success
+    assert len(server.messages) == 5
+    assert server.connections == 1
+
+
+def test_reconnect_after_server_restart():
+    """サーバー側で閉じられた接続は自動的に張り直されること"""
+    with FakePushoverServer() as server:
+        client = PushoverCLI("token", "user", api_url=server.url)
+        assert client.send_notification("first")[0]
+        # アイドル接続をソケットレベルで切断する
+        conn, _ = client.pool._idle[0]
+        conn.sock.close()
+        assert client.send_notification("second")[0]
+        client.close()
+    assert len(server.messages) == 2
+
+
+def test_disconnect_after_request_is_not_resent():
+    """リクエストを書き込んだ後の切断はプールでは再送せず、RetryPolicy に任せること"""
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            assert client.send_notification("first")[0]
+            server.inject_failures(0)
+            success, message = client.send_notification("second")
+            assert not success and "接続エラー" in message
+        assert [m["message"] for m in server.messages] == ["first"]
+
+        retry = RetryPolicy(max_attempts=2, base_delay=0.01)
+        with PushoverCLI("token", "user", api_url=server.url, retry=retry) as client:
+            assert client.send_notification("third")[0]
+            server.inject_failures(0)
+            assert client.send_notification("fourth")[0]
+    assert [m["message"] for m in server.messages] == ["first", "third", "fourth"]
+
+def test_pool_is_thread_safe():
+    """複数スレッドから同じインスタンスで送信できること"""
+    with FakePushoverServer() as server:
+        client = PushoverCLI("token", "user", api_url=server.url, pool_size=4)
+        results = []
+
+        def worker():
+            for _ in range(10):
+                results.append(client.send_notification("threaded")[0])
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client.close()
+    assert len(results) == 40 and all(results)
+    assert len(server.messages) == 40
+
+
+def test_connection_error_is_reported():
+    """接続できない場合はエラーメッセージを返すこと"""
+    client = PushoverCLI("token", "user", api_url="http://127.0.0.1:1", timeout=1)
+    success, message = client.send_notification("unreachable")
+    assert not success
+    assert message.startswith("接続エラー")
+
+
+def test_rate_limit_headers_are_tracked():
+    """X-Limit-App-* ヘッダが送信枠の状態に反映されること"""
+    with FakePushoverServer(app_limit=100) as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            client.send_notification("one")
+            client.send_notification("two")
+    assert client.rate_limit.limit == 100
+    assert client.rate_limit.remaining == 98
+    assert client.rate_limit.reset == server.app_reset
+
+
+def test_low_priority_refused_when_budget_is_low():
+    """送信枠が少ないときは低優先度の通知から拒否されること"""
+    with FakePushoverServer(app_limit=10) as server:
+        scheduler = RateLimitScheduler(rate=1000, burst=1000)
+        with PushoverCLI("token", "user", api_url=server.url, scheduler=scheduler) as client:
+            for _ in range(9):
+                assert client.send_notification("fill", priority=0)[0]
+            success, message = client.send_notification("quiet", priority=-2)
+            assert not success and message.startswith("レート制限")
+            # 緊急の通知は残り枠があれば送信される
+            assert client.send_notification("page", priority=2)[0]
+    assert server.messages[-1]["message"] == "page"
+
+
+def test_429_sets_backoff():
+    """HTTP 429 を受けるとバックオフ期間が設定されること"""
+    state = RateLimitState()
+    state.record_response(429, {"Retry-After": "2"})
+    assert state.backoff_until > time.time() + 1
+    scheduler = RateLimitScheduler(state=state)
+    with pytest.raises(RateLimitExceeded):
+        scheduler.acquire(priority=1, timeout=0.1)
+
+
+def test_token_bucket_paces_sends():
+    """バースト分を使い切った後は rate に従って待たされること"""
+    scheduler = RateLimitScheduler(rate=20, burst=2)
+    started = time.monotonic()
+    for _ in range(6):
+        scheduler.acquire()
+    # 2件はバースト、残り4件は 1/20 秒ずつ
+    assert time.monotonic() - started >= 0.18
+
+
+def test_retry_recovers_from_transient_failures():
+    """5xx と切断は再試行され、同じ接続プールで成功すること"""
+    with FakePushoverServer() as server:
+        server.inject_failures(503, 0, 502)
+        retry = RetryPolicy(max_attempts=4, base_delay=0.01)
+        with PushoverCLI("token", "user", api_url=server.url, retry=retry) as client:
+            response = client.send("eventually")
+    assert response["status"] == 1
+    assert [m["message"] for m in server.messages] == ["eventually"]
+
+
+def test_permanent_errors_are_not_retried():
+    """4xx は再試行せずに PushoverRequestError になること"""
+    with FakePushoverServer() as server:
+        server.inject_failures(400, 503)
+        retry = RetryPolicy(max_attempts=5, base_delay=0.01)
+        with PushoverCLI("token", "user", api_url=server.url, retry=retry) as client:
+            with pytest.raises(PushoverRequestError) as excinfo:
+                client.send("bad")
+            assert not excinfo.value.retryable
+            assert excinfo.value.status == 400
+            # 次の送信には注入した 503 が残っている（400 で再試行していない）
+            assert client.send("good")["status"] == 1
+
+
+def test_errors_are_classified_by_status():
+    """JSONでない本文でも 4xx は恒久的、5xx は一時的な失敗に分類されること"""
+    for status, body, error in (
+        (403, b"<html>Forbidden</html>", PushoverRequestError),
+        (404, b"", PushoverRequestError),
+        (502, b"<html>Bad Gateway</html>", PushoverServerError),
+        (200, b"<html></html>", PushoverServerError),
+    ):
+        with pytest.raises(error) as excinfo:
+            raise_for_response(status, body)
+        assert excinfo.value.errors == [f"HTTP {status}"]
+
+def test_retry_gives_up_after_max_attempts():
+    """試行回数を使い切ると最後の一時的エラーが送出されること"""
+    with FakePushoverServer() as server:
+        server.inject_failures(500, 500, 500, 500)
+        retry = RetryPolicy(max_attempts=2, base_delay=0.01)
+        with PushoverCLI("token", "user", api_url=server.url, retry=retry) as client:
+            with pytest.raises(PushoverServerError):
+                client.send("down")
+            success, message = client.send_notification("still down")
+    assert not success and message.startswith("送信エラー")
+
+
+def test_retry_respects_deadline():
+    """期限内に待てない場合は再試行しないこと"""
+    policy = RetryPolicy(max_attempts=10, base_delay=100, max_delay=100, deadline=0.01)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise PushoverConnectionError("timeout")
+
+    with pytest.raises(PushoverConnectionError):
+        policy.call(fail, sleep=lambda _: None)
+    assert len(calls) <= 2
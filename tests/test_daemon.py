@@ -0,0 +1,124 @@
+"""
+通知デーモン（pushover daemon / send --via-daemon）のテスト
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import PushoverCLI
+from pushover_cli.daemon import NotificationDaemon, send_via_daemon
+from pushover_cli.errors import PushoverConnectionError
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_daemon_delivers_enqueued_messages(tmp_path):
+    """デーモン経由の通知が非同期に配送されること"""
+    socket_path = str(tmp_path / "daemon.sock")
+    with FakePushoverServer(latency=0.05) as server:
+        daemon = NotificationDaemon(
+            PushoverCLI("token", "user", api_url=server.url), socket_path=socket_path
+        )
+        daemon.start()
+        try:
+            started = time.monotonic()
+            for i in range(5):
+                send_via_daemon({"message": f"m{i}", "priority": 1}, socket_path)
+            # 配送（1件 50ms）を待たずに戻ること
+            assert time.monotonic() - started < 0.2
+            with pytest.raises(ValueError):
+                send_via_daemon({"title": "no message"}, socket_path)
+            with pytest.raises(ValueError):
+                send_via_daemon({"message": "x", "priority": None}, socket_path)
+        finally:
+            daemon.stop()
+    assert daemon.sent == 5
+    assert sorted(m["message"] for m in server.messages) == [f"m{i}" for i in range(5)]
+    assert not os.path.exists(socket_path)
+
+
+def test_send_via_daemon_raises_when_daemon_is_down(tmp_path):
+    """デーモンが起動していない場合は OSError になること"""
+    with pytest.raises(OSError):
+        send_via_daemon({"message": "x"}, str(tmp_path / "missing.sock"))
+
+
+def test_cli_falls_back_to_direct_send(tmp_path):
+    """--via-daemon でもデーモン停止中は直接送信されること"""
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        result = subprocess.run(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+             "send", "-m", "fallback", "--via-daemon", "--socket", str(tmp_path / "none.sock")],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+    assert result.returncode == 0, result.stderr
+    assert server.messages[0]["message"] == "fallback"
+
+
+def test_cli_falls_back_only_for_unaccepted_recipients(tmp_path):
+    """デーモンが途中で停止した場合、登録済みの宛先には直接送信しないこと"""
+    socket_path = str(tmp_path / "daemon.sock")
+    config = tmp_path / "config"
+    config.write_text("[work]\nPUSHOVER_DEVICE=laptop\n")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+    received = []
+
+    def accept_once():
+        # 1件だけ受け付けて停止するデーモン
+        conn, _ = listener.accept()
+        listener.close()
+        os.unlink(socket_path)
+        with conn:
+            received.append(json.loads(conn.makefile("rb").readline()))
+            conn.sendall(b"ok\n")
+
+    thread = threading.Thread(target=accept_once)
+    thread.start()
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url, PUSHOVER_TOKEN="token")
+        env.pop("PUSHOVER_USER", None)
+        result = subprocess.run(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+             "send", "-m", "m", "-u", "u1,u2", "--profile", "work", "--config", str(config),
+             "--via-daemon", "--socket", socket_path],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+    thread.join(timeout=5)
+    assert result.returncode == 0, result.stderr
+    assert [(r["user"], r["device"]) for r in received] == [("u1", "laptop")]
+    assert [(m["user"], m["device"]) for m in server.messages] == [("u2", "laptop")]
+
+
+def test_cli_does_not_resend_when_daemon_does_not_reply(tmp_path):
+    """接続後に応答がない場合は登録済みの可能性があるため直接送信しないこと"""
+    socket_path = str(tmp_path / "daemon.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        # 接続は受け付けるが応答しないデーモン
+        listener.bind(socket_path)
+        listener.listen(1)
+        with pytest.raises(PushoverConnectionError):
+            send_via_daemon({"message": "x"}, socket_path, timeout=0.2)
+        with FakePushoverServer() as server:
+            env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                       PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+            result = subprocess.run(
+                [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+                 "send", "-m", "busy", "--via-daemon", "--socket", socket_path],
+                capture_output=True, text=True, env=env, cwd=ROOT
+            )
+    assert result.returncode == 1
+    assert "エラー" in result.stderr
+    assert server.messages == []
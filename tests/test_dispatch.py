@@ -0,0 +1,196 @@
+"""
+共有クライアント（キュー経由の送信）のテスト
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import PushoverCLI
+from pushover_cli.dispatch import DispatchQueue, QueuedPushover, QueueFull, QUEUED_MESSAGE
+from pushover_cli.ratelimit import RateLimitExceeded, RateLimitScheduler
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_queue_policies_when_full():
+    """満杯のときにポリシーに従って待つ・古いものを捨てる・優先度の低いものを捨てること"""
+    queue = DispatchQueue(maxsize=2, policy="block")
+    queue.put({"message": "a"})
+    queue.put({"message": "b"})
+    with pytest.raises(QueueFull):
+        queue.put({"message": "c"}, timeout=0.05)
+
+    queue = DispatchQueue(maxsize=2, policy="drop-oldest")
+    queue.put({"message": "a"})
+    queue.put({"message": "b"})
+    assert queue.put({"message": "c"})["message"] == "a"
+    assert [queue.get()["message"] for _ in range(2)] == ["b", "c"]
+    assert queue.dropped == 1
+
+    queue = DispatchQueue(maxsize=2, policy="drop-lowest-priority")
+    queue.put({"message": "a", "priority": 0})
+    queue.put({"message": "b", "priority": -2})
+    assert queue.put({"message": "c", "priority": -1})["message"] == "b"
+    # 登録しようとした通知の方が優先度が低い場合はそれを捨てる
+    with pytest.raises(QueueFull):
+        queue.put({"message": "d", "priority": -2})
+    # 高速レーン（優先度 1, 2）は別枠なので満杯でも登録できる
+    assert queue.put({"message": "e", "priority": 2}) is None
+    assert [queue.get()["message"] for _ in range(3)] == ["e", "a", "c"]
+    assert queue.dropped == 2
+
+    with pytest.raises(ValueError):
+        DispatchQueue(policy="unknown")
+    with pytest.raises(ValueError):
+        DispatchQueue(maxsize=0, policy="drop-oldest")
+
+
+def test_send_from_many_threads_and_flush():
+    """複数のスレッドから登録した通知がすべて1つの接続プールで送信されること"""
+    results = []
+    with FakePushoverServer() as server:
+        client = PushoverCLI("token", "user", api_url=server.url, pool_size=2)
+        pushover = QueuedPushover(client, workers=2,
+                                  on_result=lambda kwargs, ok, _: results.append(ok))
+
+        def produce(n):
+            for i in range(20):
+                assert pushover.send_notification(f"{n}-{i}") == (True, QUEUED_MESSAGE)
+
+        threads = [threading.Thread(target=produce, args=(n,)) for n in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert pushover.flush(timeout=10)
+        assert pushover.sent == 100 and pushover.pending == 0
+        assert len(server.messages) == 100
+        assert server.connections <= 2
+        assert pushover.close(timeout=5)
+    assert results == [True] * 100
+
+
+def test_close_sends_remaining_and_rejects_new():
+    """close は登録済みの通知を送信してから終了し、その後の登録は失敗すること"""
+    with FakePushoverServer(latency=0.01) as server:
+        client = PushoverCLI("token", "user", api_url=server.url)
+        with QueuedPushover(client, maxsize=100) as pushover:
+            for i in range(10):
+                pushover.send_notification(f"m{i}")
+        assert [m["message"] for m in server.messages] == [f"m{i}" for i in range(10)]
+        success, response = pushover.send_notification("late")
+    assert not success
+    assert "キューエラー" in response
+
+
+def test_failures_are_counted():
+    """送信の失敗は配送スレッドを止めずに数えられること"""
+    with FakePushoverServer() as server:
+        server.invalid_users.add("bad")
+        client = PushoverCLI("token", "user", api_url=server.url)
+        with QueuedPushover(client) as pushover:
+            pushover.send_notification("x", user="bad")
+            pushover.send_notification("y")
+            assert pushover.flush(timeout=5)
+            assert (pushover.sent, pushover.failed) == (1, 1)
+            assert pushover.last_error
+
+
+def test_priority_order_and_aging():
+    """高い優先度から取り出し、待ち時間の長い低い優先度の通知も取り残さないこと"""
+    queue = DispatchQueue(aging=0.05)
+    for message, priority in (("quiet", -2), ("low", -1), ("normal", 0),
+                              ("high", 1), ("emergency", 2)):
+        queue.put({"message": message, "priority": priority})
+    assert queue.get(fast_only=True)["message"] == "emergency"
+    assert [queue.get()["message"] for _ in range(4)] == ["high", "normal", "low", "quiet"]
+
+    queue.put({"message": "old", "priority": -2})
+    time.sleep(0.12)
+    queue.put({"message": "new", "priority": 0})
+    # -2 でも 0.1 秒以上待てば新しい 0 より先に取り出す
+    assert queue.get()["message"] == "old"
+
+
+def test_scheduler_preempt_priority():
+    """preempt_priority 以上の通知はトークンを待たずに送信できること"""
+    scheduler = RateLimitScheduler(rate=1, burst=1, preempt_priority=1)
+    scheduler.acquire(0)
+    started = time.monotonic()
+    scheduler.acquire(2)
+    assert time.monotonic() - started < 0.1
+    # 追い越した分は後続の通知の待ち時間になる
+    with pytest.raises(RateLimitExceeded):
+        scheduler.acquire(0, timeout=0.5)
+
+
+def test_queue_preempts_without_changing_shared_scheduler():
+    """高速レーンの通知だけが送信ペースを追い越し、共有のスケジューラの設定は変えないこと"""
+    scheduler = RateLimitScheduler(rate=2, burst=1)
+    with FakePushoverServer() as server:
+        client = PushoverCLI("token", "user", api_url=server.url, scheduler=scheduler)
+        with QueuedPushover(client, fast_workers=1) as pushover:
+            assert scheduler.preempt_priority is None
+            assert pushover.send_notification("bulk-0")[0]
+            assert pushover.flush(5)
+            started = time.monotonic()
+            assert pushover.send_notification("page", priority=2)[0]
+            assert pushover.flush(5)
+            assert time.monotonic() - started < 0.3
+            # キューを経由しない送信は送信ペースを待つ
+            started = time.monotonic()
+            scheduler.acquire(2)
+            assert time.monotonic() - started > 0.3
+
+
+def test_invalid_priority_is_a_failed_result():
+    """整数でない優先度は例外ではなく失敗の結果になること"""
+    with QueuedPushover(_SlowClient()) as pushover:
+        for priority in ("high", [1], {}):
+            success, message = pushover.send_notification("x", priority=priority)
+            assert not success and "priority" in message
+        with pytest.raises(ValueError):
+            pushover.send("x", priority="high")
+        assert pushover.pending == 0
+
+
+class _SlowClient:
+    """1件ごとに少し時間のかかる送信先"""
+
+    scheduler = None
+
+    def __init__(self):
+        self.sent_at = {}
+
+    def send_notification(self, message, **kwargs):
+        time.sleep(0.001)
+        self.sent_at[message] = time.monotonic()
+        return True, "ok"
+
+    def close(self):
+        pass
+
+
+def test_emergency_latency_under_backlog():
+    """1万件の滞留があっても緊急通知はすぐに送信されること"""
+    client = _SlowClient()
+    pushover = QueuedPushover(client, maxsize=20000)
+    for i in range(10000):
+        pushover.send_notification(f"bulk-{i}", priority=-1)
+    latencies = []
+    for i in range(20):
+        enqueued = time.monotonic()
+        pushover.send_notification(f"page-{i}", priority=2)
+        while f"page-{i}" not in client.sent_at:
+            time.sleep(0.001)
+        latencies.append(client.sent_at[f"page-{i}"] - enqueued)
+    assert pushover.pending > 5000
+    assert max(latencies) < 0.5
+    assert pushover.discard_pending() > 0
+    assert pushover.close(timeout=5)
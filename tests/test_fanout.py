@@ -0,0 +1,57 @@
+"""
+複数の宛先への送信（fan-out）のテスト
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import PushoverCLI
+from pushover_cli.fanout import load_group, send_to_many
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_send_to_many_reports_each_recipient():
+    """宛先ごとに送信され、失敗した宛先だけが結果で判別できること"""
+    users = [f"user{i}" for i in range(10)] + ["user3"]
+    with FakePushoverServer(latency=0.02) as server:
+        server.invalid_users.add("user7")
+        with PushoverCLI("token", "user", api_url=server.url, pool_size=4) as client:
+            report = send_to_many(client, users, "deploy done", concurrency=4, title="t")
+
+    assert [r.user for r in report] == [f"user{i}" for i in range(10)]
+    assert [r.user for r in report.failed] == ["user7"]
+    assert len(report.succeeded) == 9 and not report.all_succeeded
+    assert sorted(m["user"] for m in server.messages) == sorted(f"user{i}" for i in range(10))
+    assert all(m["title"] == "t" for m in server.messages)
+    assert server.connections <= 4
+
+
+def test_load_group():
+    """PUSHOVER_GROUP_<NAME> をカンマ・空白区切りで読み込むこと"""
+    config = {"PUSHOVER_GROUP_ONCALL": "key1, key2,key3"}
+    assert load_group(config, "oncall") == ["key1", "key2", "key3"]
+    assert load_group(config, "missing") is None
+
+
+def test_cli_fanout_exits_nonzero_on_partial_failure(tmp_path):
+    """1件でも失敗した場合は宛先ごとの結果を表示して終了コード 1 になること"""
+    config = tmp_path / "config"
+    config.write_text("PUSHOVER_TOKEN=token\nPUSHOVER_GROUP_OPS=good1,bad1\n")
+    with FakePushoverServer() as server:
+        server.invalid_users.add("bad1")
+        env = dict(os.environ, PUSHOVER_API_URL=server.url)
+        env.pop("PUSHOVER_USER", None)
+        env.pop("PUSHOVER_TOKEN", None)
+        result = subprocess.run(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+             "-m", "hi", "--group", "ops", "-u", "good2", "--config", str(config)],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+    assert result.returncode == 1
+    assert "成功 2件, 失敗 1件" in result.stdout
+    assert "bad1" in result.stderr
+    assert sorted(m["user"] for m in server.messages) == ["bad1", "good1", "good2"]
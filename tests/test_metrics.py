@@ -0,0 +1,77 @@
+"""
+リクエストの計測（send_detailed）とメトリクス出力のテスト
+"""
+
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import PushoverCLI
+from pushover_cli.metrics import MetricsFileWriter, MetricsRegistry
+from pushover_cli.retry import RetryPolicy
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_send_detailed_reports_timing_and_headers():
+    """所要時間・リクエストID・送信枠のヘッダが結果に含まれること"""
+    with FakePushoverServer(latency=0.02, app_limit=100) as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            first = client.send_detailed("first")
+            second = client.send_detailed("second", priority=1)
+
+    assert first.success and first.status == 200
+    assert first.request_id == "fake-1"
+    assert first.rate_limit == {"limit": 100, "remaining": 99, "reset": server.app_reset}
+    assert not first.timing.reused and first.timing.connect > 0
+    assert first.timing.ttfb >= 0.02
+    assert first.timing.total >= first.timing.connect + first.timing.write + first.timing.ttfb
+    # 2件目は同じ接続を再利用するため接続時間は 0
+    assert second.timing.reused and second.timing.connect == 0.0
+    assert second.attempts == 1
+
+
+def test_send_detailed_failure():
+    """失敗も例外ではなく結果として返り、再試行の回数が分かること"""
+    with FakePushoverServer() as server:
+        server.inject_failures(503, 400)
+        retry = RetryPolicy(max_attempts=3, base_delay=0.01)
+        with PushoverCLI("token", "user", api_url=server.url, retry=retry) as client:
+            result = client.send_detailed("bad")
+    assert not result.success and result.message.startswith("送信エラー")
+    assert (result.status, result.attempts) == (400, 2)
+
+    unreachable = PushoverCLI("token", "user", api_url="http://127.0.0.1:1", timeout=1)
+    result = unreachable.send_detailed("x")
+    assert (result.success, result.status, result.timing) == (False, None, None)
+
+
+def test_metrics_registry_exports_prometheus_and_json(tmp_path):
+    """ステータス・優先度ごとに集計され、両方の形式で出力できること"""
+    metrics = MetricsRegistry()
+    with FakePushoverServer() as server:
+        server.inject_failures(500)
+        with PushoverCLI("token", "user", api_url=server.url, metrics=metrics) as client:
+            client.send_notification("fails")
+            for _ in range(3):
+                client.send_notification("ok", priority=1)
+
+    assert metrics.requests() == 4
+    assert metrics.requests(status=200, priority=1) == 3
+    text = metrics.to_prometheus()
+    assert 'pushover_requests_total{status="200",priority="1"} 3' in text
+    assert 'pushover_requests_total{status="500",priority="0"} 1' in text
+    assert 'pushover_request_duration_seconds_bucket{status="200",priority="1",le="+Inf"} 3' in text
+    assert 'pushover_request_phase_seconds_count{phase="connect"} 1' in text
+    assert 'pushover_connections_total{reused="true"} 3' in text
+
+    data = json.loads(metrics.to_json())
+    assert {"status": "200", "priority": 1, "count": 3} in data["requests"]
+
+    path = tmp_path / "pushover.prom"
+    writer = MetricsFileWriter(metrics, str(path), interval=60)
+    writer.start()
+    writer.stop()
+    assert path.read_text() == text
@@ -0,0 +1,104 @@
+"""
+システム監視（monitor）のテスト
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import PushoverCLI
+from pushover_cli.monitor import (
+    CRITICAL,
+    OK,
+    WARNING,
+    Check,
+    SystemMonitor,
+    SystemSampler,
+    next_level,
+)
+from pushover_cli.testing import FakePushoverServer
+
+
+MEMINFO = """MemTotal:        1000000 kB
+MemFree:          100000 kB
+MemAvailable:     {available} kB
+Buffers:           10000 kB
+"""
+
+
+def test_sampler_reads_proc_files(tmp_path):
+    """開いたままのファイルから最新の値を読み直せること"""
+    (tmp_path / "meminfo").write_text(MEMINFO.format(available=250000))
+    (tmp_path / "loadavg").write_text("1.50 0.80 0.40 2/300 12345\n")
+    sampler = SystemSampler(str(tmp_path))
+    assert sampler.memory_percent() == 75.0
+    assert sampler.loadavg() == (1.5, 0.8, 0.4)
+    assert sampler.load_percent() == 150.0 / sampler.cpu_count
+
+    (tmp_path / "meminfo").write_text(MEMINFO.format(available=50000))
+    assert sampler.memory_percent() == 95.0
+    assert 0.0 <= sampler.disk_percent(str(tmp_path)) <= 100.0
+    sampler.close()
+
+
+def test_hysteresis():
+    """レベルはすぐ上がり、閾値を hysteresis 以上下回るまで下がらないこと"""
+    check = Check("disk", "ディスク", lambda: 0.0, warning=90, critical=95, hysteresis=5)
+    assert next_level(check, 91, OK) == WARNING
+    assert next_level(check, 96, OK) == CRITICAL
+    assert next_level(check, 93, CRITICAL) == CRITICAL
+    assert next_level(check, 89, CRITICAL) == WARNING
+    assert next_level(check, 86, WARNING) == WARNING
+    assert next_level(check, 84, WARNING) == OK
+
+
+def test_monitor_notifies_on_level_changes_only():
+    """レベルが変わったときだけ、レベルに応じた優先度で通知すること"""
+    values = iter([50, 92, 93, 97, 96, 80, 80])
+    check = Check("disk:/", "ディスク使用量 (/)", lambda: next(values), 90, 95)
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            monitor = SystemMonitor(client, [check], device="phone")
+            sent = [monitor.run_once() for _ in range(7)]
+    assert sent == [0, 1, 0, 1, 0, 1, 0]
+    assert [(m["title"], m["priority"]) for m in server.messages] == [
+        ("ディスク使用量 (/)警告", "1"),
+        ("ディスク使用量 (/)緊急", "2"),
+        ("ディスク使用量 (/)回復", "-1"),
+    ]
+    assert server.messages[1]["message"] == "ディスク使用量 (/)が97%に達しました！緊急対応が必要です"
+    assert all(m["device"] == "phone" for m in server.messages)
+    assert server.connections == 1
+
+
+def test_monitor_retries_failed_alert():
+    """送信に失敗した変化は次のサンプリングで改めて通知すること"""
+    check = Check("disk:/", "ディスク使用量 (/)", lambda: 97, 90, 95)
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            monitor = SystemMonitor(client, [check])
+            server.inject_failures(503)
+            assert monitor.run_once() == 0
+            assert monitor.failed == 1 and monitor.levels["disk:/"] == OK
+            assert monitor.run_once() == 1
+            assert monitor.run_once() == 0
+    assert [m["title"] for m in server.messages] == ["ディスク使用量 (/)緊急"]
+    assert monitor.levels["disk:/"] == CRITICAL
+
+def test_cli_monitor_once(tmp_path):
+    """monitor --once で閾値を超えた項目を通知すること"""
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        result = subprocess.run(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+             "monitor", "--once", "--disk", str(tmp_path), "--disk-warning", "0",
+             "--disk-critical", "off", "--memory-warning", "off", "--load-warning", "off",
+             "--config", str(tmp_path / "none")],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+    assert result.returncode == 0, result.stderr
+    assert [m["title"] for m in server.messages] == [f"ディスク使用量 ({tmp_path})警告"]
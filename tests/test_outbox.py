@@ -0,0 +1,114 @@
+"""
+永続アウトボックスのテスト
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import PushoverCLI
+from pushover_cli.outbox import Outbox, OutboxWorker
+from pushover_cli.testing import FakePushoverServer
+
+
+def _segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".log"))
+
+
+def test_pending_messages_are_replayed(tmp_path):
+    """ACK されていないメッセージが再起動後に復元されること"""
+    outbox = Outbox(str(tmp_path))
+    ids = [outbox.enqueue({"message": f"m{i}"}) for i in range(10)]
+    for message_id in ids[:4]:
+        outbox.ack(message_id)
+    outbox.close()
+
+    outbox = Outbox(str(tmp_path))
+    assert outbox.depth == 6
+    batch = outbox.take(limit=100, timeout=0)
+    assert [kwargs["message"] for _, kwargs in batch] == [f"m{i}" for i in range(4, 10)]
+    # 再起動後に採番されるIDは既存のIDと重複しない
+    assert outbox.enqueue({"message": "new"}) > ids[-1]
+    outbox.close()
+
+
+def test_torn_tail_record_is_discarded(tmp_path):
+    """書き込み途中のレコードは再生時に切り捨てられること"""
+    outbox = Outbox(str(tmp_path))
+    outbox.enqueue({"message": "complete"})
+    outbox.close()
+    path = os.path.join(str(tmp_path), _segment_files(str(tmp_path))[-1])
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00garbage")
+
+    outbox = Outbox(str(tmp_path))
+    assert [kwargs["message"] for _, kwargs in outbox.take(timeout=0)] == ["complete"]
+    outbox.close()
+
+
+def test_acked_segments_are_removed_and_compacted(tmp_path):
+    """ACK 済みのセグメントが削除され、残りはコンパクションされること"""
+    outbox = Outbox(str(tmp_path), segment_size=4096)
+    ids = [outbox.enqueue({"message": "x" * 100}) for _ in range(200)]
+    assert len(_segment_files(str(tmp_path))) > 3
+    keep = ids[50]
+    for message_id in ids:
+        if message_id != keep:
+            outbox.ack(message_id)
+    # 次のセグメント切り替えでコンパクションが走る
+    for _ in range(60):
+        outbox.ack(outbox.enqueue({"message": "y" * 100}))
+    assert len(_segment_files(str(tmp_path))) <= 2
+    outbox.close()
+
+    outbox = Outbox(str(tmp_path))
+    assert [message_id for message_id, _ in outbox.take(timeout=0)] == [keep]
+    outbox.close()
+
+
+def test_durable_enqueue_and_stats(tmp_path):
+    """durable 登録と統計値"""
+    with Outbox(str(tmp_path), sync_interval=10) as outbox:
+        outbox.enqueue({"message": "a"}, durable=True)
+        outbox.enqueue({"message": "b"})
+        stats = outbox.stats()
+        assert stats["depth"] == 2
+        assert stats["oldest_age"] >= 0
+        assert outbox.oldest_age >= 0
+
+
+def test_worker_delivers_and_retries(tmp_path):
+    """ワーカーが配送し、接続エラーは後で再送すること"""
+    outbox = Outbox(str(tmp_path))
+    for i in range(3):
+        outbox.enqueue({"message": f"m{i}"})
+
+    down = OutboxWorker(outbox, PushoverCLI("token", "user", api_url="http://127.0.0.1:1"),
+                        retry_delay=0)
+    assert down.run_once() == 3
+    assert outbox.depth == 3
+
+    with FakePushoverServer() as server:
+        worker = OutboxWorker(outbox, PushoverCLI("token", "user", api_url=server.url))
+        assert worker.run_once() == 3
+    assert outbox.depth == 0
+    assert worker.sent == 3
+    assert sorted(m["message"] for m in server.messages) == ["m0", "m1", "m2"]
+    outbox.close()
+
+
+def test_daemon_rejects_coalesce_with_outbox(tmp_path):
+    """まとめている間の通知を失わないよう --coalesce と --outbox の併用を拒否すること"""
+    result = subprocess.run(
+        [sys.executable, "-c", "from pushover_cli.cli import main; main()", "daemon",
+         "--outbox", str(tmp_path / "outbox"), "--coalesce", "10",
+         "--socket", str(tmp_path / "daemon.sock")],
+        capture_output=True, text=True, cwd=ROOT,
+        env=dict(os.environ, PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+    )
+    assert result.returncode == 1
+    assert "--outbox" in result.stderr
+    assert not os.path.exists(tmp_path / "outbox")
@@ -0,0 +1,134 @@
+"""
+送信パイプライン（PushoverCLI のラッパー）のテスト
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.coalesce import QUEUED_MESSAGE, CoalescingPushover, build_digest
+from pushover_cli.core import PushoverCLI
+from pushover_cli.dedup import (
+    SUPPRESSED_MESSAGE,
+    DedupPushover,
+    MemoryDedupStore,
+    SQLiteDedupStore,
+)
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_dedup_suppresses_repeated_alerts():
+    """同じ通知は TTL 内に一度だけ送信されること"""
+    with FakePushoverServer() as server:
+        client = DedupPushover(PushoverCLI("token", "user", api_url=server.url), ttl=60)
+        with client:
+            for _ in range(3):
+                assert client.send_notification("disk 91%", title="disk", priority=1)[0]
+            assert client.send_notification("disk 91%", title="disk", priority=1) == (
+                True, SUPPRESSED_MESSAGE
+            )
+            # 優先度やデバイスが異なれば別の通知として扱う
+            assert client.send_notification("disk 91%", title="disk", priority=2)[0]
+            assert client.send_notification("disk 91%", title="disk", device="phone")[0]
+    assert client.suppressed == 3
+    assert len(server.messages) == 3
+
+
+def test_dedup_forgets_failed_sends():
+    """送信に失敗した通知は抑制の対象にならないこと"""
+    with FakePushoverServer() as server:
+        server.inject_failures(500)
+        client = DedupPushover(PushoverCLI("token", "user", api_url=server.url), ttl=60)
+        assert not client.send_notification("retry me")[0]
+        assert client.send_notification("retry me") == (True, "通知が正常に送信されました")
+        client.close()
+
+
+def test_memory_store_ttl_and_lru():
+    """期限切れと LRU の追い出し"""
+    store = MemoryDedupStore(maxsize=2)
+    assert not store.check_and_set("a", ttl=60)
+    assert not store.check_and_set("b", ttl=60)
+    assert not store.check_and_set("c", ttl=60)
+    # "a" は追い出されている
+    assert not store.check_and_set("a", ttl=60)
+    assert not store.check_and_set("expired", ttl=-1)
+    assert not store.check_and_set("expired", ttl=60)
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    """SQLite ストアは別インスタンス（別プロセス）と共有されること"""
+    path = str(tmp_path / "dedup.sqlite3")
+    first = SQLiteDedupStore(path)
+    second = SQLiteDedupStore(path)
+    assert not first.check_and_set("key", ttl=60)
+    assert second.check_and_set("key", ttl=60)
+    second.forget("key")
+    assert not first.check_and_set("key", ttl=60)
+    first.close()
+    second.close()
+
+
+def test_cli_dedup_across_invocations(tmp_path):
+    """--dedup は CLI の起動をまたいで重複を抑制すること"""
+    with FakePushoverServer() as server:
+        env = dict(os.environ, HOME=str(tmp_path), PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        outputs = []
+        for _ in range(2):
+            result = subprocess.run(
+                [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+                 "-m", "same alert", "--dedup", "600"],
+                capture_output=True, text=True, env=env, cwd=ROOT
+            )
+            assert result.returncode == 0, result.stderr
+            outputs.append(result.stdout.strip())
+    assert outputs[1] == SUPPRESSED_MESSAGE
+    assert len(server.messages) == 1
+
+
+def test_coalescing_merges_bursts_into_digest():
+    """短時間の通知がまとめて1件で送信され、優先度 2 は即時送信されること"""
+    with FakePushoverServer() as server:
+        client = CoalescingPushover(
+            PushoverCLI("token", "user", api_url=server.url), window=0.2, max_count=100
+        )
+        for i in range(40):
+            assert client.send_notification(f"error {i}", title="app", priority=1) == (
+                True, QUEUED_MESSAGE
+            )
+        assert client.send_notification("page", priority=2) == (True, "通知が正常に送信されました")
+        assert [m["message"] for m in server.messages] == ["page"]
+        time.sleep(0.5)
+        client.close()
+    assert client.received == 40 and client.sent == 1
+    digest = server.messages[1]
+    assert digest["title"] == "app（40件）"
+    assert digest["priority"] == "1"
+    assert digest["message"].startswith("error 0\nerror 1\n")
+
+
+def test_coalescing_flushes_at_max_count_and_truncates():
+    """max_count 件で送信され、メッセージ長の上限内に収まること"""
+    with FakePushoverServer() as server:
+        client = CoalescingPushover(
+            PushoverCLI("token", "user", api_url=server.url), window=60, max_count=10
+        )
+        for i in range(10):
+            client.send_notification("x" * 300, title=f"host{i}")
+        assert len(server.messages) == 1
+        client.close()
+    digest = server.messages[0]
+    assert len(digest["message"]) <= 1024
+    assert digest["message"].endswith("…ほか7件")
+    assert digest["title"] == "10件の通知"
+
+
+def test_build_digest_keeps_single_message():
+    """1件だけのグループは元の通知のまま送信されること"""
+    message = {"message": "only", "title": "t", "url": "https://example.com"}
+    assert build_digest([message]) == message
@@ -0,0 +1,95 @@
+"""
+事前エンコードとパイプライン送信のテスト
+"""
+
+import io
+import json
+import os
+import sys
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.batch import run_batch
+from pushover_cli.core import PushoverCLI, build_message_data
+from pushover_cli.pool import read_response
+from pushover_cli.prepared import PipelinedSender, RequestEncoder
+from pushover_cli.retry import RetryPolicy
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_encoded_body_matches_urlencode():
+    """事前エンコードした本文が通常の経路と同じバイト列になること"""
+    encoder = RequestEncoder("tok en", "user&1", "api.pushover.net")
+    body = bytearray()
+    cases = [
+        {"message": "hello"},
+        {"message": "ディスク 95% & <b>full</b>", "title": "監視", "priority": 1, "html": True},
+        {"message": "down", "priority": 2, "expire": 600, "url": "https://example.com/?a=1&b=2",
+         "url_title": "詳細", "device": "phone", "sound": "siren", "user": "other"},
+        {"message": "quiet", "priority": -2, "retry_interval": 30},
+    ]
+    for kwargs in cases:
+        user = kwargs.pop("user", None)
+        message = kwargs.pop("message")
+        expected = urllib.parse.urlencode(
+            build_message_data("tok en", user or "user&1", message, **kwargs)
+        ).encode("utf-8")
+        assert bytes(encoder.encode_body(body, message, user=user, **kwargs)) == expected
+
+
+def test_read_response_content_length_and_chunked():
+    """同じバッファから続けて複数のレスポンスを読めること"""
+    stream = io.BytesIO(
+        b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+        b"HTTP/1.1 500 Error\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n"
+        b"HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 0\r\n\r\n"
+    )
+    first, second, third = (read_response(stream) for _ in range(3))
+    assert (first[0].status, first[0].body, first[1]) == (200, b"ok", False)
+    assert (second[0].status, second[0].body) == (500, b"abcde")
+    assert third[1] is True
+    assert read_response(stream) is None
+
+
+def test_pipelined_send_on_one_connection():
+    """1つの接続で入力順に送信され、恒久的な失敗は通知ごとに返ること"""
+    with FakePushoverServer() as server:
+        server.invalid_users.add("bad")
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            messages = [{"message": f"m{i}", "priority": i % 3 - 1} for i in range(50)]
+            messages[10]["user"] = "bad"
+            results = PipelinedSender(client, depth=8).send_many(messages)
+    assert [success for success, _ in results] == [i != 10 for i in range(50)]
+    assert "送信エラー" in results[10][1]
+    assert [m["message"] for m in server.messages] == [f"m{i}" for i in range(50)]
+    assert server.connections == 1
+
+
+def test_pipelined_send_falls_back_to_retry():
+    """途中で切断された場合、応答のなかった通知は再試行の経路で送り直すこと"""
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url,
+                         retry=RetryPolicy(max_attempts=3, base_delay=0.01)) as client:
+            client.send_notification("warmup")
+            server.inject_failures(500, 0)
+            results = PipelinedSender(client, depth=8).send_many(
+                [{"message": f"m{i}"} for i in range(8)]
+            )
+    assert all(success for success, _ in results)
+    assert sorted(m["message"] for m in server.messages[1:]) == [f"m{i}" for i in range(8)]
+
+
+def test_run_batch_pipelined():
+    """--pipeline 相当の run_batch が入力順に結果を出力すること"""
+    lines = [json.dumps({"message": f"line {i}"}) for i in range(20)]
+    lines.insert(5, '{"title": "no message"}')
+    output = io.StringIO()
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url, pool_size=2) as client:
+            assert run_batch(client, lines, output, concurrency=2, pipeline=4) == (20, 1)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["line"] for r in results] == list(range(1, 22))
+    assert not results[5]["success"]
+    assert len(server.messages) == 20
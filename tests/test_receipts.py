@@ -0,0 +1,127 @@
+"""
+緊急（優先度 2）の通知とレシート追跡のテスト
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import PushoverCLI
+from pushover_cli.receipts import ReceiptPoller, ReceiptStore, parse_receipt
+from pushover_cli.testing import FakePushoverServer
+
+
+def test_emergency_send_includes_retry_and_expire():
+    """優先度 2 の通知に retry と expire が付き、レシートが返ること"""
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            default = client.send_detailed("障害", priority=2)
+            custom = client.send_detailed("障害", priority=2, retry_interval=30, expire=600)
+            normal = client.send_detailed("通常")
+            invalid = client.send_detailed("障害", priority=2, retry_interval=10)
+    assert default.success and default.receipt
+    assert (server.messages[0]["retry"], server.messages[0]["expire"]) == ("60", "3600")
+    assert custom.success and custom.receipt and custom.receipt != default.receipt
+    assert (server.messages[1]["retry"], server.messages[1]["expire"]) == ("30", "600")
+    assert normal.success and normal.receipt is None
+    assert "retry" not in server.messages[2]
+    assert not invalid.success and "30 seconds" in invalid.message
+
+
+def test_poller_tracks_many_receipts_on_one_connection():
+    """多数のレシートを1つのスレッドと1つの接続で追跡し、確認時にコールバックが呼ばれること"""
+    done = []
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url, pool_size=1) as client:
+            receipts = [client.send_detailed(f"障害 {i}", priority=2).receipt for i in range(30)]
+            threads_before = threading.active_count()
+            with ReceiptPoller(client, min_interval=0.02, max_interval=0.1) as poller:
+                handles = [poller.track(r, callback=done.append) for r in receipts]
+                assert threading.active_count() == threads_before + 1
+                time.sleep(0.1)
+                assert not any(handle.done for handle in handles)
+                for receipt in receipts:
+                    server.acknowledge(receipt, device="iphone")
+                assert poller.wait(5)
+                assert poller.pending == 0
+    assert sorted(handle.receipt for handle in done) == sorted(receipts)
+    assert all(handle.acknowledged for handle in handles)
+    assert handles[0].status.acknowledged_by_device == "iphone"
+    assert server.connections == 1
+
+
+def test_poll_interval_backs_off():
+    """状態が変わらない間は問い合わせ間隔が延びること"""
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            receipt = client.send_detailed("障害", priority=2).receipt
+            with ReceiptPoller(client, min_interval=0.01, max_interval=0.2, backoff=2.0) as poller:
+                handle = poller.track(receipt)
+                time.sleep(0.6)
+    # 一定間隔なら約60回になるところ、延ばした間隔では数回に収まる
+    assert 3 <= handle.polls <= 10
+    assert handle.interval == 0.2
+
+
+def test_expired_and_unknown_receipts_finish():
+    """期限切れと存在しないレシートも追跡が終わること"""
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            receipt = client.send_detailed("障害", priority=2, expire=1).receipt
+            with ReceiptPoller(client, min_interval=0.05, max_interval=0.2) as poller:
+                expired = poller.track(receipt)
+                unknown = poller.track("missing")
+                assert poller.wait(5)
+    assert expired.status.expired and not expired.acknowledged
+    assert unknown.status is None and unknown.error.status == 404
+
+
+def test_store_roundtrip(tmp_path):
+    """保存したレシートが未確認の一覧に出て、確認後は外れること"""
+    store = ReceiptStore(str(tmp_path / "receipts.sqlite3"))
+    store.add("r1", 600, "障害", title="DB")
+    store.add("r2", 600, "障害2")
+    assert [stored.receipt for stored in store.pending()] == ["r1", "r2"]
+    store.update(parse_receipt("r1", {"acknowledged": 1, "acknowledged_by": "u"}))
+    assert [stored.receipt for stored in store.pending()] == ["r2"]
+    assert store.get("r1").acknowledged and store.get("r1").title == "DB"
+    assert [stored.receipt for stored in store.recent()] == ["r2", "r1"]
+    store.close()
+
+
+def test_cli_send_and_wait(tmp_path):
+    """send --priority 2 で保存したレシートを receipts wait で待てること"""
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url, HOME=str(tmp_path),
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        command = [sys.executable, "-c", "from pushover_cli.cli import main; main()"]
+        sent = subprocess.run(
+            command + ["-m", "障害", "--priority", "2", "--retry-interval", "30", "--expire", "600"],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+        assert sent.returncode == 0, sent.stderr
+        receipt = next(iter(server.receipts))
+        assert receipt in sent.stdout
+
+        waiting = subprocess.Popen(
+            command + ["receipts", "wait", "--interval", "0.05", "--timeout", "10"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env, cwd=ROOT
+        )
+        time.sleep(0.5)
+        server.acknowledge(receipt)
+        stdout, stderr = waiting.communicate(timeout=15)
+        assert waiting.returncode == 0, stderr
+        assert receipt in stdout and "確認されました" in stdout
+
+        listed = subprocess.run(command + ["receipts", "list"],
+                                capture_output=True, text=True, env=env, cwd=ROOT)
+        assert "確認済み" in listed.stdout
+
+        invalid = subprocess.run(command + ["-m", "x", "--priority", "2", "--retry-interval", "5"],
+                                 capture_output=True, text=True, env=env, cwd=ROOT)
+        assert invalid.returncode == 1
@@ -0,0 +1,139 @@
+"""
+設定解決（プロファイル・キャッシュ）のテスト
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli import settings
+from pushover_cli.settings import (
+    binary_cache_path,
+    load_config,
+    load_config_from_file,
+    parse_config,
+    resolve_config,
+)
+from pushover_cli.testing import FakePushoverServer
+
+
+CONFIG = """
+# 既定の設定
+PUSHOVER_TOKEN=file-token
+PUSHOVER_USER=file-user
+
+[work]
+PUSHOVER_TOKEN=work-token
+PUSHOVER_DEVICE=laptop
+PUSHOVER_SOUND=siren
+"""
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    settings.clear_cache()
+    yield
+    settings.clear_cache()
+
+
+def test_parse_config_sections():
+    """[名前] 以降の行がプロファイルになること"""
+    config = parse_config(CONFIG)
+    assert config.values == {"PUSHOVER_TOKEN": "file-token", "PUSHOVER_USER": "file-user"}
+    assert config.profiles["work"]["PUSHOVER_DEVICE"] == "laptop"
+
+
+def test_load_config_is_cached_until_file_changes(tmp_path):
+    """内容が変わらない限り解析結果を再利用し、変更後は読み直すこと"""
+    path = tmp_path / "config"
+    path.write_text(CONFIG)
+    first = load_config(str(path))
+    assert load_config(str(path)) is first
+    path.write_text(CONFIG + "PUSHOVER_EXTRA=1\n")
+    assert load_config(str(path)) is not first
+    assert load_config_from_file(str(path)) == {
+        "PUSHOVER_TOKEN": "file-token", "PUSHOVER_USER": "file-user"
+    }
+
+
+def test_binary_cache_is_reused_by_other_processes(tmp_path):
+    """バイナリキャッシュが書き出され、ファイルの状態が一致すれば使われること"""
+    path = tmp_path / "config"
+    path.write_text(CONFIG)
+    parsed = load_config(str(path), binary_cache=True)
+    cache = binary_cache_path(str(path))
+    assert os.stat(cache).st_mode & 0o777 == 0o600
+
+    # 別プロセスを模してプロセス内のキャッシュを捨てても同じ内容が読めること
+    settings.clear_cache()
+    assert load_config(str(path), binary_cache=True) == parsed
+
+    # 壊れたキャッシュは無視して設定ファイルを読み直すこと
+    with open(cache, "wb") as f:
+        f.write(b"broken")
+    settings.clear_cache()
+    assert load_config(str(path), binary_cache=True) == parsed
+
+
+def test_resolve_precedence(tmp_path):
+    """引数 > プロファイル > 環境変数 > 設定ファイル の順に解決されること"""
+    path = str(tmp_path / "config")
+    with open(path, "w") as f:
+        f.write(CONFIG)
+    env = {"PUSHOVER_TOKEN": "env-token", "PUSHOVER_USER": "env-user"}
+
+    resolved = resolve_config(config_path=path, environ=env)
+    assert (resolved.token, resolved.user, resolved.device) == ("env-token", "env-user", None)
+
+    resolved = resolve_config(profile="work", config_path=path, environ=env)
+    assert (resolved.token, resolved.user, resolved.sound) == ("work-token", "env-user", "siren")
+
+    resolved = resolve_config(token="arg", device="phone", config_path=path,
+                              environ=dict(env, PUSHOVER_PROFILE="work"))
+    assert (resolved.token, resolved.device, resolved.profile) == ("arg", "phone", "work")
+
+    assert resolve_config(config_path=path, environ={}).token == "file-token"
+
+    # 設定ファイルの既定のプロファイルは環境変数より優先しない
+    with open(path, "w") as f:
+        f.write("PUSHOVER_PROFILE=work\n" + CONFIG)
+    resolved = resolve_config(config_path=path, environ=env)
+    assert (resolved.token, resolved.device, resolved.profile) == ("env-token", "laptop", "work")
+    assert resolve_config(config_path=path, environ={}).token == "work-token"
+    resolved = resolve_config(config_path=path, environ=dict(env, PUSHOVER_PROFILE="work"))
+    assert resolved.token == "work-token"
+    with pytest.raises(KeyError):
+        resolve_config(profile="missing", config_path=path, environ=env)
+
+
+def test_resolve_is_memoized(tmp_path):
+    """同じ入力の解決結果は同じオブジェクトが返ること"""
+    path = str(tmp_path / "config")
+    with open(path, "w") as f:
+        f.write(CONFIG)
+    first = resolve_config(profile="work", config_path=path, environ={})
+    assert resolve_config(profile="work", config_path=path, environ={}) is first
+
+
+def test_cli_uses_profile_defaults(tmp_path):
+    """--profile のトークン・デバイス・通知音が送信に使われること"""
+    path = tmp_path / "config"
+    path.write_text(CONFIG)
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url)
+        for name in ("PUSHOVER_TOKEN", "PUSHOVER_USER", "PUSHOVER_PROFILE"):
+            env.pop(name, None)
+        result = subprocess.run(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+             "-m", "hi", "--profile", "work", "--sound", "bike", "--config", str(path)],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+    assert result.returncode == 0, result.stderr
+    sent = server.messages[0]
+    assert (sent["token"], sent["user"], sent["device"], sent["sound"]) == \
+        ("work-token", "file-user", "laptop", "bike")
@@ -0,0 +1,107 @@
+"""
+CLI 起動時間のテスト
+
+python -X importtime の出力から、起動時に読み込まれるモジュールと
+import にかかる時間を検証する
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import PushoverCLI
+from pushover_cli.daemon import NotificationDaemon
+from pushover_cli.testing import FakePushoverServer
+
+
+# "import pushover_cli.cli" にかかる時間の上限（ミリ秒、3回の最小値で比較）
+IMPORT_BUDGET_MS = float(os.environ.get("PUSHOVER_IMPORT_BUDGET_MS", "50"))
+
+RUN_MAIN = "from pushover_cli.cli import main; main()"
+
+# 送信を伴わない起動では読み込まないモジュール
+NETWORK_MODULES = {"http.client", "ssl", "pushover_cli.core", "pushover_cli.pool"}
+
+# 通常の送信では読み込まないモジュール
+SUBCOMMAND_MODULES = {
+    "pathlib", "pushover_cli.config", "sqlite3", "socketserver", "concurrent.futures",
+    "asyncio", "pushover_cli.batch", "pushover_cli.daemon", "pushover_cli.outbox",
+}
+
+
+def run_importtime(args, env=None):
+    """-X importtime 付きで実行し、(結果, {モジュール名: 累積時間(µs)}) を返す"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c"] + args,
+        capture_output=True, text=True, env=env, cwd=ROOT
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return result, modules
+
+
+def startup_modules(args, env=None):
+    """インタープリタ自体の起動で読み込まれるものを除いたモジュール"""
+    _, baseline = run_importtime(["pass"], env)
+    result, modules = run_importtime(args, env)
+    return result, set(modules) - set(baseline)
+
+
+def test_cli_import_budget():
+    """CLI モジュールの import が上限時間内に収まること"""
+    timings = [run_importtime(["import pushover_cli.cli"])[1]["pushover_cli.cli"]
+               for _ in range(3)]
+    assert min(timings) / 1000 < IMPORT_BUDGET_MS, timings
+
+
+def test_package_import_is_lazy():
+    """パッケージや CLI の import だけでは各機能のモジュールを読み込まないこと"""
+    _, modules = startup_modules(["import pushover_cli.cli"])
+    assert not modules & (NETWORK_MODULES | SUBCOMMAND_MODULES | {"json"})
+
+
+def test_version_does_not_load_network_modules():
+    """--version は HTTP のモジュールを読み込まずに終了すること"""
+    result, modules = startup_modules([RUN_MAIN, "--version"])
+    assert result.returncode == 0
+    assert not modules & NETWORK_MODULES
+
+
+def test_plain_send_skips_subcommand_modules(tmp_path):
+    """通常の送信ではサブコマンド用のモジュールを読み込まないこと"""
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        result, modules = startup_modules(
+            [RUN_MAIN, "-m", "fast", "--config", str(tmp_path / "none")], env
+        )
+    assert result.returncode == 0, result.stderr
+    assert server.messages[0]["message"] == "fast"
+    assert not modules & SUBCOMMAND_MODULES
+
+
+def test_via_daemon_skips_network_modules(tmp_path):
+    """デーモン経由の送信では HTTP のモジュールを読み込まないこと"""
+    socket_path = str(tmp_path / "daemon.sock")
+    with FakePushoverServer() as server:
+        daemon = NotificationDaemon(
+            PushoverCLI("token", "user", api_url=server.url), socket_path=socket_path
+        )
+        daemon.start()
+        try:
+            result, modules = startup_modules(
+                [RUN_MAIN, "-m", "queued", "--via-daemon", "--socket", socket_path]
+            )
+        finally:
+            daemon.stop()
+    assert result.returncode == 0, result.stderr
+    assert not modules & (NETWORK_MODULES | SUBCOMMAND_MODULES)
+    assert server.messages[0]["message"] == "queued"
@@ -0,0 +1,143 @@
+"""
+メッセージテンプレートのテスト
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.batch import run_batch
+from pushover_cli.core import MAX_MESSAGE_LENGTH, MAX_TITLE_LENGTH, PushoverCLI
+from pushover_cli.settings import parse_config
+from pushover_cli.templates import (
+    MessageTemplate,
+    TemplateError,
+    compile_template,
+    load_templates,
+    parse_variables,
+)
+from pushover_cli.testing import FakePushoverServer
+
+
+CONFIG = """
+PUSHOVER_TOKEN=token
+
+[template:disk]
+TITLE=ディスク容量警告 ({host})
+MESSAGE=<b>{mount}</b> の使用量が {usage}% に達しました
+URL=https://grafana.example.com/d/disk?host={host}
+PRIORITY=1
+HTML=1
+
+[template:plain]
+MESSAGE={text} ({{literal}})
+"""
+
+
+def test_compile_and_render():
+    """変数を展開し、同じテンプレート文字列は1回だけ解析されること"""
+    compiled = compile_template("{a}-{b} {{x}} {a}")
+    assert compiled is compile_template("{a}-{b} {{x}} {a}")
+    assert compiled.names == ("a", "b", "a")
+    assert compiled.render({"a": 1, "b": "B"}) == "1-B {x} 1"
+    with pytest.raises(TemplateError):
+        compiled.render({"a": 1})
+    with pytest.raises(TemplateError):
+        compile_template("unclosed {name")
+
+
+def test_config_templates():
+    """[template:名前] がプロファイルとは別に読み込まれること"""
+    config = parse_config(CONFIG)
+    assert config.profiles == {}
+    templates = load_templates(config)
+    assert templates["disk"].variables == ["host", "mount", "usage"]
+    rendered = templates["disk"].render({"host": "web1", "mount": "/var<x>", "usage": 93})
+    assert rendered == {
+        "title": "ディスク容量警告 (web1)",
+        "message": "<b>/var&lt;x&gt;</b> の使用量が 93% に達しました",
+        "url": "https://grafana.example.com/d/disk?host=web1",
+        "priority": 1,
+        "html": True,
+    }
+    assert templates["plain"].render({"text": "a"}) == {"message": "a ({literal})"}
+
+
+def test_length_aware_truncation():
+    """固定部分を残して変数の値を切り詰め、文字参照の途中で切らないこと"""
+    template = MessageTemplate("t", {
+        "title": "[{host}] {summary}",
+        "message": "<b>詳細</b>: {detail} / 対応: {action}",
+    }, html=True)
+    rendered = template.render({
+        "host": "web1", "summary": "x" * 500, "detail": "&" * 2000, "action": "再起動",
+    })
+    assert len(rendered["title"]) == MAX_TITLE_LENGTH
+    assert rendered["title"].startswith("[web1] xxx")
+    message = rendered["message"]
+    assert len(message) <= MAX_MESSAGE_LENGTH
+    assert message.startswith("<b>詳細</b>: &amp;") and message.endswith("… / 対応: 再起動")
+    assert "&amp…" not in message and "&am…" not in message
+
+    with pytest.raises(TemplateError):
+        MessageTemplate("u", {"url": "https://example.com/{path}"}).render({"path": "a" * 600})
+
+
+def test_parse_variables():
+    assert parse_variables(["a=1", "b=x=y", "c="]) == {"a": "1", "b": "x=y", "c": ""}
+    with pytest.raises(TemplateError):
+        parse_variables(["novalue"])
+
+
+def test_batch_renders_templates():
+    """バッチの各行でテンプレートを展開し、行の指定を優先すること"""
+    templates = load_templates(parse_config(CONFIG))
+    lines = [
+        json.dumps({"template": "disk", "vars": {"host": "h1", "mount": "/", "usage": 91}}),
+        json.dumps({"template": "disk", "vars": {"host": "h2", "mount": "/", "usage": 99},
+                    "priority": 2}),
+        json.dumps({"template": "disk", "vars": {"host": "h3"}}),
+        json.dumps({"template": "missing"}),
+    ]
+    output = io.StringIO()
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            succeeded, failed = run_batch(client, lines, output, concurrency=2,
+                                          templates=templates)
+    assert (succeeded, failed) == (2, 2)
+    sent = sorted(server.messages, key=lambda m: m["title"])
+    assert [(m["title"], m["priority"], m["html"]) for m in sent] == [
+        ("ディスク容量警告 (h1)", "1", "1"), ("ディスク容量警告 (h2)", "2", "1"),
+    ]
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert "mount" in results[2]["message"] and "missing" in results[3]["message"]
+
+
+def test_cli_template(tmp_path):
+    """--template と --var / --vars-json で送信できること"""
+    config = tmp_path / "config"
+    config.write_text(CONFIG)
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        command = [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+                   "--config", str(config), "--template", "disk"]
+        result = subprocess.run(
+            command + ["--vars-json", '{"host": "web1", "mount": "/"}', "--var", "usage=95",
+                       "--title", "上書き"],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+        assert result.returncode == 0, result.stderr
+        missing = subprocess.run(command + ["--var", "host=web1"],
+                                 capture_output=True, text=True, env=env, cwd=ROOT)
+    assert missing.returncode == 1 and "mount" in missing.stderr
+    sent = server.messages[0]
+    assert (sent["title"], sent["priority"], sent["html"]) == ("上書き", "1", "1")
+    assert sent["message"] == "<b>/</b> の使用量が 95% に達しました"
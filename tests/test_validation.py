@@ -0,0 +1,99 @@
+"""
+キー検証（/1/users/validate.json）とキャッシュのテスト
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.broadcast import run_broadcast
+from pushover_cli.core import PushoverCLI
+from pushover_cli.fanout import send_to_many
+from pushover_cli.testing import FakePushoverServer
+from pushover_cli.validation import (
+    SQLiteValidationStore,
+    UserValidator,
+    ValidatingPushover,
+)
+
+
+def test_validator_caches_results():
+    """有効・無効の結果をキャッシュし、一時的な失敗は保存しないこと"""
+    with FakePushoverServer() as server:
+        server.invalid_users.add("dead")
+        server.devices["user"] = ["iphone", "ipad"]
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            validator = UserValidator(client)
+            assert validator.validate().devices == ("iphone", "ipad")
+            assert validator.check(device="iphone,ipad") is None
+            assert "pixel" in validator.check(device="pixel")
+            assert not validator.validate("dead").valid
+            assert "無効" in validator.check("dead")
+            assert server.validations == 2
+
+            server.inject_failures(503)
+            # 検証できない場合は送信して API の判断に任せる
+            assert validator.check("other") is None
+            assert validator.validate("other").valid
+            assert server.validations == 4
+
+
+def test_validating_client_skips_dead_keys(tmp_path):
+    """無効と分かっているキーには次回以降 API を呼ばずに失敗を返すこと"""
+    path = str(tmp_path / "validation.sqlite3")
+    roster = [f"u{i}" for i in range(20)] + ["dead1", "dead2"]
+    with FakePushoverServer() as server:
+        server.invalid_users.update({"dead1", "dead2"})
+        for _ in range(2):
+            client = PushoverCLI("token", "", api_url=server.url)
+            with ValidatingPushover(client, store=SQLiteValidationStore(path)) as pushover:
+                report = send_to_many(pushover, roster, "お知らせ", concurrency=4)
+            assert [result.user for result in report.failed] == ["dead1", "dead2"]
+            assert pushover.rejected == 2
+        # 2回目の実行はキャッシュの結果だけで判断している
+        assert server.validations == len(roster)
+        assert len(server.messages) == 2 * 20
+
+        # キャッシュ上は有効でもデバイスが削除されていれば問い合わせ直す
+        server.devices["u0"] = ["phone"]
+        client = PushoverCLI("token", "u0", api_url=server.url)
+        with ValidatingPushover(client, store=SQLiteValidationStore(path)) as pushover:
+            assert not pushover.send_notification("x", device="tablet")[0]
+            assert "tablet" in pushover.send_notification("x", device="tablet")[1]
+        assert server.validations == len(roster) + 1
+
+
+def test_broadcast_with_validation_cache(tmp_path):
+    """一斉送信のワーカーが検証結果のファイルを共有すること"""
+    path = str(tmp_path / "validation.sqlite3")
+    users = [f"u{i}" for i in range(30)] + ["dead"]
+    with FakePushoverServer() as server:
+        server.invalid_users.add("dead")
+        for _ in range(2):
+            report = run_broadcast("token", users, "m", processes=2, chunk_size=10,
+                                   api_url=server.url, validation_cache=path)
+            assert [result.user for result in report.failed] == ["dead"]
+    assert server.validations == len(users)
+    assert len(server.messages) == 2 * 30
+
+
+def test_config_test_does_not_send(tmp_path):
+    """config test は通知を送らずに認証情報を検証すること"""
+    with FakePushoverServer() as server:
+        server.devices["user"] = ["iphone"]
+        env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user", HOME=str(tmp_path))
+        command = [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+                   "config", "test"]
+        result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=ROOT)
+        assert result.returncode == 0, result.stderr
+        assert "iphone" in result.stdout
+        assert server.validations == 1 and server.messages == []
+
+        server.invalid_users.add("user")
+        result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=ROOT)
+        assert result.returncode == 1
+        assert "無効" in result.stderr
@@ -0,0 +1,141 @@
+"""
+ログ監視（watch）のテスト
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import MAX_MESSAGE_LENGTH, PushoverCLI
+from pushover_cli.testing import FakePushoverServer
+from pushover_cli.watch import LogFollower, LogWatcher, PatternMatcher
+
+
+def test_matcher_finds_matching_lines():
+    """複数パターンのいずれかに一致した行だけを返すこと"""
+    matcher = PatternMatcher([r"ERROR", r"^panic:", r"タイムアウト"])
+    text = "info ok\nERROR disk\npanic: boom\nnot panic: here\n接続タイムアウト\nlast ERROR"
+    assert list(matcher.scan(text)) == [
+        (0, "ERROR disk"), (1, "panic: boom"), (2, "接続タイムアウト"), (0, "last ERROR")
+    ]
+    # 1行に複数回一致しても1回だけ返す
+    assert list(matcher.scan("ERROR ERROR ERROR\n")) == [(0, "ERROR ERROR ERROR")]
+    assert list(PatternMatcher(["error"], ignore_case=True).scan("An Error\n")) == [(0, "An Error")]
+    # まとめられないパターン（途中のインラインフラグ）でも検索できる
+    assert list(PatternMatcher(["a", "(?i)b"]).scan("x\nB\n")) == [(1, "B")]
+
+
+def test_follower_handles_partial_lines_rotation_and_truncation(tmp_path):
+    """追記・書きかけの行・ローテーション・切り詰めを追跡できること"""
+    path = tmp_path / "app.log"
+    path.write_text("old line\n")
+    follower = LogFollower(str(path))
+    assert list(follower.read_available()) == []
+
+    with open(path, "a") as f:
+        f.write("first\nsec")
+    assert "".join(follower.read_available()) == "first\n"
+    with open(path, "a") as f:
+        f.write("ond\n")
+    assert "".join(follower.read_available()) == "second\n"
+
+    # ローテーション: 古いファイルの残りを読んでから新しいファイルに移る
+    with open(path, "a") as f:
+        f.write("before rotate\n")
+    os.rename(path, tmp_path / "app.log.1")
+    path.write_text("after rotate\n")
+    assert "".join(follower.read_available()) == "before rotate\nafter rotate\n"
+    assert follower.rotations == 1
+
+    # 切り詰め: 先頭から読み直す
+    path.write_text("")
+    with open(path, "a") as f:
+        f.write("new\n")
+    assert "".join(follower.read_available()) == "new\n"
+    assert follower.truncations == 1
+    follower.close()
+
+
+def test_watcher_coalesces_and_rate_limits(tmp_path):
+    """一致をまとめて通知し、送信ペースの上限を超えた分は件数を数え続けること"""
+    path = tmp_path / "app.log"
+    path.write_text("")
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            watcher = LogWatcher(client, str(path), ["ERROR"], window=0.0,
+                                 max_per_minute=1, max_samples=2, priority=1)
+            watcher.process("ok\nERROR a\nERROR b\nERROR c\n")
+            assert watcher.flush() == 1
+            watcher.process("ERROR d\n" * 3000)
+            # 1分あたり1件のため送信せず、件数だけ数える
+            assert watcher.flush() == 0
+            watcher.process("ERROR e\n")
+            assert watcher.flush(force=True) == 1
+    first, second = server.messages
+    assert first["title"] == "app.log: ERROR（3件）"
+    assert first["message"] == "ERROR a\nERROR b\n…ほか1件"
+    assert first["priority"] == "1"
+    assert second["title"].endswith("（3001件）")
+    assert len(second["message"]) <= MAX_MESSAGE_LENGTH
+    assert watcher.lines == 3005 and watcher.matched == 3004
+
+
+def test_watcher_follows_appended_lines(tmp_path):
+    """run() が追記された行を通知し、停止時に残りを送信すること"""
+    path = tmp_path / "app.log"
+    path.write_text("ERROR before start\n")
+    stop = threading.Event()
+    with FakePushoverServer() as server:
+        with PushoverCLI("token", "user", api_url=server.url) as client:
+            watcher = LogWatcher(client, str(path), ["ERROR"], window=60.0)
+            thread = threading.Thread(target=watcher.run, args=(stop,),
+                                      kwargs={"poll_interval": 0.01})
+            thread.start()
+            time.sleep(0.1)
+            with open(path, "a") as f:
+                f.write("ERROR after start\n")
+            time.sleep(0.2)
+            stop.set()
+            thread.join(5)
+    assert [m["message"] for m in server.messages] == ["ERROR after start"]
+
+
+def test_scan_throughput(tmp_path):
+    """一致の少ないログを毎秒10万行以上の速さで処理できること"""
+    line = "2024-01-01T00:00:00 host app[123]: request completed status=200 path=/api/items\n"
+    path = tmp_path / "big.log"
+    with open(path, "w") as f:
+        for i in range(20):
+            f.write(line * 10000)
+            f.write("2024-01-01T00:00:00 host app[123]: ERROR upstream timeout\n")
+    matcher = PatternMatcher([r"ERROR", r"Traceback", r"status=5\d\d"])
+    follower = LogFollower(str(path), from_start=True)
+    started = time.perf_counter()
+    matched = sum(1 for text in follower.read_available() for _ in matcher.scan(text))
+    elapsed = time.perf_counter() - started
+    follower.close()
+    assert matched == 20
+    assert 200020 / elapsed > 100000, f"{200020 / elapsed:.0f} lines/s"
+
+
+def test_cli_watch_once(tmp_path):
+    """watch --once で既存の内容を検索して通知すること"""
+    path = tmp_path / "app.log"
+    path.write_text("ok\nFATAL: db down\nok\n")
+    with FakePushoverServer() as server:
+        env = dict(os.environ, PUSHOVER_API_URL=server.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        result = subprocess.run(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()",
+             "watch", str(path), "--pattern", "FATAL", "--once", "--title", "DB",
+             "--config", str(tmp_path / "none")],
+            capture_output=True, text=True, env=env, cwd=ROOT
+        )
+    assert result.returncode == 0, result.stderr
+    assert server.messages[0]["title"] == "DB"
+    assert server.messages[0]["message"] == "FATAL: db down"
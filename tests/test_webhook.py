@@ -0,0 +1,143 @@
+"""
+webhook 受信（pushover serve）のテスト
+"""
+
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pushover_cli.core import PushoverCLI
+from pushover_cli.dispatch import QueuedPushover
+from pushover_cli.templates import MessageTemplate
+from pushover_cli.testing import FakePushoverServer
+from pushover_cli.webhook import FieldMapping, WebhookServer
+
+
+ALERTMANAGER_PAYLOAD = {
+    "status": "firing",
+    "commonLabels": {"alertname": "DiskFull", "instance": "web1"},
+    "alerts": [{"annotations": {"summary": "/var が 95% に達しました"}}],
+}
+
+
+def _post(connection, path, payload, headers=None):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    connection.request("POST", path, body, {"Content-Type": "application/json", **(headers or {})})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_field_mapping():
+    """ドット区切りのパスでペイロードの値を参照し、項目の検証も行うこと"""
+    mapping = FieldMapping.parse([
+        "title={commonLabels.alertname} ({commonLabels.instance})",
+        "message={alerts.0.annotations.summary}",
+        "priority=1",
+    ])
+    assert mapping.apply(ALERTMANAGER_PAYLOAD) == {
+        "title": "DiskFull (web1)", "message": "/var が 95% に達しました", "priority": 1,
+    }
+    # 展開結果の "0"/"1" は真偽値として扱う
+    for value, expected in (("0", False), ("1", True), ("{html}", True)):
+        html_mapping = FieldMapping.parse(["message=x", f"html={value}"])
+        assert html_mapping.apply({"html": True})["html"] is expected
+    for payload in ({"commonLabels": {}}, {"alerts": []}):
+        try:
+            mapping.apply(payload)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("参照した値がない場合はエラーになること")
+    for items in (["attachment={path}"], ["message"]):
+        try:
+            FieldMapping.parse(items)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"不正な対応: {items}")
+
+
+def test_webhook_enqueues_single_and_batch():
+    """1件・配列のペイロードを送信キューに登録し、keep-alive の接続で応答すること"""
+    templates = {"ci": MessageTemplate("ci", {"title": "CI {repo}", "message": "{status}"})}
+    with FakePushoverServer() as api:
+        pushover = QueuedPushover(PushoverCLI("token", "user", api_url=api.url), block_timeout=0)
+        server = WebhookServer(pushover, port=0, templates=templates, secret="s3cret")
+        server.start()
+        try:
+            connection = http.client.HTTPConnection(*server.address)
+            auth = {"Authorization": "Bearer s3cret"}
+            assert _post(connection, "/", {"message": "one"})[0] == 401
+            assert _post(connection, "/", {"message": "one", "priority": 1}, auth) == \
+                (202, {"status": 1, "queued": 1})
+            status, payload = _post(connection, "/", [{"message": "a"}, {"message": "b"}], auth)
+            assert (status, payload["queued"]) == (202, 2)
+            # 1件でも不正なら配列のどれも登録しない
+            status, payload = _post(connection, "/", [{"message": "c"}, {"title": "x"}], auth)
+            assert status == 400 and payload["errors"][0].startswith("1:")
+            assert _post(connection, "/", {"message": "x", "attachment": "/etc/passwd"}, auth)[0] == 400
+            assert _post(connection, "/", b"{broken", auth)[0] == 400
+            assert _post(connection, "/template/ci", {"repo": "app", "status": "ok"}, auth)[0] == 202
+            assert _post(connection, "/unknown", {"message": "x"}, auth)[0] == 404
+            connection.request("GET", "/health")
+            health = json.loads(connection.getresponse().read())
+            assert health["status"] == 1
+            # 1つの接続ですべてのリクエストを処理している
+            assert connection.sock is not None
+            connection.close()
+        finally:
+            assert server.stop(timeout=5)
+    assert sorted(m["message"] for m in api.messages) == ["a", "b", "ok", "one"]
+    assert [m["title"] for m in api.messages if m["message"] == "ok"] == ["CI app"]
+    assert (server.accepted, server.rejected) == (4, 3)
+
+
+def test_webhook_returns_503_when_queue_is_full():
+    """送信キューが満杯のときは待たずに 503 を返すこと"""
+    with FakePushoverServer(latency=0.2) as api:
+        pushover = QueuedPushover(PushoverCLI("token", "user", api_url=api.url),
+                                  maxsize=2, block_timeout=0)
+        server = WebhookServer(pushover, port=0)
+        server.start()
+        try:
+            connection = http.client.HTTPConnection(*server.address)
+            status, payload = _post(connection, "/", [{"message": f"m{i}"} for i in range(5)])
+            assert status == 503
+            assert 2 <= payload["queued"] < 5
+            connection.close()
+        finally:
+            server.stop(timeout=5)
+
+
+def test_serve_command(tmp_path):
+    """pushover serve が --map で変換した通知を送信し、SIGTERM で残りを送信して終了すること"""
+    with FakePushoverServer() as api:
+        env = dict(os.environ, PUSHOVER_API_URL=api.url,
+                   PUSHOVER_TOKEN="token", PUSHOVER_USER="user")
+        process = subprocess.Popen(
+            [sys.executable, "-c", "from pushover_cli.cli import main; main()", "serve",
+             "--port", "0", "--config", str(tmp_path / "none"),
+             "--map", "title={commonLabels.alertname}",
+             "--map", "message={alerts.0.annotations.summary}"],
+            stderr=subprocess.PIPE, text=True, env=env, cwd=ROOT
+        )
+        try:
+            line = process.stderr.readline()
+            assert "http://" in line, line
+            host, port = line.rsplit("http://", 1)[1].strip().rsplit(":", 1)
+            connection = http.client.HTTPConnection(host, int(port))
+            assert _post(connection, "/", ALERTMANAGER_PAYLOAD)[0] == 202
+            connection.close()
+        finally:
+            process.send_signal(signal.SIGTERM)
+            _, stderr = process.communicate(timeout=10)
+    assert process.returncode == 0, stderr
+    assert "受付 1 件" in stderr
+    assert [(m["title"], m["message"]) for m in api.messages] == \
+        [("DiskFull", "/var が 95% に達しました")]